@@ -0,0 +1,258 @@
+"""Offline benchmark of the download_video / get_user_videos paths
+
+Everything runs against douyin_localserver.StandInSite on 127.0.0.1: a
+range-capable stand-in CDN with configurable latency and bandwidth, and
+fixture video/profile pages in place of douyin.com. Each scenario runs
+in its own process so CPU time and peak RSS belong to it alone.
+
+    python benchmarks/bench_download.py                       # single + batch over HTTP
+    python benchmarks/bench_download.py --bandwidth 20 --connection-bandwidth 4 --segments 4
+    python benchmarks/bench_download.py --browser             # + page resolve and profile listing (Chrome)
+    python benchmarks/bench_download.py --compare benchmarks/results/download-<earlier>.json
+
+Scenarios:
+    single   one download_video at a time, media URLs from the cache (no browser)
+    batch    a DownloadPipeline over --batch videos, media URLs from the cache
+    resolve  download_video on fixture video pages, URL found by Chrome (--browser)
+    profile  iter_user_videos on the fixture profile page (--browser)
+
+Results go to benchmarks/results/download-<timestamp>.json: throughput,
+p50/p95 latency per stage, CPU and peak RSS per scenario, plus the
+config and environment so runs can be compared.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from itertools import islice
+
+from harness import ResourceMeter, StageTimer, compare, latency_stats, save_result
+
+from douyin_localserver import StandInSite
+
+MB = 1024 * 1024
+FIRST_VIDEO_ID = 7300000000000000000
+HTTP_SCENARIOS = ('single', 'batch')
+BROWSER_SCENARIOS = ('resolve', 'profile')
+
+
+def _timed_downloader_class():
+    from douyin_core import DouyinDownloader
+
+    class TimedDownloader(DouyinDownloader):
+        """DouyinDownloader that records how long each stage of a download takes"""
+
+        def __init__(self, timer: StageTimer, **kwargs):
+            super().__init__(**kwargs)
+            self.timer = timer
+
+        def is_downloaded(self, video_id, download_path="downloads"):
+            with self.timer.time('manifest'):
+                return super().is_downloaded(video_id, download_path)
+
+        def resolve_video_url(self, url, use_cache=True):
+            with self.timer.time('resolve'):
+                return super().resolve_video_url(url, use_cache)
+
+        def download_media(self, video_url, video_id, download_path="downloads", progress_callback=None):
+            with self.timer.time('transfer'):
+                return super().download_media(video_url, video_id, download_path, progress_callback)
+
+    return TimedDownloader
+
+
+def _video_ids(count: int):
+    return [str(FIRST_VIDEO_ID + i) for i in range(count)]
+
+
+def _downloaded_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path) if name.endswith('.mp4'))
+
+
+def run_scenario(name: str, config: dict, site: dict) -> dict:
+    """Run one scenario in this (child) process and return its metrics"""
+    from douyin_cache import MediaUrlCache
+    from douyin_engine import DownloadPipeline
+    from douyin_http import HttpConfig, create_session
+
+    work_dir = tempfile.mkdtemp(prefix='douyin-bench-')
+    output = os.path.join(work_dir, 'downloads')
+    log = (lambda message: print(message, file=sys.stderr)) if config['verbose'] else (lambda message: None)
+    timer = StageTimer()
+    latencies = []
+    videos = ok = 0
+    TimedDownloader = _timed_downloader_class()
+    http_config = HttpConfig(pool_maxsize=max(32, config['transfers'] * config['segments']))
+    session = create_session(http_config)
+
+    def new_downloader(**kwargs):
+        return TimedDownloader(timer, log_callback=log, segments=config['segments'], http_config=http_config,
+                               session=session, force_headless=True, **kwargs)
+
+    try:
+        if name in BROWSER_SCENARIOS:
+            import selenium  # noqa: F401  (download_video would swallow the ImportError)
+        with ResourceMeter() as meter:
+            if name in HTTP_SCENARIOS:
+                # Pre-resolved URLs, as on a re-run with a warm cache: only the HTTP path is measured
+                cache = MediaUrlCache(os.path.join(work_dir, 'cache.sqlite'))
+                count = config['repeat'] if name == 'single' else config['batch']
+                for video_id in _video_ids(count):
+                    cache.put(video_id, f"{site['base_url']}/media/{video_id}.mp4")
+                urls = [f"https://www.douyin.com/video/{video_id}" for video_id in _video_ids(count)]
+                if name == 'single':
+                    downloader = new_downloader(media_cache=cache)
+                    for url in urls:
+                        start = time.perf_counter()
+                        ok += downloader.download_video(url, output)
+                        latencies.append(time.perf_counter() - start)
+                else:
+                    engine = DownloadPipeline(lambda: new_downloader(media_cache=cache),
+                                              resolve_workers=config['resolvers'],
+                                              transfer_workers=config['transfers'], retries=config['retries'],
+                                              retry_delay=0.2, log_callback=log)
+                    result = engine.run(urls, output)
+                    engine.stop()
+                    ok = len(result.succeeded)
+                    latencies = [job.elapsed for job in result.jobs]
+                videos = count
+            elif name == 'resolve':
+                downloader = new_downloader()
+                try:
+                    for video_id in _video_ids(config['repeat']):
+                        start = time.perf_counter()
+                        ok += downloader.download_video(f"{site['base_url']}/video/{video_id}", output)
+                        latencies.append(time.perf_counter() - start)
+                        videos += 1
+                finally:
+                    downloader._cleanup_driver()
+            elif name == 'profile':
+                downloader = new_downloader()
+                try:
+                    start = time.perf_counter()
+                    for _ in islice(downloader.iter_user_videos(site['user_url']), config['profile_limit']):
+                        latencies.append(time.perf_counter() - start)  # Time until the n-th video was listed
+                        videos += 1
+                    ok = videos
+                finally:
+                    downloader._cleanup_driver()
+            else:
+                raise ValueError(f"unknown scenario {name}")
+    except Exception as e:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return {'error': f"{type(e).__name__}: {e}"}
+
+    size = _downloaded_bytes(output) if os.path.isdir(output) else 0
+    shutil.rmtree(work_dir, ignore_errors=True)
+    wall = meter.result['wall_s']
+    metrics = {
+        'videos': videos,
+        'ok': ok,
+        'failed': videos - ok,
+        'bytes': size,
+        'throughput_mb_s': round(size / MB / wall, 2) if wall else 0.0,
+        'videos_per_s': round(videos / wall, 2) if wall else 0.0,
+        'latency': latency_stats(latencies),
+        'stages': timer.report(),
+    }
+    metrics.update(meter.result)
+    return metrics
+
+
+def _child(name: str, config: dict, site: dict, results):
+    results.put(run_scenario(name, config, site))
+
+
+def run_isolated(name: str, config: dict, site: dict, timeout: float) -> dict:
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_child, args=(name, config, site, results), daemon=True)
+    process.start()
+    try:
+        return results.get(timeout=timeout)
+    except Exception:
+        return {'error': f"không xong trong {timeout:.0f}s"}
+    finally:
+        process.join(5)
+        if process.is_alive():
+            process.terminate()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark tải video hoàn toàn offline")
+    parser.add_argument('--scenarios', default=','.join(HTTP_SCENARIOS),
+                        help=f"Danh sách kịch bản, cách nhau bởi dấu phẩy ({', '.join(HTTP_SCENARIOS + BROWSER_SCENARIOS)})")
+    parser.add_argument('--browser', action='store_true', help="Thêm các kịch bản dùng Chrome (resolve, profile)")
+    parser.add_argument('--size', type=float, default=8, help="Dung lượng mỗi video (MB)")
+    parser.add_argument('--repeat', type=int, default=5, help="Số video cho single/resolve")
+    parser.add_argument('--batch', type=int, default=20, help="Số video cho batch")
+    parser.add_argument('--resolvers', type=int, default=2)
+    parser.add_argument('--transfers', type=int, default=6)
+    parser.add_argument('--segments', type=int, default=1)
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--profile-limit', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0, help="Độ trễ thêm vào mỗi response (ms)")
+    parser.add_argument('--bandwidth', type=float, default=0, help="Băng thông tổng của server (MB/s, 0 = không giới hạn)")
+    parser.add_argument('--connection-bandwidth', type=float, default=0, help="Băng thông mỗi kết nối (MB/s)")
+    parser.add_argument('--max-connections', type=int, default=0, help="Quá số kết nối này server trả 429")
+    parser.add_argument('--timeout', type=float, default=600, help="Thời gian tối đa mỗi kịch bản (s)")
+    parser.add_argument('--output', default=None, help="File kết quả (mặc định benchmarks/results/download-<thời gian>.json)")
+    parser.add_argument('--compare', default=None, help="So sánh với một file kết quả trước")
+    parser.add_argument('-v', '--verbose', action='store_true', help="In log của downloader ra stderr")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    if args.browser:
+        scenarios += [name for name in BROWSER_SCENARIOS if name not in scenarios]
+    config = {
+        'scenarios': scenarios,
+        'size_mb': args.size,
+        'repeat': args.repeat,
+        'batch': args.batch,
+        'resolvers': args.resolvers,
+        'transfers': args.transfers,
+        'segments': args.segments,
+        'retries': args.retries,
+        'profile_limit': args.profile_limit,
+        'latency_ms': args.latency,
+        'bandwidth_mb_s': args.bandwidth,
+        'connection_bandwidth_mb_s': args.connection_bandwidth,
+        'max_connections': args.max_connections,
+        'verbose': args.verbose,
+    }
+
+    results = {}
+    with StandInSite(video_size=int(args.size * MB), latency=args.latency / 1000, bandwidth=args.bandwidth * MB,
+                     connection_bandwidth=args.connection_bandwidth * MB,
+                     max_connections=args.max_connections) as server:
+        site = {'base_url': server.base_url, 'user_url': server.user_url()}
+        for name in scenarios:
+            before = server.stats()
+            print(f"Đang chạy {name}...", file=sys.stderr)
+            metrics = run_isolated(name, config, site, args.timeout)
+            after = server.stats()
+            metrics['server'] = {
+                'requests': after['requests'] - before['requests'],
+                'bytes_sent': after['bytes_sent'] - before['bytes_sent'],
+                'throttled': after['throttled'] - before['throttled'],
+            }
+            results[name] = metrics
+
+    path = save_result('download', config, results, args.output)
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"Đã lưu kết quả: {path}", file=sys.stderr)
+    if args.compare:
+        for line in compare(args.compare, results):
+            print(line, file=sys.stderr)
+    return 1 if any('error' in metrics or metrics.get('failed') for metrics in results.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
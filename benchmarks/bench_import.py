@@ -0,0 +1,85 @@
+"""Import-time benchmark for douyin_core
+
+Runs `import douyin_core` in fresh interpreters (the cost every worker
+process pays at startup), reports wall time and `-X importtime`
+cumulative time, and checks that the GUI/browser stacks stay unloaded:
+
+    python benchmarks/bench_import.py --runs 20 --max-ms 150
+
+Prints one JSON object; exits 1 if a heavy module was imported or the
+median exceeds --max-ms.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from harness import ROOT, percentile
+
+# Must only load on the browser/captcha/clipboard paths
+HEAVY_MODULES = ('PyQt5', 'selenium', 'webdriver_manager', 'requests', 'urllib3', 'aiohttp', 'capsolver')
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{'ms': elapsed * 1000, 'heavy': heavy}}))
+"""
+
+
+def run_probe(module: str) -> dict:
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def importtime_top(module: str, limit: int = 10) -> list:
+    """Slowest modules by cumulative import time (microseconds) from -X importtime"""
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                         cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line.split(':', 1)[1].split('|'))
+        rows.append({'module': name, 'self_us': int(self_us), 'cumulative_us': int(cumulative_us)})
+    rows.sort(key=lambda row: row['cumulative_us'], reverse=True)
+    return rows[:limit]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Đo thời gian import douyin_core trong tiến trình mới")
+    parser.add_argument('--module', default='douyin_core')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, default=None, help="Thoát với mã 1 nếu trung vị vượt ngưỡng này")
+    args = parser.parse_args(argv)
+
+    run_probe(args.module)  # Warm the OS file cache and __pycache__
+    results = [run_probe(args.module) for _ in range(args.runs)]
+    times = [result['ms'] for result in results]
+    heavy = sorted({name for result in results for name in result['heavy']})
+    report = {
+        'module': args.module,
+        'runs': args.runs,
+        'median_ms': round(statistics.median(times), 2),
+        'p95_ms': round(percentile(times, 0.95), 2),
+        'min_ms': round(min(times), 2),
+        'heavy_modules_loaded': heavy,
+        'slowest_imports': importtime_top(args.module),
+    }
+    print(json.dumps(report, indent=2))
+
+    if heavy:
+        print(f"Lỗi: import {args.module} đã nạp {', '.join(heavy)}", file=sys.stderr)
+        return 1
+    if args.max_ms is not None and report['median_ms'] > args.max_ms:
+        print(f"Lỗi: trung vị {report['median_ms']}ms vượt ngưỡng {args.max_ms}ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
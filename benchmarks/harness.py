@@ -0,0 +1,160 @@
+"""Shared pieces of the benchmark scripts: timing, resource usage and result files"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+SCHEMA_VERSION = 1
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def latency_stats(seconds: List[float]) -> Dict[str, float]:
+    """count / mean / p50 / p95 / max of a list of durations, in milliseconds"""
+    if not seconds:
+        return {'count': 0}
+    return {
+        'count': len(seconds),
+        'mean_ms': round(statistics.mean(seconds) * 1000, 2),
+        'p50_ms': round(percentile(seconds, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(seconds, 0.95) * 1000, 2),
+        'max_ms': round(max(seconds) * 1000, 2),
+    }
+
+
+class StageTimer:
+    """Thread-safe collection of durations per named stage"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def time(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {stage: latency_stats(values) for stage, values in sorted(self.samples.items())}
+
+
+def _rusage() -> Optional[Dict[str, float]]:
+    """CPU seconds and peak RSS (MB) of this process; psutil is used where `resource` is missing (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        process = psutil.Process()
+        cpu = process.cpu_times()
+        memory = process.memory_info()
+        return {'cpu': cpu.user + cpu.system, 'peak_rss_mb': getattr(memory, 'peak_wset', memory.rss) / 2 ** 20}
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    rss = usage.ru_maxrss / 2 ** 20 if sys.platform == 'darwin' else usage.ru_maxrss / 1024
+    return {'cpu': usage.ru_utime + usage.ru_stime, 'peak_rss_mb': rss}
+
+
+class ResourceMeter:
+    """Wall time, CPU time and peak RSS across a `with` block (run each scenario in its own process)"""
+
+    def __enter__(self) -> 'ResourceMeter':
+        self._start = _rusage()
+        self._wall = time.perf_counter()
+        self.result: Dict[str, float] = {}
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self._wall
+        end = _rusage()
+        self.result = {'wall_s': round(wall, 3)}
+        if self._start and end:
+            cpu = end['cpu'] - self._start['cpu']
+            self.result.update({
+                'cpu_s': round(cpu, 3),
+                'cpu_percent': round(100 * cpu / wall, 1) if wall else 0.0,
+                'peak_rss_mb': round(end['peak_rss_mb'], 1),
+            })
+
+
+def environment() -> Dict[str, object]:
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                             text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        rev = None
+    return {
+        'git_rev': rev,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def save_result(name: str, config: Dict, scenarios: Dict, path: Optional[str] = None) -> str:
+    """Write a run to benchmarks/results/<name>-<timestamp>.json (or `path`) and return the path"""
+    result = {
+        'schema': SCHEMA_VERSION,
+        'benchmark': name,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment(),
+        'config': config,
+        'scenarios': scenarios,
+    }
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def _flatten(data: Dict, prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline_path: str, scenarios: Dict) -> List[str]:
+    """One line per numeric metric present in both runs: baseline -> current (change %)"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('schema') != SCHEMA_VERSION:
+        return [f"Bỏ qua so sánh: {baseline_path} dùng schema {baseline.get('schema')}"]
+    before, after = _flatten(baseline['scenarios']), _flatten(scenarios)
+    lines = []
+    for name in sorted(before.keys() & after.keys()):
+        old, new = before[name], after[name]
+        change = f"{(new - old) * 100 / old:+.1f}%" if old else "n/a"
+        lines.append(f"{name}: {old} -> {new} ({change})")
+    return lines
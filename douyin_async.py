@@ -0,0 +1,389 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from douyin_core import DouyinDownloader
+from douyin_engine import RESOLVING, DOWNLOADING, DONE, FAILED
+from douyin_http import DEFAULT_USER_AGENT
+from douyin_ratelimit import parse_retry_after
+from douyin_transfer import (CHUNK_SIZE, MediaUrlExpiredError, RemoteChangedError, ResumeState,
+                             ThrottledError, TransferError, TransferResult, is_complete, part_path_for,
+                             remote_info, split_ranges)
+from douyin_urls import short_code, video_id_from_url
+from douyin_writer import MediaWriter
+
+MIN_VIDEO_SIZE = 102400  # 100KB, same threshold as DouyinDownloader
+
+
+def _write_segment(writer: MediaWriter, state: ResumeState, index: int, offset: int, chunk: bytes):
+    writer.write_at(offset, chunk)
+    state.advance(index, len(chunk))  # Saves the sidecar about once a second
+
+
+def _save_if_present(state: ResumeState):
+    if os.path.exists(state.path):  # Not after a RemoteChangedError removed it
+        state.save()
+
+
+async def _run_all(coros: List[Awaitable]):
+    """Await all coroutines; when one fails, cancel the others and wait for them before re-raising
+
+    Plain gather() would leave the other segments writing to a .part whose
+    writer is about to be closed, with their connections still open.
+    """
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+@dataclass
+class ProgressEvent:
+    url: str
+    video_id: Optional[str]
+    state: str
+    downloaded: int = 0
+    total: int = 0
+    error: Optional[str] = None
+
+
+class AsyncDouyinDownloader:
+    """asyncio counterpart of DouyinDownloader for many concurrent CDN transfers
+
+    Transfers run on one aiohttp session, bounded by a semaphore, so
+    hundreds of downloads need no extra threads. Page resolution still
+    needs Selenium; it runs on the wrapped DouyinDownloader in a small
+    thread pool (one thread per browser), and is skipped whenever the
+    media cache already has the URL. Every CDN request waits for a MEDIA
+    token from the downloader's rate_limiter (if it has one), which also
+    hears about 429s.
+
+        async with AsyncDouyinDownloader(concurrency=200) as dl:
+            results = await dl.download_many(urls, "downloads")
+    """
+
+    def __init__(self, downloader: Optional[DouyinDownloader] = None, concurrency: int = 50,
+                 segments: int = 1, chunk_size: int = CHUNK_SIZE, connect_timeout: float = 10,
+                 read_timeout: float = 30,
+                 resolve_workers: int = 1, log_callback=None,
+                 on_event: Optional[Callable[[ProgressEvent], None]] = None):
+        self.downloader = downloader or DouyinDownloader(log_callback=log_callback)
+        self.concurrency = max(1, concurrency)
+        self.segments = segments
+        self.chunk_size = chunk_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.log_callback = log_callback or self.downloader.log_callback
+        self.on_event = on_event
+        # Selenium drivers are not thread-safe: with one worker all resolves share self.downloader,
+        # more workers only make sense together with a driver pool on the downloader
+        self.resolve_workers = max(1, resolve_workers)
+        self.progress_interval = 0.1  # Min seconds between DOWNLOADING events of one video
+        self._resolve_executor: Optional[ThreadPoolExecutor] = None
+        self._session = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._subscribers: List[asyncio.Queue] = []
+        self._last_progress: Dict[str, float] = {}
+
+    def log(self, message: str):
+        if self.log_callback:
+            self.log_callback(message)
+        else:
+            print(message)
+
+    async def __aenter__(self) -> 'AsyncDouyinDownloader':
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        if self._session is not None:
+            return
+        try:
+            import aiohttp
+        except ImportError:
+            raise RuntimeError("Cần cài aiohttp để dùng AsyncDouyinDownloader (pip install aiohttp)")
+        connector = aiohttp.TCPConnector(limit=self.concurrency * max(1, self.segments),
+                                         limit_per_host=self.concurrency * max(1, self.segments))
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.connect_timeout,
+                                        sock_read=self.read_timeout)
+        self._session = aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                              headers={'User-Agent': DEFAULT_USER_AGENT})
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._resolve_executor = ThreadPoolExecutor(max_workers=self.resolve_workers)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._resolve_executor is not None:
+            self._resolve_executor.shutdown(wait=False)
+            self._resolve_executor = None
+
+    def subscribe(self) -> asyncio.Queue:
+        """Queue that receives every ProgressEvent from now on"""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    def _emit(self, event: ProgressEvent):
+        bus = self.downloader.progress_bus
+        if bus is not None and event.video_id:
+            if event.state == DOWNLOADING:
+                bus.update(event.video_id, event.downloaded, event.total)
+            elif event.state in (DONE, FAILED):
+                bus.finish(event.video_id, event.state == DONE, event.error)
+            else:
+                bus.update(event.video_id, state=event.state, video_id=event.video_id)
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+        if self.on_event:
+            try:
+                self.on_event(event)
+            except Exception:
+                pass
+
+    def _progress(self, url: str, video_id: str, downloaded: int, total: int):
+        now = time.monotonic()
+        if now - self._last_progress.get(video_id, 0.0) >= self.progress_interval or downloaded >= total > 0:
+            self._last_progress[video_id] = now
+            self._emit(ProgressEvent(url, video_id, DOWNLOADING, downloaded, total))
+
+    async def _blocking(self, func: Callable, *args):
+        """Run file or SQLite work (manifest, media cache, sidecar, .part writes) on the default thread pool
+
+        A cancelled caller still waits for the call to finish, so no write lands after its writer is closed.
+        """
+        future = asyncio.get_running_loop().run_in_executor(None, func, *args)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            await asyncio.wait([future])
+            raise
+
+    async def _throttle(self, url: str):
+        """Wait for a token from the downloader's shared rate limiter without blocking the loop"""
+        limiter = self.downloader.rate_limiter
+        if limiter is None:
+            return
+        while True:
+            delay = limiter.try_acquire(url)
+            if not delay:
+                return
+            await asyncio.sleep(min(delay, 1.0))
+
+    async def _video_id(self, url: str) -> Optional[str]:
+        """extract_video_id, off the loop for short links (their expansion is a blocking round trip)"""
+        video_id = video_id_from_url(url)
+        if video_id or not short_code(url):
+            return self.downloader.extract_video_id(url)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._resolve_executor, self.downloader.extract_video_id, url)
+
+    async def resolve_video_url(self, url: str, use_cache: bool = True) -> Optional[str]:
+        cache = self.downloader.media_cache
+        video_id = await self._video_id(url)
+        if use_cache and cache is not None and video_id:
+            cached = await self._blocking(cache.get, video_id)
+            if cached:
+                return cached['url']
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._resolve_executor, self.downloader.resolve_video_url, url, use_cache)
+
+    async def download_video(self, url: str, download_path: str = "downloads") -> bool:
+        await self.open()
+        video_id = await self._video_id(url)
+        if not video_id:
+            self._emit(ProgressEvent(url, None, FAILED, error="invalid url"))
+            return False
+        if await self._blocking(self.downloader.is_downloaded, video_id, download_path):
+            self.log(f"Video {video_id} đã có trong thư mục, bỏ qua")
+            self._emit(ProgressEvent(url, video_id, DONE))
+            return True
+        self._emit(ProgressEvent(url, video_id, RESOLVING))
+        video_url = await self.resolve_video_url(url)
+        if not video_url:
+            self._emit(ProgressEvent(url, video_id, FAILED, error="could not resolve media url"))
+            return False
+
+        cache = self.downloader.media_cache
+        async with self._semaphore:
+            ok = await self.download_media(video_url, video_id, download_path, url)
+            if not ok and cache is not None and await self._blocking(cache.get, video_id) is None:
+                # The CDN rejected the URL and download_media dropped it from the cache; resolve a fresh one
+                video_url = await self.resolve_video_url(url, use_cache=False)
+                ok = bool(video_url) and await self.download_media(video_url, video_id, download_path, url)
+        return ok
+
+    async def download_many(self, urls: Iterable[str], download_path: str = "downloads") -> Dict[str, bool]:
+        """Download all URLs concurrently (bounded by `concurrency`), return url -> success"""
+        urls = list(urls)
+        results = await asyncio.gather(*(self.download_video(url, download_path) for url in urls),
+                                       return_exceptions=True)
+        return {url: result is True for url, result in zip(urls, results)}
+
+    async def download_media(self, video_url: str, video_id: str, download_path: str = "downloads",
+                             source_url: Optional[str] = None) -> bool:
+        source_url = source_url or video_url
+        limiter = self.downloader.rate_limiter
+        output_path = self.downloader.output_path_for(video_id, download_path)
+        os.makedirs(download_path, exist_ok=True)
+        try:
+            keep_existing = await self._blocking(self.downloader.may_keep_existing, video_id, download_path)
+            result = await self._transfer(video_url, output_path, source_url, video_id, keep_existing)
+            if result.size < MIN_VIDEO_SIZE:
+                os.remove(output_path)
+                raise TransferError("File tải xuống quá nhỏ, đã xóa")
+            await self._blocking(self.downloader.record_download, video_id, download_path, result.validator,
+                                 result.sha256)
+            self.log(f"Đã tải xong: {output_path}")
+            self._emit(ProgressEvent(source_url, video_id, DONE, result.size, result.size))
+            self._last_progress.pop(video_id, None)
+            if limiter is not None:
+                limiter.feedback(video_url, ok=True)
+            return True
+        except MediaUrlExpiredError as e:
+            # A stale signed URL, not throttling: the MEDIA rate is left alone (as in DouyinDownloader)
+            if self.downloader.media_cache is not None:
+                await self._blocking(self.downloader.media_cache.invalidate, video_id)
+            error = str(e)
+        except ThrottledError as e:
+            if limiter is not None:
+                limiter.feedback(video_url, status=429, retry_after=e.retry_after)
+            error = str(e)
+        except TransferError as e:
+            error = str(e)
+        except Exception as e:
+            error = f"Lỗi khi tải video: {str(e)}"
+        self.log(error)
+        self._emit(ProgressEvent(source_url, video_id, FAILED, error=error))
+        return False
+
+    def _check_status(self, status: int, headers=None):
+        if status in (403, 410):
+            raise MediaUrlExpiredError(f"URL video đã hết hạn hoặc bị từ chối ({status})")
+        if status == 429:
+            raise ThrottledError("Máy chủ video đang giới hạn tốc độ (429)",
+                                 parse_retry_after((headers or {}).get('Retry-After')))
+        if status >= 400:
+            raise TransferError(f"Lỗi HTTP {status}")
+
+    async def _transfer(self, video_url: str, output_path: str, source_url: str, video_id: str,
+                        keep_existing: bool = False) -> TransferResult:
+        """Same .part/.part.json layout as douyin_transfer.download_file, so sync and async resume each other"""
+        headers = {'Referer': 'https://www.douyin.com/'}
+
+        await self._throttle(video_url)
+        async with self._session.get(video_url, headers=dict(headers, Range='bytes=0-0')) as r:
+            self._check_status(r.status, r.headers)
+            remote = remote_info(r.status, r.headers)
+            if r.status == 206:
+                await r.read()  # Drain the 1-byte body so the connection goes back to the pool
+        total = remote['size']
+        if total and total < MIN_VIDEO_SIZE:
+            raise TransferError("File size quá nhỏ, có thể không phải video")
+        if keep_existing and await self._blocking(is_complete, output_path, remote):
+            return TransferResult(total, remote['etag'], remote['last_modified'])  # Unlisted but complete
+
+        if not remote['ranges'] or not total:
+            # No Range support: one plain stream, no resume
+            await self._throttle(video_url)
+            async with self._session.get(video_url, headers=headers) as r:
+                self._check_status(r.status, r.headers)
+                downloaded = 0
+                writer = await self._blocking(MediaWriter, output_path, total)
+                try:
+                    async for chunk in r.content.iter_chunked(self.chunk_size):
+                        await self._blocking(writer.write, chunk)
+                        downloaded += len(chunk)
+                        self._progress(source_url, video_id, downloaded, total)
+                    if total and downloaded != total:
+                        raise TransferError(f"Tải thiếu dữ liệu ({downloaded}/{total} bytes)")
+                    size, sha256 = await self._blocking(writer.commit)
+                finally:
+                    writer.close()
+            return TransferResult(size, remote['etag'], remote['last_modified'], sha256)
+
+        state, writer = await self._blocking(self._open_part, video_url, output_path, remote)
+        try:
+            await _run_all([self._fetch_range(video_url, writer, headers, state, i, source_url, video_id)
+                            for i, (start, end, done) in enumerate(state.segments) if start + done <= end])
+        except RemoteChangedError:
+            writer.close()
+            state.remove()
+            raise
+        except BaseException:
+            writer.close()
+            raise
+        finally:
+            await self._blocking(_save_if_present, state)
+        # Hashing what arrived out of order reads the file back
+        size, sha256 = await self._blocking(writer.commit)
+        state.remove()
+        return TransferResult(size, remote['etag'], remote['last_modified'], sha256)
+
+    def _open_part(self, video_url: str, output_path: str, remote: Dict) -> Tuple[ResumeState, MediaWriter]:
+        """Load the sidecar of a .part that can be resumed, or start a new one; opens the preallocated .part"""
+        part_path = part_path_for(output_path)
+        state_path = part_path + '.json'
+        total = remote['size']
+        state = None
+        if os.path.exists(part_path) and os.path.getsize(part_path) == total:
+            state = ResumeState.load(state_path, video_url, remote)
+        resume = bool(state and state.segments)
+        if resume:
+            state.url = video_url
+        else:
+            state = ResumeState(state_path, video_url, remote,
+                                [[start, end, 0] for start, end in split_ranges(total, self.segments)])
+        writer = MediaWriter(output_path, total, resume=resume)
+        state.save()
+        return state, writer
+
+    async def _fetch_range(self, video_url: str, writer: MediaWriter, headers: Dict[str, str], state: ResumeState,
+                           index: int, source_url: str, video_id: str):
+        start, end, done = state.segments[index]
+        range_headers = dict(headers, Range=f'bytes={start + done}-{end}')
+        if done and state.if_range():
+            range_headers['If-Range'] = state.if_range()
+        await self._throttle(video_url)
+        async with self._session.get(video_url, headers=range_headers) as r:
+            self._check_status(r.status, r.headers)
+            if r.status != 206:
+                raise RemoteChangedError(f"Máy chủ không trả về đoạn yêu cầu ({r.status})")
+            expected = end - start - done + 1
+            received = 0
+            async for chunk in r.content.iter_chunked(self.chunk_size):
+                chunk = chunk[:expected - received]
+                await self._blocking(_write_segment, writer, state, index, start + done + received, chunk)
+                received += len(chunk)
+                self._progress(source_url, video_id, state.bytes_completed, state.content_length)
+                if received >= expected:
+                    break
+        if received != expected:
+            raise TransferError(f"Đoạn {start}-{end} bị thiếu dữ liệu ({received}/{expected} bytes)")
+
+    # Blocking wrappers for scripts that don't run an event loop
+
+    def download_video_sync(self, url: str, download_path: str = "downloads") -> bool:
+        return asyncio.run(self._run_once(self.download_video(url, download_path)))
+
+    def download_many_sync(self, urls: List[str], download_path: str = "downloads") -> Dict[str, bool]:
+        return asyncio.run(self._run_once(self.download_many(urls, download_path)))
+
+    async def _run_once(self, coro):
+        async with self:
+            return await coro
@@ -0,0 +1,122 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.douyin_downloader', 'media_cache.sqlite')
+
+# Query parameters some CDN nodes use for the signature expiry (unix seconds)
+_EXPIRY_PARAMS = ('x-expires', 'expires', 'expire', 'x-expire', 'deadline')
+
+
+def url_expiry(url: str) -> Optional[float]:
+    """Best-effort expiry timestamp of a signed media URL"""
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    for name in _EXPIRY_PARAMS:
+        value = query.get(name, [None])[0]
+        if value and value.isdigit():
+            return float(value)
+    # douyinvod URLs look like https://v26-web.douyinvod.com/<sign>/<hex expiry>/video/...
+    now = time.time()
+    for segment in parsed.path.split('/')[1:4]:
+        if len(segment) == 8:
+            try:
+                ts = int(segment, 16)
+            except ValueError:
+                continue
+            if now - 86400 < ts < now + 30 * 86400:
+                return float(ts)
+    return None
+
+
+class MediaUrlCache:
+    """On-disk video_id -> resolved media URL cache with expiry and an LRU size cap"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = 3600, max_entries: int = 5000,
+                 safety_margin: float = 60):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.safety_margin = safety_margin  # Treat URLs as expired this many seconds early
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS media_urls (
+                video_id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                headers TEXT,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS media_urls_last_used ON media_urls (last_used)")
+        self._conn.commit()
+
+    def get(self, video_id: str) -> Optional[Dict]:
+        """Return {'url', 'headers', 'expires_at'} or None if missing/expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, headers, expires_at FROM media_urls WHERE video_id = ?", (video_id,)
+            ).fetchone()
+            if not row:
+                return None
+            url, headers, expires_at = row
+            if expires_at - self.safety_margin <= now:
+                self._conn.execute("DELETE FROM media_urls WHERE video_id = ?", (video_id,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE media_urls SET last_used = ? WHERE video_id = ?", (now, video_id))
+            self._conn.commit()
+        return {'url': url, 'headers': json.loads(headers or '{}'), 'expires_at': expires_at}
+
+    def put(self, video_id: str, url: str, headers: Optional[Dict[str, str]] = None,
+            expires_at: Optional[float] = None):
+        now = time.time()
+        observed = expires_at or url_expiry(url)
+        expires_at = min(observed, now + self.ttl) if observed else now + self.ttl
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO media_urls (video_id, url, headers, created_at, expires_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (video_id, url, json.dumps(headers or {}), now, expires_at, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def invalidate(self, video_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM media_urls WHERE video_id = ?", (video_id,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM media_urls")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM media_urls").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self, now: float):
+        """Drop expired rows, then the least recently used ones above max_entries"""
+        self._conn.execute("DELETE FROM media_urls WHERE expires_at - ? <= ?", (self.safety_margin, now))
+        count = self._conn.execute("SELECT COUNT(*) FROM media_urls").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM media_urls WHERE video_id IN "
+                "(SELECT video_id FROM media_urls ORDER BY last_used ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
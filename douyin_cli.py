@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional
+
+from douyin_cache import DEFAULT_CACHE_PATH, MediaUrlCache
+from douyin_core import DouyinDownloader
+from douyin_driver_pool import DriverPool
+from douyin_engine import DownloadJob, DownloadPipeline, DONE, STORE_POLL_INTERVAL
+from douyin_http import HttpConfig, create_session
+from douyin_jobstore import DEFAULT_JOBS_PATH, JobStore
+from douyin_metrics import Metrics, MetricsServer
+from douyin_progress import ProgressBus
+from douyin_ratelimit import CAPTCHA, DEFAULT_RATES, MEDIA, PAGE, RateLimiter
+from douyin_session import DEFAULT_SESSION_PATH, SessionStore
+from douyin_urls import PROFILE, SHORT
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m douyin_core',
+        description="Tải video Douyin không cần giao diện. Log ghi ra stderr, stdout nhận một dòng JSON "
+                    "cho mỗi video đã xong. Mã thoát 0 nếu mọi video thành công, 1 nếu có lỗi.")
+    add_input_arguments(parser)
+    parser.add_argument('-o', '--output', default='downloads', help="Thư mục tải xuống (mặc định: downloads)")
+    parser.add_argument('--jobs', nargs='?', const=DEFAULT_JOBS_PATH, default=None, metavar='FILE',
+                        help="Lưu hàng đợi vào file SQLite; lần chạy sau tự tải tiếp các video chưa xong "
+                             f"(mặc định {DEFAULT_JOBS_PATH})")
+    add_download_arguments(parser)
+    return parser
+
+
+def add_input_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('urls', nargs='*', help="URL video hoặc trang người dùng")
+    parser.add_argument('-i', '--input', action='append', default=[],
+                        help="File chứa danh sách URL (mỗi dòng một URL), '-' để đọc từ stdin")
+
+
+def add_download_arguments(parser: argparse.ArgumentParser):
+    """Options of the downloaders and the pipeline, shared with `python -m douyin_worker work`"""
+    parser.add_argument('--resolvers', type=int, default=2, help="Số trình duyệt lấy URL video song song")
+    parser.add_argument('--transfers', type=int, default=6, help="Số file tải song song")
+    parser.add_argument('--segments', type=int, default=4, help="Số kết nối cho mỗi video")
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--profile-limit', type=int, default=None, help="Số video tối đa lấy từ mỗi trang người dùng")
+    parser.add_argument('--page-rate', type=float, default=DEFAULT_RATES[PAGE][0], help="Số trang/giây tối đa")
+    parser.add_argument('--media-rate', type=float, default=DEFAULT_RATES[MEDIA][0], help="Số request CDN/giây")
+    parser.add_argument('--captcha-rate', type=float, default=DEFAULT_RATES[CAPTCHA][0], help="Số lần gọi Capsolver/giây")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help="File cache URL video")
+    parser.add_argument('--no-cache', action='store_true', help="Không dùng cache URL video")
+    parser.add_argument('--session-store', default=DEFAULT_SESSION_PATH, help="File lưu phiên trình duyệt")
+    parser.add_argument('--no-session-store', action='store_true')
+    parser.add_argument('--no-manifest', action='store_true', help="Tải lại cả video đã có trong thư mục")
+    parser.add_argument('--verify', choices=('size', 'hash'), default='size',
+                        help="Cách kiểm tra video đã tải (size: nhanh, hash: đọc lại file)")
+    parser.add_argument('--capsolver-key', default=os.environ.get('CAPSOLVER_API_KEY'),
+                        help="API key Capsolver (mặc định lấy từ biến môi trường CAPSOLVER_API_KEY)")
+    parser.add_argument('--show-browser', action='store_true', help="Hiện cửa sổ Chrome thay vì chạy ẩn")
+    parser.add_argument('--lean', action='store_true', help="Chặn ảnh, font và tracker trong Chrome")
+    parser.add_argument('--progress', action='store_true', help="In tiến độ ra stderr mỗi giây")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Mở /metrics (Prometheus) và /metrics.json trên cổng này")
+    parser.add_argument('--metrics-host', default='127.0.0.1', help="Địa chỉ lắng nghe của --metrics-port")
+    parser.add_argument('--metrics-file', default=None,
+                        help="Ghi metrics dạng Prometheus vào file này (10 giây một lần và khi kết thúc)")
+    parser.add_argument('--metrics-jsonl', default=None,
+                        help="Ghi thời gian từng giai đoạn của từng video vào file JSON lines")
+    parser.add_argument('-q', '--quiet', action='store_true', help="Không in log ra stderr")
+
+
+def read_inputs(urls: List[str], inputs: List[str]) -> Iterator[str]:
+    """Arguments first, then each input file (or stdin) line by line; blank lines and # comments are skipped"""
+    yield from urls
+    for path in inputs:
+        stream = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+        try:
+            for line in stream:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield line
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def job_record(job: DownloadJob) -> Dict:
+    size = 0
+    if job.state == DONE and job.output_path:
+        try:
+            size = os.path.getsize(job.output_path)
+        except OSError:
+            pass
+    started = job.started_at or job.finished_at or job.submitted_at
+    return {
+        'job_id': job.job_id,
+        'url': job.url,
+        'video_id': job.video_id,
+        'ok': job.state == DONE,
+        'skipped': job.skipped,
+        'state': job.state,
+        'attempts': job.attempts,
+        'error': job.error,
+        'output_path': job.output_path,
+        'bytes': size,
+        'queued_seconds': round(started - job.submitted_at, 3),
+        'elapsed_seconds': round(job.elapsed, 3),
+        'submitted_at': job.submitted_at,
+        'finished_at': job.finished_at,
+    }
+
+
+def stderr_logger(args: argparse.Namespace, print_lock: threading.Lock) -> Callable[[str], None]:
+    def log(message: str):
+        if not args.quiet:
+            with print_lock:
+                print(message, file=sys.stderr, flush=True)
+
+    return log
+
+
+def downloader_factory(args: argparse.Namespace, log: Callable[[str], None],
+                       metrics: Optional[Metrics] = None) -> Callable[..., DouyinDownloader]:
+    """new_downloader(driver_pool=None) for the download options; every downloader it makes shares
+    one HTTP pool, media URL cache, browser session store and rate limiter"""
+    http_config = HttpConfig(pool_maxsize=max(32, args.transfers * args.segments))
+    http_session = create_session(http_config)
+    media_cache = None if args.no_cache else MediaUrlCache(args.cache)
+    session_store = None if args.no_session_store else SessionStore(args.session_store, log_callback=log)
+    rate_limiter = RateLimiter(rates={
+        PAGE: (args.page_rate, DEFAULT_RATES[PAGE][1]),
+        MEDIA: (args.media_rate, DEFAULT_RATES[MEDIA][1]),
+        CAPTCHA: (args.captcha_rate, DEFAULT_RATES[CAPTCHA][1]),
+    }, log_callback=log)
+
+    def new_downloader(driver_pool: Optional[DriverPool] = None) -> DouyinDownloader:
+        return DouyinDownloader(log_callback=log, capsolver_key=args.capsolver_key,
+                                force_headless=not args.show_browser,
+                                segments=args.segments, http_config=http_config, session=http_session,
+                                media_cache=media_cache, driver_pool=driver_pool, lean=args.lean,
+                                session_store=session_store, rate_limiter=rate_limiter,
+                                use_manifest=not args.no_manifest, verify_downloads=args.verify,
+                                metrics=metrics)
+
+    return new_downloader
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.urls and not args.input and not args.jobs:
+        parser.error("cần ít nhất một URL, --input hoặc --jobs")
+
+    print_lock = threading.Lock()
+    log = stderr_logger(args, print_lock)
+    progress_bus = ProgressBus(interval=1.0)
+    if args.progress:
+        progress_bus.subscribe(lambda snapshot: log(snapshot.summary()))
+    metrics = Metrics(events_path=args.metrics_jsonl)
+    metrics_server = None
+    if args.metrics_port is not None:
+        metrics_server = MetricsServer(metrics, args.metrics_host, args.metrics_port).start()
+        log(f"Metrics: {metrics_server.url}")
+    if args.metrics_file:
+        metrics.start_file_export(args.metrics_file)
+    new_downloader = downloader_factory(args, log, metrics)
+
+    # Profiles are listed on their own browser; video pages use the pool
+    lister = new_downloader()
+    driver_pool = DriverPool(lister._setup_driver, min_size=1, max_size=args.resolvers, log_callback=log,
+                             metrics=metrics)
+    driver_pool.start()
+    job_store = JobStore(args.jobs) if args.jobs else None
+    engine = DownloadPipeline(lambda: new_downloader(driver_pool), resolve_workers=args.resolvers,
+                              transfer_workers=args.transfers, retries=args.retries, log_callback=log,
+                              progress_bus=progress_bus, metrics=metrics, job_store=job_store)
+
+    # IDs of the jobs this run reports on: everything submitted plus what the job store resumed
+    expected = set()
+    feeding_done = threading.Event()
+
+    def feed():
+        seen = set()  # Two jobs for one video would write the same .part file
+
+        def submit(url: str):
+            if url not in seen:
+                seen.add(url)
+                expected.add(engine.submit(url, args.output).job_id)
+
+        try:
+            lines = read_inputs(args.urls, args.input)
+            # Normalized in chunks so short links expand concurrently without waiting for the whole input
+            while True:
+                chunk = list(islice(lines, 256))
+                if not chunk:
+                    break
+                for item in lister.url_normalizer.normalize_many(chunk):
+                    if item.kind == PROFILE:
+                        for video in islice(lister.iter_user_videos(item.url), args.profile_limit):
+                            submit(video['url'])
+                    elif item.kind == SHORT:
+                        log(f"Không mở được link rút gọn: {item.raw}")
+                    else:
+                        submit(item.url)
+        except Exception as e:
+            log(f"Lỗi khi đọc danh sách URL: {str(e)}")
+        finally:
+            lister._cleanup_driver()
+            feeding_done.set()
+
+    started_at = time.time()
+    failed = 0
+    completed = 0
+    finished = set()  # Expected IDs that finished here or that douyin_worker processes took over
+    engine.start()
+    expected.update(job.job_id for job in engine.resumed)
+    feeder = threading.Thread(target=feed, name="douyin-cli-feeder", daemon=True)
+    feeder.start()
+    try:
+        while True:
+            feeding_finished = feeding_done.is_set()
+            pending = expected - finished
+            if feeding_finished and not pending:
+                break
+            job = next(engine.as_completed(1, timeout=STORE_POLL_INTERVAL), None)
+            if job is None:
+                if engine.stopped:
+                    break
+                finished |= engine.taken_elsewhere(pending)
+                continue
+            finished.add(job.job_id)
+            completed += 1
+            failed += job.state != DONE
+            with print_lock:
+                print(json.dumps(job_record(job), ensure_ascii=False), flush=True)
+    except KeyboardInterrupt:
+        log("Đang dừng...")
+        engine.stop(wait=False)
+        return 130
+    finally:
+        if feeding_done.is_set():
+            engine.stop()
+            if job_store is not None:
+                job_store.close()
+        driver_pool.close()
+        progress_bus.stop()
+        metrics.close()
+        if metrics_server is not None:
+            metrics_server.stop()
+
+    log(f"Xong {completed - failed}/{completed} video trong {time.time() - started_at:.1f}s")
+    log(lister.rate_limiter.summary())
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,424 +1,603 @@
-import re
-import time
-import os
-import requests
-from typing import Optional, List, Dict, Callable
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from urllib.parse import urlparse, parse_qs
-from PyQt5.QtWidgets import QApplication
-from selenium.webdriver.common.action_chains import ActionChains
-
-class DouyinDownloader:
-    def __init__(self, log_callback=None, capsolver_key=None, headless=True):
-        self.log_callback = log_callback
-        self.capsolver_key = capsolver_key
-        self.headless = headless
-        self.driver = None
-
-    def log(self, message: str):
-        if self.log_callback:
-            self.log_callback(message)
-        else:
-            print(message)
-
-    def extract_video_id(self, url: str) -> Optional[str]:
-        patterns = [
-            r'/video/(\d+)',
-            r'vid=(\d+)',
-            r'modal_id=(\d+)',
-            r'v.douyin.com/(\w+)',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        return None
-
-    def standardize_douyin_url(self, url):
-        match = re.search(r'/video/(\d+)', url)
-        if match:
-            return f"https://www.douyin.com/video/{match.group(1)}"
-        parsed = urlparse(url)
-        query = parse_qs(parsed.query)
-        video_id = query.get('modal_id', [None])[0] or query.get('vid', [None])[0]
-        if video_id and video_id.isdigit():
-            return f"https://www.douyin.com/video/{video_id}"
-        match = re.search(r'(\d{10,20})', url)
-        if match:
-            return f"https://www.douyin.com/video/{match.group(1)}"
-        return url
-
-    def _setup_driver(self) -> webdriver.Chrome:
-        chrome_options = Options()
-        
-        # Disable GPU and hardware acceleration
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--window-size=500,500')
-        chrome_options.add_argument('--log-level=3')
-        
-        # Only run headless when we have valid Capsolver key
-        if self.headless and self.capsolver_key and len(self.capsolver_key) > 10:
-            chrome_options.add_argument('--headless=new')
-        
-        # Create ChromeDriver service with proper logging
-        service = Service(ChromeDriverManager().install())
-        
-        # Fix the logging issue by using devnull
-        import subprocess
-        service.creation_flags = subprocess.CREATE_NO_WINDOW
-        
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        
-        if not (self.headless and self.capsolver_key and len(self.capsolver_key) > 10):
-            driver.set_window_size(500, 500)
-        
-        return driver
-
-    def get_user_videos(self, url: str, start_index: int = 0, batch_size: int = 20) -> List[Dict[str, str]]:
-        try:
-            # Keep driver instance if exists and valid
-            if not self.driver or not self._is_driver_valid():
-                self.driver = self._setup_driver()
-                self.log("Đang truy cập trang người dùng...")
-                self.driver.get(url)
-                time.sleep(5)
-                
-                if self._check_for_captcha():
-                    if not self._solve_captcha():
-                        return []
-            else:
-                # Scroll back to top for loading more videos
-                self.driver.execute_script("window.scrollTo(0, 0);")
-                time.sleep(2)
-                
-            videos = []
-            last_height = self.driver.execute_script("return document.body.scrollHeight")
-            scroll_attempts = 0
-            
-            while True:
-                # Get all video elements
-                elements = self.driver.find_elements(By.XPATH, "//a[contains(@href, '/video/')]")
-                current_count = len(elements)
-                
-                # Process new videos
-                if current_count > start_index:
-                    for el in elements[start_index:]:
-                        try:
-                            href = el.get_attribute('href')
-                            if href and '/video/' in href:
-                                video_id = self.extract_video_id(href)
-                                if video_id:
-                                    clean_url = f"https://www.douyin.com/video/{video_id}"
-                                    if clean_url not in [v['url'] for v in videos]:
-                                        videos.append({'url': clean_url, 'id': video_id})
-                                        self.log(f"Tìm thấy video mới: {video_id}")
-                        except:
-                            continue
-                
-                # Check if we have enough videos
-                if len(videos) >= batch_size:
-                    self.log(f"Đã tìm đủ {batch_size} video")
-                    return videos[:batch_size]
-                
-                # Scroll and wait
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)
-                
-                new_height = self.driver.execute_script("return document.body.scrollHeight")
-                if new_height == last_height:
-                    scroll_attempts += 1
-                    if scroll_attempts >= 3:  # Stop after 3 unsuccessful scrolls
-                        break
-                else:
-                    scroll_attempts = 0
-                    last_height = new_height
-            
-            self.log(f"Đã tìm thấy tổng cộng {len(videos)} video")
-            return videos
-            
-        except Exception as e:
-            self.log(f"Lỗi khi tải danh sách video: {str(e)}")
-            return []
-        finally:
-            # Don't cleanup driver here to keep it for subsequent calls
-            pass
-
-    def download_video(self, url: str, download_path: str = "downloads", progress_callback: Optional[Callable[[float], None]] = None) -> bool:
-        try:
-            os.makedirs(download_path, exist_ok=True)
-            
-            # Get video URL without loading page if possible
-            video_id = self.extract_video_id(url)
-            video_url = None
-            
-            if not video_url:
-                # Need to load page to get video URL
-                if not self.driver or not self._is_driver_valid():
-                    self._cleanup_driver()
-                    self.driver = self._setup_driver()
-                    
-                self.log("Đang truy cập video...")
-                self.driver.get(url)
-                time.sleep(3)
-                
-                if self._check_for_captcha():
-                    if not self._solve_captcha():
-                        return False
-                        
-                video_url = self._get_video_url_from_network()
-                
-            if not video_url:
-                return False
-                
-            video_id = self.extract_video_id(url)
-            if not video_id:
-                return False
-                
-            output_path = os.path.join(download_path, f"douyin_{video_id}.mp4")
-            self.log("Bắt đầu tải video...")
-            
-            # Download with proper headers and timeout
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Referer': 'https://www.douyin.com/',
-                'Range': 'bytes=0-'  # Request full file
-            }
-            
-            with requests.get(video_url, headers=headers, stream=True, timeout=30) as r:
-                r.raise_for_status()
-                total = int(r.headers.get('content-length', 0))
-                
-                # Only proceed if file size is reasonable (> 100KB)
-                if total < 102400:  # 100KB
-                    self.log("File size quá nhỏ, có thể không phải video")
-                    return False
-                    
-                with open(output_path, 'wb') as f:
-                    downloaded = 0
-                    for chunk in r.iter_content(chunk_size=8192):
-                        if chunk:
-                            size = len(chunk)
-                            downloaded += size
-                            f.write(chunk)
-                            if total and progress_callback:
-                                progress = (downloaded / total) * 100
-                                progress_callback(progress)
-                                
-                # Verify downloaded file size
-                if os.path.getsize(output_path) < 102400:
-                    os.remove(output_path)
-                    self.log("File tải xuống quá nhỏ, đã xóa")
-                    return False
-                
-                self.log(f"Đã tải xong: {output_path}")
-                return True
-            
-        except Exception as e:
-            self.log(f"Lỗi khi tải video: {str(e)}")
-            return False
-
-    def _is_driver_valid(self):
-        """Check if current driver session is valid"""
-        try:
-            # Try to get current URL to check session
-            self.driver.current_url
-            return True
-        except:
-            return False
-
-    def _get_video_url_from_network(self):
-        """Get video URL from network requests"""
-        try:
-            # Đợi trang load xong
-            time.sleep(5)
-            
-            # Thử nhiều cách để lấy URL video
-            video_url = None
-            
-            # Cách 1: Tìm qua network logs
-            try:
-                logs = self.driver.execute_script("""
-                    var performance = window.performance || window.mozPerformance || window.msPerformance || window.webkitPerformance || {};
-                    var network = performance.getEntries() || {};
-                    return network;
-                """)
-                
-                for log in logs:
-                    try:
-                        url = log.get('name', '')
-                        if '.mp4' in url and ('v26' in url or 'v3' in url):
-                            video_url = url
-                            break
-                    except:
-                        continue
-            except:
-                pass
-                
-            # Cách 2: Tìm trực tiếp từ video element
-            if not video_url:
-                try:
-                    video_elem = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.TAG_NAME, "video"))
-                    )
-                    video_url = video_elem.get_attribute('src')
-                except:
-                    pass
-                
-            # Cách 3: Tìm từ source element trong video
-            if not video_url:
-                try:
-                    source_elem = self.driver.find_element(By.CSS_SELECTOR, "video source")
-                    video_url = source_elem.get_attribute('src')
-                except:
-                    pass
-                
-            # Cách 4: Tìm từ div chứa video
-            if not video_url:
-                try:
-                    video_div = self.driver.find_element(By.CSS_SELECTOR, "div[data-e2e='video-player']")
-                    video_url = video_div.get_attribute('data-src')
-                except:
-                    pass
-                
-            if video_url:
-                self.log("Đã tìm thấy URL video")
-                return video_url
-                
-            self.log("Không tìm thấy URL video")
-            return None
-            
-        except Exception as e:
-            self.log(f"Lỗi khi lấy URL video: {str(e)}")
-            return None
-
-    def add_link_to_table(self, url):
-        std_url = self.standardize_douyin_url(url)
-        # ...thêm std_url vào bảng thay vì url gốc...
-
-    def paste_links(self):
-        clipboard = QApplication.clipboard()
-        text = clipboard.text()
-        for line in text.splitlines():
-            std_url = self.standardize_douyin_url(line.strip())
-            if std_url:
-                self.add_link_to_table(std_url)
-
-    def _cleanup_driver(self):
-        if self.driver:
-            try:
-                self.driver.quit()
-            except:
-                pass
-            self.driver = None
-
-    def _check_for_captcha(self):
-        """Kiểm tra xem có captcha không"""
-        try:
-            return bool(self.driver.find_elements(By.XPATH, "//div[contains(@class, 'captcha')]") or
-                       self.driver.find_elements(By.XPATH, "//div[contains(@class, 'verify')]"))
-        except:
-            return False
-
-    def _solve_captcha(self):
-        if not self.capsolver_key:
-            self.log("Không có API key Capsolver")
-            return False
-        
-        try:
-            import capsolver
-            capsolver.api_key = self.capsolver_key
-            
-            # Wait for slider captcha
-            slider = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "secsdk-captcha-drag-icon"))
-            )
-            
-            # Get captcha images
-            background = self.driver.find_element(By.CLASS_NAME, "captcha_verify_img_slide")
-            background_url = background.get_attribute("src")
-            
-            piece = self.driver.find_element(By.CLASS_NAME, "captcha_verify_slide_block")
-            piece_url = piece.get_attribute("src")
-            
-            self.log("Đang giải captcha...")
-            
-            # Submit task to Capsolver
-            solution = capsolver.solve({
-                "type": "DouYinSliderCaptcha",
-                "websiteURL": self.driver.current_url,
-                "websiteKey": "slide",
-                "background": background_url,
-                "slider": piece_url,
-            })
-            
-            if solution and "score" in solution:
-                offset = solution["score"] * slider.size["width"]
-                
-                # Move slider
-                actions = ActionChains(self.driver)
-                actions.click_and_hold(slider)
-                actions.move_by_offset(offset, 0)
-                actions.release()
-                actions.perform()
-                
-                time.sleep(2)
-                
-                if not self._check_for_captcha():
-                    self.log("Giải captcha thành công")
-                    return True
-                    
-            self.log("Giải captcha thất bại")
-            return False
-            
-        except Exception as e:
-            self.log(f"Lỗi xử lý captcha: {str(e)}")
-            return False
-
-    def _validate_capsolver_key(self, api_key: str) -> bool:
-        """Kiểm tra API key Capsolver có hợp lệ không"""
-        try:
-            import capsolver
-            capsolver.api_key = api_key
-            
-            balance = capsolver.balance()
-            self.log(f"Số dư Capsolver: ${balance}")
-            return float(balance) > 0
-        except Exception as e:
-            self.log(f"Lỗi kiểm tra API key: {str(e)}")
-            return False
-
-    def test_capsolver(self):
-        """Test kết nối và khả năng giải captcha của Capsolver"""
-        if not self.capsolver_key:
-            self.log("Không có API key Capsolver")
-            return False
-            
-        try:
-            import capsolver
-            capsolver.api_key = self.capsolver_key
-            
-            # Test balance
-            balance = capsolver.balance()
-            self.log(f"Số dư Capsolver: ${balance}")
-            
-            # Test supported tasks
-            self.log("Các loại captcha được hỗ trợ:")
-            self.log("- DouyinSliderCaptcha")
-            self.log("- ReCaptchaV2")
-            self.log("- FunCaptcha")
-            self.log("- HCaptcha")
-            
-            self.log("API key hợp lệ và sẵn sàng sử dụng")
-            return True
-                
-        except Exception as e:
-            self.log(f"Lỗi khi test Capsolver: {str(e)}")
-            return False
\ No newline at end of file
+import os
+from contextlib import nullcontext
+from itertools import islice
+from typing import TYPE_CHECKING, Optional, List, Dict, Callable, Iterator
+from douyin_http import HttpConfig, create_session
+from douyin_cache import MediaUrlCache
+from douyin_driver_pool import DriverPool
+from douyin_lean import LeanStats, apply_lean_blocking, configure_lean_options
+from douyin_manifest import open_manifest
+from douyin_metrics import (Metrics, timed, CAPTCHA_CHECK, CAPTCHA_SOLVE, MEDIA_URL, PAGE_LOAD, RESOLVE,
+                            SETUP_DRIVER, TRANSFER)
+from douyin_network import NetworkCapture, enable_network_capture
+from douyin_profile import FeedCrawler, ProfileCrawler
+from douyin_progress import ProgressBus, RESOLVING
+from douyin_ratelimit import RateLimiter, PAGE, CAPTCHA
+from douyin_session import SessionStore
+from douyin_wait import wait_for, any_of, merge_timeouts, media_request_seen, video_src_ready, captcha_present
+from douyin_transfer import download_file, MediaUrlExpiredError, ThrottledError, TransferError
+from douyin_urls import UrlNormalizer, short_code, standardize_url, video_id_from_url
+
+# Selenium, webdriver_manager, requests and PyQt5 are imported where they are used,
+# so URL helpers and cached downloads don't pay for the browser/GUI stacks at import time
+if TYPE_CHECKING:
+    import requests
+    from selenium import webdriver
+
+class DouyinDownloader:
+    def __init__(self, log_callback=None, capsolver_key=None, headless=True, segments=1,
+                 http_config: Optional[HttpConfig] = None, session: Optional['requests.Session'] = None,
+                 media_cache: Optional[MediaUrlCache] = None, driver_pool: Optional[DriverPool] = None,
+                 wait_timeouts: Optional[Dict[str, float]] = None, profile_mode: str = 'feed',
+                 lean: bool = False, lean_stats: Optional[LeanStats] = None,
+                 session_store: Optional[SessionStore] = None, rate_limiter: Optional[RateLimiter] = None,
+                 use_manifest: bool = True, verify_downloads: str = 'size',
+                 progress_bus: Optional[ProgressBus] = None, force_headless: bool = False,
+                 metrics: Optional[Metrics] = None):
+        self.log_callback = log_callback
+        self.capsolver_key = capsolver_key
+        self.headless = headless
+        # Headless even without a Capsolver key (servers without a display, see douyin_cli)
+        self.force_headless = force_headless
+        self.segments = segments  # Parallel Range connections per video (1 = single stream)
+        self.driver = None
+        # One pooled session for every transfer/API call; pass `session` to share it between downloaders
+        self.http_config = http_config or HttpConfig()
+        self._session = session
+        # Resolved media URLs by video ID, so retries and re-runs can skip the browser
+        self.media_cache = media_cache
+        # When set, video pages are resolved on drivers leased from the pool instead of self.driver
+        self.driver_pool = driver_pool
+        # Upper bounds for each page readiness condition (see douyin_wait.DEFAULT_TIMEOUTS)
+        self.wait_timeouts = merge_timeouts(wait_timeouts)
+        # 'feed' lists profiles from the aweme/post JSON (falling back to the DOM), 'dom' only scrapes anchors
+        self.profile_mode = profile_mode
+        self._profile_crawler = None
+        # Lean mode blocks thumbnails, fonts and trackers; lean_stats may be shared between downloaders
+        self.lean = lean
+        self.lean_stats = lean_stats or LeanStats()
+        # Saved cookies/localStorage so a captcha solved once carries over to new drivers
+        self.session_store = session_store
+        if session_store is not None and session is not None:
+            session_store.apply_to_http(session)
+        # Per-host pacing that backs off on 403/429/captchas; share one between downloaders
+        self.rate_limiter = rate_limiter
+        # Skip videos listed in the download folder's manifest; 'size' checks one stat, 'hash' re-reads the file
+        self.use_manifest = use_manifest
+        self.verify_downloads = verify_downloads
+        # Byte counts of every transfer go here; consumers subscribe to its coalesced snapshots
+        self.progress_bus = progress_bus
+        # Stage timings and counters (see douyin_metrics); shared by every downloader of a run
+        self.metrics = metrics
+        self._driver_started = False
+        self._url_normalizer: Optional[UrlNormalizer] = None
+
+    @property
+    def session(self) -> 'requests.Session':
+        """Pooled HTTP session, created on first use"""
+        if self._session is None:
+            self._session = create_session(self.http_config)
+            if self.session_store is not None:
+                self.session_store.apply_to_http(self._session)
+        return self._session
+
+    def log(self, message: str):
+        if self.log_callback:
+            self.log_callback(message)
+        else:
+            print(message)
+
+    def _span(self, stage: str):
+        return self.metrics.span(stage) if self.metrics is not None else nullcontext()
+
+    def _count(self, name: str, value: float = 1, **labels):
+        if self.metrics is not None:
+            self.metrics.inc(name, value, **labels)
+
+    @property
+    def url_normalizer(self) -> UrlNormalizer:
+        """Short-link expansion over the pooled session, created on first use"""
+        if self._url_normalizer is None:
+            self._url_normalizer = UrlNormalizer(self.session)
+        return self._url_normalizer
+
+    def extract_video_id(self, url: str) -> Optional[str]:
+        """Numeric video ID; v.douyin.com links are expanded once per code (one redirect lookup)"""
+        video_id = video_id_from_url(url)
+        if video_id or not short_code(url):
+            return video_id
+        return self.url_normalizer.video_id(url)
+
+    def standardize_douyin_url(self, url):
+        return standardize_url(url)
+
+    @timed(SETUP_DRIVER)
+    def _setup_driver(self) -> 'webdriver.Chrome':
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        chrome_options = Options()
+        
+        # Disable GPU and hardware acceleration
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--window-size=500,500')
+        chrome_options.add_argument('--log-level=3')
+        
+        # DevTools network events, read back by NetworkCapture
+        enable_network_capture(chrome_options)
+        
+        if self.lean:
+            configure_lean_options(chrome_options)
+        
+        # Only run headless when we have valid Capsolver key
+        headless = self.force_headless or (self.headless and self.capsolver_key and len(self.capsolver_key) > 10)
+        if headless:
+            chrome_options.add_argument('--headless=new')
+        
+        # Create ChromeDriver service with proper logging
+        service = Service(ChromeDriverManager().install())
+        
+        # Fix the logging issue by using devnull (no console window for chromedriver on Windows)
+        if os.name == 'nt':
+            import subprocess
+            service.creation_flags = subprocess.CREATE_NO_WINDOW
+        
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        
+        if not headless:
+            driver.set_window_size(500, 500)
+            
+        if self.lean:
+            apply_lean_blocking(driver)
+            
+        if self.session_store is not None and self.session_store.restore(driver):
+            self.log("Đã khôi phục phiên trình duyệt đã lưu")
+        
+        return driver
+
+    def new_network_capture(self) -> NetworkCapture:
+        """NetworkCapture on the current driver that also feeds lean_stats"""
+        capture = NetworkCapture(self.driver)
+        capture.listeners.append(self.lean_stats)
+        return capture
+
+    def iter_user_videos(self, url: str) -> Iterator[Dict[str, str]]:
+        """Yield videos of a profile as they appear; calling again with the same URL continues the crawl"""
+        if not self._profile_crawler or self._profile_crawler.url != url:
+            crawler_class = FeedCrawler if self.profile_mode == 'feed' else ProfileCrawler
+            self._profile_crawler = crawler_class(self, url)
+        return self._profile_crawler.iter_videos()
+
+    def get_user_videos(self, url: str, start_index: int = 0, batch_size: int = 20) -> List[Dict[str, str]]:
+        """Return the next `batch_size` videos of a profile (start_index=0 starts a new crawl)"""
+        try:
+            if start_index == 0:
+                self._profile_crawler = None
+            videos = list(islice(self.iter_user_videos(url), batch_size))
+            if len(videos) >= batch_size:
+                self.log(f"Đã tìm đủ {batch_size} video")
+            return videos
+            
+        except Exception as e:
+            self.log(f"Lỗi khi tải danh sách video: {str(e)}")
+            return []
+
+    def download_video(self, url: str, download_path: str = "downloads", progress_callback: Optional[Callable[[float], None]] = None) -> bool:
+        try:
+            os.makedirs(download_path, exist_ok=True)
+            
+            video_id = self.extract_video_id(url)
+            if not video_id:
+                return False
+                
+            if self.is_downloaded(video_id, download_path):
+                self.log(f"Video {video_id} đã có trong thư mục, bỏ qua")
+                self._publish(video_id, ok=True)
+                return True
+                
+            self._publish(video_id, state=RESOLVING)
+            from_cache = self.media_cache is not None and self.media_cache.get(video_id) is not None
+            video_url = self.resolve_video_url(url)
+            if not video_url:
+                self._publish(video_id, ok=False, error="could not resolve media url")
+                return False
+                
+            ok = self.download_media(video_url, video_id, download_path, progress_callback)
+            # download_media drops cached URLs the CDN rejects, so this one goes through the browser
+            if not ok and from_cache:
+                video_url = self.resolve_video_url(url)
+                ok = bool(video_url) and self.download_media(video_url, video_id, download_path, progress_callback)
+            self._publish(video_id, ok=ok, error=None if ok else "download failed")
+            return ok
+            
+        except Exception as e:
+            self.log(f"Lỗi khi tải video: {str(e)}")
+            return False
+
+    @timed(RESOLVE)
+    def resolve_video_url(self, url: str, use_cache: bool = True) -> Optional[str]:
+        """Return the media URL, from the cache if possible, otherwise by loading the page"""
+        video_id = self.extract_video_id(url)
+        if use_cache and self.media_cache is not None and video_id:
+            cached = self.media_cache.get(video_id)
+            if cached:
+                self.log("Dùng lại URL video đã lưu")
+                self._count('media_cache_hits')
+                return cached['url']
+            self._count('media_cache_misses')
+                
+        if self.driver_pool:
+            with self.driver_pool.lease() as driver:
+                # Keep our own driver (e.g. an open profile page) aside while using the leased one
+                own_driver, self.driver = self.driver, driver
+                try:
+                    video_url = self._resolve_on_driver(url)
+                finally:
+                    self.driver = own_driver
+        else:
+            # Need to load page to get video URL
+            self._ensure_driver()
+            video_url = self._resolve_on_driver(url)
+            
+        if video_url and self.media_cache is not None and video_id:
+            self.media_cache.put(video_id, video_url, headers={'Referer': 'https://www.douyin.com/'})
+        return video_url
+
+    def _ensure_driver(self):
+        """Start Chrome unless self.driver is alive; replacing an earlier one counts as a restart"""
+        if self.driver and self._is_driver_valid():
+            return
+        if self.driver or self._driver_started:
+            self._count('driver_restarts')
+        self._cleanup_driver()
+        self.driver = self._setup_driver()
+        self._driver_started = True
+
+    def _resolve_on_driver(self, url: str) -> Optional[str]:
+        """Open the video page on self.driver and pick the media URL out of it"""
+        self.log("Đang truy cập video...")
+        capture = self.new_network_capture()
+        capture.reset()  # Drop events left over from the previous page
+        self._throttle(PAGE)
+        with self._span(PAGE_LOAD):
+            self.driver.get(url)
+            wait_for(any_of(capture.media_ready, media_request_seen(self.driver), video_src_ready(self.driver),
+                            captcha_present(self.driver)),
+                     self.wait_timeouts['page'])
+        
+        captcha = self._check_for_captcha()
+        if captcha and not self._solve_captcha():
+            self._record_page_load(captcha=True, solved=False)
+            return None
+            
+        video_url = self._get_video_url_from_network(capture)
+        self._record_page_load(captcha=captcha, solved=captcha)
+        return video_url
+
+    def _publish(self, video_id: str, state: Optional[str] = None, ok: Optional[bool] = None,
+                 error: Optional[str] = None):
+        if self.progress_bus is None:
+            return
+        if ok is None:
+            self.progress_bus.update(video_id, state=state, video_id=video_id)
+        else:
+            self.progress_bus.finish(video_id, ok, error)
+
+    def _throttle(self, url_or_class: str):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(url_or_class)
+
+    def _record_page_load(self, captcha: bool, solved: bool):
+        """Report a page load to the rate limiter and to the driver's saved session
+
+        The session is saved, or rotated once it draws too many captchas.
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.feedback(PAGE, captcha=captcha, ok=not captcha)
+        self._count('pages_loaded')
+        if captcha:
+            self._count('captchas_seen')
+        if solved:
+            self._count('captchas_solved')
+        store = self.session_store
+        if store is None or not self.driver:
+            return
+        store.record_page(self.driver, captcha=captcha, solved=solved)
+        if store.should_rotate(self.driver):
+            store.rotate(self.driver)
+        elif solved or not captcha:
+            session = store.capture(self.driver, force=solved)
+            if solved and session is not None:
+                store.apply_to_http(self.session, session)
+
+    def output_path_for(self, video_id: str, download_path: str = "downloads") -> str:
+        return os.path.join(download_path, f"douyin_{video_id}.mp4")
+
+    def _bytes_callback(self, video_id: str) -> Optional[Callable[[int, int], None]]:
+        bus = self.progress_bus
+        if bus is None:
+            return None
+        return lambda downloaded, total: bus.update(video_id, downloaded, total)
+
+    def is_downloaded(self, video_id: str, download_path: str = "downloads") -> bool:
+        """Whether the video is already in download_path according to its manifest"""
+        if not self.use_manifest:
+            return False
+        return open_manifest(download_path).has(video_id, self.output_path_for(video_id, download_path),
+                                                verify=self.verify_downloads)
+
+    def may_keep_existing(self, video_id: str, download_path: str = "downloads") -> bool:
+        """Whether a file already at the output path that matches the remote size can stand as the download"""
+        return self.use_manifest and open_manifest(download_path).adoptable(video_id)
+
+    def record_download(self, video_id: str, download_path: str = "downloads", validator: Optional[str] = None,
+                        sha256: Optional[str] = None):
+        if self.use_manifest:
+            open_manifest(download_path).record(video_id, self.output_path_for(video_id, download_path),
+                                                sha256=sha256, validator=validator)
+
+    @timed(TRANSFER)
+    def download_media(self, video_url: str, video_id: str, download_path: str = "downloads", progress_callback: Optional[Callable[[float], None]] = None) -> bool:
+        """Download an already resolved media URL to douyin_<id>.mp4"""
+        try:
+            os.makedirs(download_path, exist_ok=True)
+            output_path = self.output_path_for(video_id, download_path)
+            self.log("Bắt đầu tải video...")
+            
+            # Download with proper headers; User-Agent and timeouts come from the pooled session
+            headers = {
+                'Referer': 'https://www.douyin.com/',
+            }
+            
+            # Only proceed if file size is reasonable (> 100KB).
+            # Writes go to douyin_<id>.mp4.part and continue from there on retry.
+            # One MEDIA token per request (probe and every range), like AsyncDouyinDownloader
+            result = download_file(video_url, output_path, headers, segments=self.segments,
+                                   timeout=self.http_config.timeout, progress_callback=progress_callback,
+                                   min_size=102400, session=self.session, chunk_size=self.http_config.chunk_size,
+                                   bytes_callback=self._bytes_callback(video_id),
+                                   keep_existing=self.may_keep_existing(video_id, download_path),
+                                   before_request=lambda: self._throttle(video_url))
+                
+            # Verify downloaded file size
+            if result.size < 102400:
+                os.remove(output_path)
+                self.log("File tải xuống quá nhỏ, đã xóa")
+                return False
+            
+            self.record_download(video_id, download_path, result.validator, result.sha256)
+            self._count('bytes_downloaded', result.size)
+            self.log(f"Đã tải xong: {output_path}")
+            if self.rate_limiter is not None:
+                self.rate_limiter.feedback(video_url, ok=True)
+            return True
+            
+        except MediaUrlExpiredError as e:
+            self.log(str(e))
+            # A stale signed URL, not throttling: drop it from the cache but leave the MEDIA rate alone
+            if self.media_cache is not None:
+                self.media_cache.invalidate(video_id)
+            return False
+        except ThrottledError as e:
+            self.log(str(e))
+            if self.rate_limiter is not None:
+                self.rate_limiter.feedback(video_url, status=429, retry_after=e.retry_after)
+            return False
+        except TransferError as e:
+            self.log(str(e))
+            return False
+        except Exception as e:
+            self.log(f"Lỗi khi tải video: {str(e)}")
+            return False
+
+    def _is_driver_valid(self):
+        """Check if current driver session is valid"""
+        try:
+            # Try to get current URL to check session
+            self.driver.current_url
+            return True
+        except:
+            return False
+
+    @timed(MEDIA_URL)
+    def _get_video_url_from_network(self, capture: Optional[NetworkCapture] = None):
+        """Get video URL from network requests"""
+        from selenium.webdriver.common.by import By
+
+        try:
+            # Cách 1: Bắt response video qua DevTools ngay khi player gửi request
+            if capture and capture.available:
+                media = capture.wait_for_media(self.wait_timeouts['media'])
+                if media:
+                    size_mb = media['content_length'] / 1024 / 1024
+                    self.log(f"Đã tìm thấy URL video qua DevTools ({size_mb:.1f} MB)")
+                    return media['url']
+            else:
+                # Đợi player bắt đầu tải video thay vì chờ cố định
+                wait_for(any_of(media_request_seen(self.driver), video_src_ready(self.driver)),
+                         self.wait_timeouts['media'])
+            
+            # Thử nhiều cách để lấy URL video
+            video_url = None
+            
+            # Cách 2: Tìm qua Resource Timing của trang
+            try:
+                video_url = media_request_seen(self.driver)()
+            except:
+                pass
+                
+            # Cách 3: Tìm trực tiếp từ video element (trang đã sẵn sàng, không cần chờ thêm)
+            if not video_url:
+                try:
+                    video_url = video_src_ready(self.driver)()
+                except:
+                    pass
+                
+            # Cách 4: Tìm từ source element trong video
+            if not video_url:
+                try:
+                    source_elem = self.driver.find_element(By.CSS_SELECTOR, "video source")
+                    video_url = source_elem.get_attribute('src')
+                except:
+                    pass
+                
+            # Cách 5: Tìm từ div chứa video
+            if not video_url:
+                try:
+                    video_div = self.driver.find_element(By.CSS_SELECTOR, "div[data-e2e='video-player']")
+                    video_url = video_div.get_attribute('data-src')
+                except:
+                    pass
+                
+            if video_url:
+                self.log("Đã tìm thấy URL video")
+                return video_url
+                
+            self.log("Không tìm thấy URL video")
+            return None
+            
+        except Exception as e:
+            self.log(f"Lỗi khi lấy URL video: {str(e)}")
+            return None
+
+    def add_link_to_table(self, url):
+        std_url = self.standardize_douyin_url(url)
+        # ...thêm std_url vào bảng thay vì url gốc...
+
+    def paste_links(self):
+        from PyQt5.QtWidgets import QApplication
+
+        clipboard = QApplication.clipboard()
+        text = clipboard.text()
+        for item in self.url_normalizer.normalize_many(text.splitlines()):
+            self.add_link_to_table(item.url)
+
+    def _cleanup_driver(self):
+        if self.driver:
+            try:
+                self.driver.quit()
+            except:
+                pass
+            self.driver = None
+
+    @timed(CAPTCHA_CHECK, result_is_ok=False)
+    def _check_for_captcha(self):
+        """Kiểm tra xem có captcha không"""
+        try:
+            from selenium.webdriver.common.by import By
+            return bool(self.driver.find_elements(By.XPATH, "//div[contains(@class, 'captcha')]") or
+                       self.driver.find_elements(By.XPATH, "//div[contains(@class, 'verify')]"))
+        except:
+            return False
+
+    @timed(CAPTCHA_SOLVE)
+    def _solve_captcha(self):
+        if not self.capsolver_key:
+            self.log("Không có API key Capsolver")
+            return False
+        
+        try:
+            import capsolver
+            from selenium.webdriver.common.action_chains import ActionChains
+            from selenium.webdriver.common.by import By
+            from selenium.webdriver.support import expected_conditions as EC
+            from selenium.webdriver.support.ui import WebDriverWait
+            capsolver.api_key = self.capsolver_key
+            
+            # Wait for slider captcha
+            slider = WebDriverWait(self.driver, 10).until(
+                EC.presence_of_element_located((By.CLASS_NAME, "secsdk-captcha-drag-icon"))
+            )
+            
+            # Get captcha images
+            background = self.driver.find_element(By.CLASS_NAME, "captcha_verify_img_slide")
+            background_url = background.get_attribute("src")
+            
+            piece = self.driver.find_element(By.CLASS_NAME, "captcha_verify_slide_block")
+            piece_url = piece.get_attribute("src")
+            
+            self.log("Đang giải captcha...")
+            
+            # Submit task to Capsolver
+            self._throttle(CAPTCHA)
+            solution = capsolver.solve({
+                "type": "DouYinSliderCaptcha",
+                "websiteURL": self.driver.current_url,
+                "websiteKey": "slide",
+                "background": background_url,
+                "slider": piece_url,
+            })
+            
+            if solution and "score" in solution:
+                offset = solution["score"] * slider.size["width"]
+                
+                # Move slider
+                actions = ActionChains(self.driver)
+                actions.click_and_hold(slider)
+                actions.move_by_offset(offset, 0)
+                actions.release()
+                actions.perform()
+                
+                wait_for(lambda: not self._check_for_captcha(), self.wait_timeouts['captcha'])
+                
+                if not self._check_for_captcha():
+                    self.log("Giải captcha thành công")
+                    return True
+                    
+            self.log("Giải captcha thất bại")
+            return False
+            
+        except Exception as e:
+            self.log(f"Lỗi xử lý captcha: {str(e)}")
+            return False
+
+    def _validate_capsolver_key(self, api_key: str) -> bool:
+        """Kiểm tra API key Capsolver có hợp lệ không"""
+        try:
+            import capsolver
+            capsolver.api_key = api_key
+            
+            balance = capsolver.balance()
+            self.log(f"Số dư Capsolver: ${balance}")
+            return float(balance) > 0
+        except Exception as e:
+            self.log(f"Lỗi kiểm tra API key: {str(e)}")
+            return False
+
+    def test_capsolver(self):
+        """Test kết nối và khả năng giải captcha của Capsolver"""
+        if not self.capsolver_key:
+            self.log("Không có API key Capsolver")
+            return False
+            
+        try:
+            import capsolver
+            capsolver.api_key = self.capsolver_key
+            
+            # Test balance
+            balance = capsolver.balance()
+            self.log(f"Số dư Capsolver: ${balance}")
+            
+            # Test supported tasks
+            self.log("Các loại captcha được hỗ trợ:")
+            self.log("- DouyinSliderCaptcha")
+            self.log("- ReCaptchaV2")
+            self.log("- FunCaptcha")
+            self.log("- HCaptcha")
+            
+            self.log("API key hợp lệ và sẵn sàng sử dụng")
+            return True
+                
+        except Exception as e:
+            self.log(f"Lỗi khi test Capsolver: {str(e)}")
+            return False
+
+
+if __name__ == "__main__":
+    # python -m douyin_core ...: headless batch downloads, see douyin_cli
+    from douyin_cli import main
+    raise SystemExit(main())
\ No newline at end of file
@@ -0,0 +1,219 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from douyin_metrics import Metrics
+
+
+class DriverPoolTimeout(Exception):
+    pass
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.time()
+        self.last_used = self.created_at
+
+
+class DriverPool:
+    """Keep warm Chrome instances and lease them out one page at a time
+
+    Drivers are health-checked before each lease and recycled after
+    `max_uses` leases, after `max_idle` seconds unused, or when returned
+    as broken. The pool is topped back up to `min_size` in the background.
+    """
+
+    def __init__(self, create_driver: Callable[[], Any], min_size: int = 1, max_size: int = 4,
+                 max_uses: int = 50, max_idle: float = 600, log_callback=None, metrics: Optional[Metrics] = None):
+        self.create_driver = create_driver
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.max_uses = max_uses
+        self.max_idle = max_idle
+        self.log_callback = log_callback
+
+        self._idle: List[_PooledDriver] = []
+        self._leased: Dict[int, _PooledDriver] = {}
+        self._creating = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.created = 0
+        self.recycled = 0
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.register_gauge('pool_drivers', self._state_counts, label='state')
+
+    def log(self, message: str):
+        if self.log_callback:
+            self.log_callback(message)
+        else:
+            print(message)
+
+    @property
+    def size(self) -> int:
+        return len(self._idle) + len(self._leased) + self._creating
+
+    def start(self):
+        """Warm up min_size drivers in the background"""
+        self._replenish()
+
+    def acquire(self, timeout: Optional[float] = None):
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            entry = self._take_idle(deadline)
+            if entry is None:
+                break
+            # Health-checked outside the lock: current_url is a WebDriver round trip and hangs on a stuck Chrome
+            if self._is_healthy(entry.driver):
+                return entry.driver
+            with self._cond:
+                self._leased.pop(id(entry.driver), None)
+                self._destroy(entry, restart=True)
+                self._cond.notify()
+
+        # Start Chrome outside the lock; it takes seconds
+        try:
+            entry = _PooledDriver(self.create_driver())
+        except Exception:
+            with self._cond:
+                self._creating -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._creating -= 1
+            self.created += 1
+            self._leased[id(entry.driver)] = entry
+        return entry.driver
+
+    def _take_idle(self, deadline: Optional[float]) -> Optional[_PooledDriver]:
+        """Lease an idle driver (not yet health-checked), or return None after reserving a slot for a new one"""
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise DriverPoolTimeout("Driver pool đã đóng")
+                while self._idle:
+                    entry = self._idle.pop()
+                    if self._is_stale(entry):
+                        self._destroy(entry)
+                        continue
+                    self._leased[id(entry.driver)] = entry
+                    return entry
+                if self.size < self.max_size:
+                    self._creating += 1
+                    return None
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise DriverPoolTimeout("Không có Chrome rảnh trong thời gian chờ")
+                self._cond.wait(remaining)
+
+    def release(self, driver, broken: bool = False):
+        with self._cond:
+            entry = self._leased.pop(id(driver), None)
+            if entry is None:
+                return
+            entry.uses += 1
+            entry.last_used = time.time()
+            if broken or self._closed or entry.uses >= self.max_uses:
+                self._destroy(entry, restart=broken)
+            else:
+                self._idle.append(entry)
+            self._cond.notify()
+        self._replenish()
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """with pool.lease() as driver: ... (the driver is recycled if the block raises)"""
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        except Exception:
+            self.release(driver, broken=True)
+            raise
+        else:
+            self.release(driver)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                'idle': len(self._idle),
+                'leased': len(self._leased),
+                'creating': self._creating,
+                'created': self.created,
+                'recycled': self.recycled,
+            }
+
+    def _state_counts(self) -> Dict[str, int]:
+        stats = self.stats()
+        return {state: stats[state] for state in ('idle', 'leased', 'creating')}
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            entries = self._idle + list(self._leased.values())
+            self._idle = []
+            self._leased = {}
+            self._cond.notify_all()
+        for entry in entries:
+            self._quit(entry.driver)
+
+    def _is_stale(self, entry: _PooledDriver) -> bool:
+        return bool(self.max_idle) and time.time() - entry.last_used > self.max_idle
+
+    def _is_healthy(self, driver) -> bool:
+        """Check if the driver session still answers"""
+        try:
+            driver.current_url
+            return True
+        except:
+            return False
+
+    def _destroy(self, entry: _PooledDriver, restart: bool = False):
+        """Called with the lock held; quitting Chrome happens in the background
+
+        `restart` marks a driver that crashed or stopped answering, as opposed to routine
+        max_uses/max_idle recycling; only those count as driver_restarts.
+        """
+        self.recycled += 1
+        if restart and self.metrics is not None:
+            self.metrics.inc('driver_restarts')
+        threading.Thread(target=self._quit, args=(entry.driver,), daemon=True).start()
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except:
+            pass
+
+    def _replenish(self):
+        with self._cond:
+            missing = self.min_size - self.size
+            if self._closed or missing <= 0:
+                return
+            self._creating += missing
+        for _ in range(missing):
+            threading.Thread(target=self._warm_one, daemon=True).start()
+
+    def _warm_one(self):
+        try:
+            entry = _PooledDriver(self.create_driver())
+        except Exception as e:
+            self.log(f"Lỗi khi khởi tạo Chrome: {str(e)}")
+            with self._cond:
+                self._creating -= 1
+                # Waiters see a free slot and start Chrome themselves, so they get the error too
+                self._cond.notify_all()
+            return
+        with self._cond:
+            self._creating -= 1
+            self.created += 1
+            if self._closed:
+                closed = True
+            else:
+                closed = False
+                self._idle.append(entry)
+                self._cond.notify()
+        if closed:
+            self._quit(entry.driver)
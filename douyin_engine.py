@@ -0,0 +1,666 @@
+import os
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from douyin_cache import url_expiry
+from douyin_core import DouyinDownloader
+from douyin_jobstore import CLAIMED, QUEUED, JobStore, StoredJob
+from douyin_metrics import JOB, Metrics
+from douyin_progress import RESOLVING, DOWNLOADING, DONE, FAILED, ProgressBus
+from douyin_ratelimit import backoff_delay
+
+STORE_POLL_INTERVAL = 2.0  # Seconds without a finished job before checking the store for jobs taken elsewhere
+
+
+@dataclass
+class DownloadJob:
+    url: str
+    download_path: str = "downloads"
+    job_id: int = 0
+    video_id: Optional[str] = None
+    state: str = QUEUED
+    attempts: int = 0
+    progress: float = 0.0
+    error: Optional[str] = None
+    media_url: Optional[str] = None
+    output_path: Optional[str] = None
+    skipped: bool = False  # Already in the download folder's manifest
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, FAILED)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds spent in the worker (0 while still queued)"""
+        if not self.started_at:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    @classmethod
+    def from_stored(cls, stored: StoredJob) -> 'DownloadJob':
+        """In-memory job for an unfinished JobStore row; attempts start over in this run"""
+        return cls(url=stored.url, download_path=stored.download_path, job_id=stored.job_id,
+                   video_id=stored.video_id, media_url=stored.media_url)
+
+
+@dataclass
+class BatchResult:
+    jobs: List[DownloadJob]
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def total(self) -> int:
+        return len(self.jobs)
+
+    @property
+    def succeeded(self) -> List[DownloadJob]:
+        return [job for job in self.jobs if job.state == DONE]
+
+    @property
+    def failed(self) -> List[DownloadJob]:
+        return [job for job in self.jobs if job.state == FAILED]
+
+    @property
+    def skipped(self) -> List[DownloadJob]:
+        return [job for job in self.jobs if job.skipped]
+
+    @property
+    def duration(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+    def summary(self) -> str:
+        text = f"Đã tải xong {len(self.succeeded)}/{self.total} video trong {self.duration:.1f}s"
+        if self.skipped:
+            text += f" (bỏ qua {len(self.skipped)} video đã có)"
+        return text
+
+
+class DownloadEngine:
+    """Run download jobs on a fixed pool of workers, each with its own DouyinDownloader"""
+
+    def __init__(self, downloader_factory: Callable[[], DouyinDownloader], workers: int = 3,
+                 queue_size: int = 100, retries: int = 3, retry_delay: float = 2.0, max_retry_delay: float = 60.0,
+                 log_callback=None, on_job_update: Optional[Callable[[DownloadJob], None]] = None,
+                 progress_bus: Optional[ProgressBus] = None, metrics: Optional[Metrics] = None,
+                 job_store: Optional[JobStore] = None, job_folder: Optional[str] = None):
+        self.downloader_factory = downloader_factory
+        self.workers = max(1, workers)
+        self.retries = max(1, retries)
+        # Base and cap of the jittered exponential backoff between attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.log_callback = log_callback
+        self.on_job_update = on_job_update
+        # Job states here, byte counts from the downloaders (which get the bus if they have none)
+        self.progress_bus = progress_bus
+        # Per-stage spans, retry/job counters and queue gauges; passed on to the downloaders like the bus
+        self.metrics = metrics
+        # Jobs and their states on disk. With a store, submit() never blocks: a claimer thread moves
+        # jobs from the store into the bounded queue, and start() resumes what an earlier run left
+        self.job_store = job_store
+        # Only resume and claim the store's jobs for this download folder (None: every folder)
+        self.job_folder = job_folder
+        self.resumed: List[DownloadJob] = []
+
+        self._jobs: "queue.Queue[DownloadJob]" = queue.Queue(maxsize=queue_size)
+        self._completed: "queue.Queue[DownloadJob]" = queue.Queue()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._id_lock = threading.Lock()
+        self._next_id = 0
+        self._downloaders: List[DouyinDownloader] = []
+        self._active: Dict[int, str] = {}  # job_id -> state of jobs resolving or downloading
+        # Store-backed jobs of this run by ID, so a URL submitted twice (or resumed) is one job
+        self._stored_jobs: Dict[int, DownloadJob] = {}
+        self._stored_lock = threading.Lock()
+        self._store_wakeup = threading.Event()
+        self._resume_pending = job_store is not None
+        if metrics is not None:
+            metrics.register_gauge('queue_depth', self._queue_depths, label='queue')
+            metrics.register_gauge('active_jobs', self._active_counts, label='state')
+            metrics.register_gauge('active_drivers', lambda: sum(1 for d in list(self._downloaders) if d.driver))
+
+    def log(self, message: str):
+        if self.log_callback:
+            self.log_callback(message)
+        else:
+            print(message)
+
+    def start(self):
+        if self._threads:
+            return
+        self._stopping.clear()
+        self._start_claimer()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"douyin-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def resume(self) -> List[DownloadJob]:
+        """Queue again the store's jobs (in job_folder, if set) that an earlier run never finished; start() calls this once
+
+        Only one engine may use the store while resuming (see JobStore.requeue_unfinished).
+        """
+        self._resume_pending = False
+        count = self.job_store.requeue_unfinished(self.job_folder)
+        resumed = []
+        with self._stored_lock:
+            for stored in self.job_store.unfinished(self.job_folder):
+                # Rows still CLAIMED here are leased by douyin_worker processes
+                if stored.state == QUEUED and stored.job_id not in self._stored_jobs:
+                    job = self._stored_jobs[stored.job_id] = DownloadJob.from_stored(stored)
+                    resumed.append(job)
+        if resumed:
+            self.log(f"Tiếp tục {len(resumed)} video chưa xong từ lần trước ({count} đang tải dở)")
+        self.resumed = resumed
+        self._store_wakeup.set()
+        return resumed
+
+    def _start_claimer(self):
+        if self.job_store is None:
+            return
+        if self._resume_pending:
+            self.resume()
+        thread = threading.Thread(target=self._claimer, name="douyin-claimer", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _claimer(self):
+        """Move jobs from the store into the bounded in-memory queue as workers free up"""
+        while not self._stopping.is_set():
+            self._store_wakeup.clear()
+            stored = self.job_store.claim(download_path=self.job_folder)
+            if stored is None:
+                self._store_wakeup.wait(0.5)
+                continue
+            with self._stored_lock:
+                job = self._stored_jobs.get(stored.job_id)
+                if job is None or job.finished:  # Finished here before and queued again since
+                    job = self._stored_jobs[stored.job_id] = DownloadJob.from_stored(stored)
+            while True:
+                try:
+                    self._jobs.put(job, timeout=0.5)
+                    break
+                except queue.Full:
+                    if self._stopping.is_set():
+                        self.job_store.release(job.job_id)
+                        return
+
+    def submit(self, url: str, download_path: str = "downloads") -> DownloadJob:
+        """Queue one URL; blocks while the job queue is full (never with a job store)"""
+        self.start()
+        if self.job_store is not None:
+            return self._submit_stored(self.job_store.add(url, download_path))
+        with self._id_lock:
+            self._next_id += 1
+            job = DownloadJob(url=url, download_path=download_path, job_id=self._next_id)
+        self._jobs.put(job)
+        self._notify(job)
+        return job
+
+    def submit_many(self, urls: Iterable[str], download_path: str = "downloads") -> List[DownloadJob]:
+        if self.job_store is not None:
+            self.start()
+            return [self._submit_stored(stored) for stored in self.job_store.add_many(urls, download_path)]
+        return [self.submit(url, download_path) for url in urls]
+
+    def _submit_stored(self, stored: StoredJob) -> DownloadJob:
+        """This run's job for a store row; a row that already finished (here or in an earlier run) is queued again
+
+        Finished videos then end at the manifest check, before any page
+        load, while deleted files and earlier failures are fetched again.
+        """
+        with self._stored_lock:
+            job = self._stored_jobs.get(stored.job_id)
+            if job is not None and not job.finished:
+                return job
+            if stored.finished:
+                self.job_store.retry(stored.job_id)
+            job = self._stored_jobs[stored.job_id] = DownloadJob.from_stored(stored)
+        self._notify(job)
+        self._store_wakeup.set()
+        return job
+
+    def taken_elsewhere(self, job_ids: Iterable[int]) -> Set[int]:
+        """IDs among job_ids that douyin_worker processes hold in the shared store; this engine won't run them"""
+        if self.job_store is None:
+            return set()
+        held = self.job_store.held_by_workers(job_ids)
+        for job_id, worker in held.items():
+            self.log(f"Job {job_id} đang được {worker} xử lý, không chờ ở đây")
+        return set(held)
+
+    @property
+    def stopped(self) -> bool:
+        """stop() was called and every thread has exited: no more jobs will finish"""
+        return self._stopping.is_set() and not any(thread.is_alive() for thread in self._threads)
+
+    def as_completed(self, count: int, timeout: Optional[float] = None) -> Iterator[DownloadJob]:
+        """Yield the next `count` jobs to finish, in completion order"""
+        for _ in range(count):
+            try:
+                yield self._completed.get(timeout=timeout)
+            except queue.Empty:
+                return
+
+    def run(self, urls: List[str], download_path: str = "downloads",
+            on_result: Optional[Callable[[DownloadJob], None]] = None) -> BatchResult:
+        """Download a whole batch and return once every job has finished
+
+        With a job store, duplicate URLs are one job and resumed jobs from an
+        earlier run are also passed to on_result, but only the batch's own
+        jobs are waited for and returned. Jobs a douyin_worker holds are not
+        waited for, and neither is anything once the engine has been stopped.
+        """
+        result = BatchResult(jobs=[])
+        # Feed from a separate thread so the bounded queue can't deadlock us
+        feeder = threading.Thread(target=lambda: result.jobs.extend(self.submit_many(urls, download_path)),
+                                  daemon=True)
+        feeder.start()
+        finished = set()
+
+        def collect(timeout: Optional[float]) -> Optional[DownloadJob]:
+            for job in self.as_completed(1, timeout):
+                finished.add(job.job_id)
+                if on_result:
+                    on_result(job)
+                return job
+            return None
+
+        while feeder.is_alive():
+            collect(0.5)
+        feeder.join()
+        result.jobs = list({job.job_id: job for job in result.jobs}.values())
+        remaining = {job.job_id for job in result.jobs} - finished
+        while remaining:
+            job = collect(STORE_POLL_INTERVAL)
+            if job is not None:
+                remaining.discard(job.job_id)
+            elif self.stopped:
+                break
+            else:
+                remaining -= self.taken_elsewhere(remaining)
+        result.finished_at = time.time()
+        return result
+
+    def stop(self, wait: bool = True):
+        """Cancel queued jobs and stop the workers after their current job"""
+        self._stopping.set()
+        if wait:
+            self.join()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _notify(self, job: DownloadJob):
+        if self.on_job_update:
+            try:
+                self.on_job_update(job)
+            except Exception:
+                pass
+
+    def _queue_depths(self) -> Dict[str, int]:
+        depths = {'pending': self._jobs.qsize()}
+        if self.job_store is not None:
+            depths['stored'] = self.job_store.count(QUEUED)
+        return depths
+
+    def _active_counts(self) -> Dict[str, int]:
+        states = list(self._active.values())
+        return {state: states.count(state) for state in (RESOLVING, DOWNLOADING)}
+
+    def _job_scope(self, job: DownloadJob):
+        """Tag the spans recorded while working on `job` with its ID"""
+        if self.metrics is None:
+            return nullcontext()
+        return self.metrics.job(job_id=job.job_id, url=job.url)
+
+    def _record_state(self, job: DownloadJob, state: str):
+        if state in (RESOLVING, DOWNLOADING):
+            self._active[job.job_id] = state
+        else:
+            self._active.pop(job.job_id, None)
+        metrics = self.metrics
+        if metrics is None:
+            return
+        if state == RESOLVING and job.attempts > 1:
+            metrics.inc('retries')
+        elif state in (DONE, FAILED):
+            result = 'skipped' if job.skipped else state
+            metrics.inc('jobs', result=result)
+            metrics.observe(JOB, job.elapsed, state == DONE, job_id=job.job_id, video_id=job.video_id)
+            metrics.event('job', job_id=job.job_id, url=job.url, video_id=job.video_id, result=result,
+                          attempts=job.attempts, seconds=round(job.elapsed, 3), error=job.error)
+
+    def _persist(self, job: DownloadJob, state: str):
+        store = self.job_store
+        if store is None:
+            return
+        try:
+            if state == FAILED and self._stopping.is_set():
+                store.release(job.job_id)  # Cancelled by stop(): the next run picks it up again
+            elif state in (DONE, FAILED):
+                size = os.path.getsize(job.output_path) if job.output_path and os.path.exists(job.output_path) else 0
+                store.complete(job.job_id, state == DONE, job.error, video_id=job.video_id, attempts=job.attempts,
+                               media_url=job.media_url, progress=job.progress, bytes_done=size,
+                               output_path=job.output_path)
+            else:
+                # A job waiting for another attempt stays claimed so it isn't handed out twice
+                store.update(job.job_id, state=CLAIMED if state == QUEUED else state, video_id=job.video_id,
+                             attempts=job.attempts, error=job.error, media_url=job.media_url,
+                             progress=job.progress)
+        except Exception as e:
+            self.log(f"Không ghi được trạng thái job {job.job_id}: {str(e)}")
+
+    def _set_state(self, job: DownloadJob, state: str):
+        job.state = state
+        self._record_state(job, state)
+        self._persist(job, state)
+        self._notify(job)
+        if self.progress_bus is not None and state != QUEUED:
+            self.progress_bus.update(job.video_id or job.url, state=state, video_id=job.video_id,
+                                     error=job.error if state == FAILED else None)
+
+    def _new_downloader(self) -> DouyinDownloader:
+        downloader = self.downloader_factory()
+        if downloader.progress_bus is None:
+            downloader.progress_bus = self.progress_bus
+        if downloader.metrics is None:
+            downloader.metrics = self.metrics
+        self._downloaders.append(downloader)
+        return downloader
+
+    def _skip_if_downloaded(self, downloader: DouyinDownloader, job: DownloadJob) -> bool:
+        """Finish the job without loading any page if the manifest already has the video"""
+        if not downloader.is_downloaded(job.video_id, job.download_path):
+            return False
+        job.skipped = True
+        job.output_path = downloader.output_path_for(job.video_id, job.download_path)
+        job.progress = 100.0
+        job.finished_at = time.time()
+        self._set_state(job, DONE)
+        return True
+
+    def _worker(self):
+        downloader = None
+        try:
+            while True:
+                try:
+                    job = self._jobs.get(timeout=0.5)
+                except queue.Empty:
+                    if self._stopping.is_set():
+                        break
+                    continue
+
+                if self._stopping.is_set():
+                    job.error = "cancelled"
+                    job.finished_at = time.time()
+                    self._set_state(job, FAILED)
+                    self._completed.put(job)
+                    continue
+
+                if downloader is None:
+                    downloader = self._new_downloader()
+                with self._job_scope(job):
+                    self._process(downloader, job)
+                self._completed.put(job)
+        finally:
+            if downloader is not None:
+                downloader._cleanup_driver()
+                self._downloaders.remove(downloader)
+
+    def _process(self, downloader: DouyinDownloader, job: DownloadJob):
+        job.started_at = time.time()
+        job.video_id = downloader.extract_video_id(job.url)
+        if not job.video_id:
+            job.error = "invalid url"
+            job.finished_at = time.time()
+            self._set_state(job, FAILED)
+            return
+        if self._skip_if_downloaded(downloader, job):
+            return
+
+        def on_progress(progress: float):
+            job.progress = progress
+            self._notify(job)
+
+        for attempt in range(self.retries):
+            if self._stopping.is_set():
+                job.error = "cancelled"
+                break
+            job.attempts = attempt + 1
+            try:
+                self._set_state(job, RESOLVING)
+                video_url = downloader.resolve_video_url(job.url)
+                if not video_url:
+                    job.error = "could not resolve media url"
+                else:
+                    job.media_url = video_url
+                    self._set_state(job, DOWNLOADING)
+                    if downloader.download_media(video_url, job.video_id, job.download_path, on_progress):
+                        job.output_path = downloader.output_path_for(job.video_id, job.download_path)
+                        job.error = None
+                        job.progress = 100.0
+                        job.finished_at = time.time()
+                        self._set_state(job, DONE)
+                        return
+                    job.error = "download failed"
+            except Exception as e:
+                job.error = str(e)
+                # A broken browser session should not poison the next attempt
+                downloader._cleanup_driver()
+            if attempt < self.retries - 1:  # Don't sleep on last attempt
+                time.sleep(backoff_delay(attempt + 1, self.retry_delay, self.max_retry_delay))
+
+        job.finished_at = time.time()
+        self._set_state(job, FAILED)
+
+
+@dataclass
+class _Resolved:
+    job: DownloadJob
+    video_url: str
+    resolved_at: float = field(default_factory=time.time)
+
+
+class DownloadPipeline(DownloadEngine):
+    """Two-stage variant of DownloadEngine: resolvers feed transfer workers
+
+    Resolver threads (one browser each) only turn page URLs into media
+    URLs and hand them over through a small bounded queue; transfer
+    threads only stream files. Browsers keep resolving while earlier
+    videos download. The handover queue is the back-pressure: when the
+    transfers fall behind, resolvers block instead of piling up URLs that
+    would expire, and a URL that still waited too long is re-resolved.
+    """
+
+    def __init__(self, downloader_factory: Callable[[], DouyinDownloader], resolve_workers: int = 2,
+                 transfer_workers: int = 6, resolved_queue_size: Optional[int] = None,
+                 max_resolved_age: float = 300.0, expiry_margin: float = 60.0, **kwargs):
+        super().__init__(downloader_factory, workers=resolve_workers, **kwargs)
+        self.resolve_workers = self.workers
+        self.transfer_workers = max(1, transfer_workers)
+        self.max_resolved_age = max_resolved_age  # Seconds a media URL may wait before it is re-resolved
+        self.expiry_margin = expiry_margin  # Re-resolve URLs that expire sooner than this
+        self._resolved: "queue.Queue[_Resolved]" = queue.Queue(
+            maxsize=resolved_queue_size or self.transfer_workers)
+        # Jobs sent back by the transfer stage; resolvers take these first. Unbounded so a
+        # transfer worker never blocks on resolvers that are themselves blocked on _resolved
+        self._retry: "queue.Queue[DownloadJob]" = queue.Queue()
+        self._resolvers_alive = 0
+        self._alive_lock = threading.Lock()
+
+    def start(self):
+        if self._threads:
+            return
+        self._stopping.clear()
+        self._start_claimer()
+        self._resolvers_alive = self.resolve_workers
+        for i in range(self.resolve_workers):
+            thread = threading.Thread(target=self._resolver, name=f"douyin-resolver-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        for i in range(self.transfer_workers):
+            thread = threading.Thread(target=self._transfer, name=f"douyin-transfer-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _finish(self, job: DownloadJob, state: str, error: Optional[str] = None):
+        job.error = error
+        job.finished_at = time.time()
+        self._set_state(job, state)
+        self._completed.put(job)
+
+    def _next_job(self) -> Optional[DownloadJob]:
+        try:
+            return self._retry.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._jobs.get(timeout=0.5)
+        except queue.Empty:
+            return None
+
+    def _resolver(self):
+        downloader = None
+        try:
+            while True:
+                job = self._next_job()
+                if job is None:
+                    if self._stopping.is_set():
+                        break
+                    continue
+                if self._stopping.is_set():
+                    self._finish(job, FAILED, "cancelled")
+                    continue
+                if downloader is None:
+                    downloader = self._new_downloader()
+                with self._job_scope(job):
+                    self._resolve(downloader, job)
+        finally:
+            if downloader is not None:
+                downloader._cleanup_driver()
+                self._downloaders.remove(downloader)
+            with self._alive_lock:
+                self._resolvers_alive -= 1
+
+    def _resolve(self, downloader: DouyinDownloader, job: DownloadJob):
+        if job.started_at is None:
+            job.started_at = time.time()
+            job.video_id = downloader.extract_video_id(job.url)
+            if not job.video_id:
+                self._finish(job, FAILED, "invalid url")
+                return
+            if self._skip_if_downloaded(downloader, job):
+                self._completed.put(job)
+                return
+
+        # A job coming back from the transfer stage had its cached URL rejected or go stale
+        use_cache = job.attempts == 0
+        while job.attempts < self.retries:
+            if self._stopping.is_set():
+                self._finish(job, FAILED, "cancelled")
+                return
+            job.attempts += 1
+            self._set_state(job, RESOLVING)
+            try:
+                video_url = downloader.resolve_video_url(job.url, use_cache=use_cache)
+                if video_url:
+                    job.media_url = video_url
+                    item = _Resolved(job, video_url)
+                    # Blocks while the transfer stage is saturated
+                    while not self._stopping.is_set():
+                        try:
+                            self._resolved.put(item, timeout=0.5)
+                            return
+                        except queue.Full:
+                            continue
+                    self._finish(job, FAILED, "cancelled")
+                    return
+                job.error = "could not resolve media url"
+            except Exception as e:
+                job.error = str(e)
+                downloader._cleanup_driver()
+            use_cache = False
+            if job.attempts < self.retries:
+                time.sleep(backoff_delay(job.attempts, self.retry_delay, self.max_retry_delay))
+        self._finish(job, FAILED, job.error)
+
+    def _queue_depths(self) -> Dict[str, int]:
+        depths = super()._queue_depths()
+        depths.update({'retry': self._retry.qsize(), 'resolved': self._resolved.qsize()})
+        return depths
+
+    def _is_stale(self, item: _Resolved) -> bool:
+        if time.time() - item.resolved_at > self.max_resolved_age:
+            return True
+        expires_at = url_expiry(item.video_url)
+        return expires_at is not None and expires_at - time.time() < self.expiry_margin
+
+    def _requeue(self, job: DownloadJob, error: str):
+        """Hand a job back to the resolvers, or fail it when it is out of attempts"""
+        if self._stopping.is_set():
+            self._finish(job, FAILED, "cancelled")
+        elif job.attempts >= self.retries:
+            self._finish(job, FAILED, error)
+        else:
+            job.error = error
+            self._set_state(job, QUEUED)
+            self._retry.put(job)
+
+    def _transfer(self):
+        downloader = None
+        try:
+            while True:
+                try:
+                    item = self._resolved.get(timeout=0.5)
+                except queue.Empty:
+                    with self._alive_lock:
+                        resolvers_done = self._resolvers_alive <= 0
+                    if self._stopping.is_set() and resolvers_done:
+                        break
+                    continue
+
+                job = item.job
+                if self._stopping.is_set():
+                    self._finish(job, FAILED, "cancelled")
+                    continue
+                if self._is_stale(item):
+                    self.log(f"URL video {job.video_id} đã chờ quá lâu, lấy lại URL mới")
+                    self._requeue(job, "media url went stale in queue")
+                    continue
+                if downloader is None:
+                    # Transfer workers never call the browser, so their downloaders don't start Chrome
+                    downloader = self._new_downloader()
+
+                def on_progress(progress: float):
+                    job.progress = progress
+                    self._notify(job)
+
+                self._set_state(job, DOWNLOADING)
+                try:
+                    with self._job_scope(job):
+                        ok = downloader.download_media(item.video_url, job.video_id, job.download_path, on_progress)
+                    if ok:
+                        job.output_path = downloader.output_path_for(job.video_id, job.download_path)
+                        job.progress = 100.0
+                        self._finish(job, DONE)
+                        continue
+                    self._requeue(job, "download failed")
+                except Exception as e:
+                    self._requeue(job, str(e))
+        finally:
+            if downloader is not None:
+                downloader._cleanup_driver()
+                self._downloaders.remove(downloader)
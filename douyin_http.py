@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from douyin_writer import DEFAULT_BUFFER_SIZE
+
+if TYPE_CHECKING:
+    import requests
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+@dataclass
+class HttpConfig:
+    """Connection pool settings shared by every HTTP call in douyin_core"""
+    pool_connections: int = 10    # Number of per-host pools to keep
+    pool_maxsize: int = 32        # Keep-alive connections per host
+    connect_retries: int = 3      # Retries on connect errors only (never on partial reads)
+    backoff_factor: float = 0.5
+    connect_timeout: float = 10
+    read_timeout: float = 30
+    user_agent: str = DEFAULT_USER_AGENT
+    chunk_size: int = DEFAULT_BUFFER_SIZE  # Bytes read from the socket per write to disk
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        return (self.connect_timeout, self.read_timeout)
+
+
+def create_session(config: Optional[HttpConfig] = None) -> 'requests.Session':
+    """Build a long-lived session with a sized connection pool and connect retries"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    config = config or HttpConfig()
+    retry = Retry(
+        total=None,
+        connect=config.connect_retries,
+        read=0,
+        status=0,
+        redirect=5,
+        backoff_factor=config.backoff_factor,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=config.pool_connections,
+        pool_maxsize=config.pool_maxsize,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['User-Agent'] = config.user_agent
+    return session
@@ -0,0 +1,300 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from douyin_progress import DONE, FAILED
+
+DEFAULT_JOBS_PATH = os.path.join(os.path.expanduser('~'), '.douyin_downloader', 'jobs.sqlite')
+
+# Job states besides douyin_progress's RESOLVING / DOWNLOADING / DONE / FAILED
+QUEUED = 'queued'    # Waiting to be claimed
+CLAIMED = 'claimed'  # Taken by an engine, not started yet (or waiting for a retry)
+FINAL_STATES = (DONE, FAILED)
+
+_COLUMNS = ('job_id', 'url', 'download_path', 'state', 'video_id', 'attempts', 'error', 'media_url', 'progress',
+            'bytes_done', 'output_path', 'claimed_by', 'created_at', 'updated_at', 'finished_at', 'lease_until')
+_SELECT = f"SELECT {', '.join(_COLUMNS)} FROM jobs"
+_UPDATABLE = ('state', 'video_id', 'attempts', 'error', 'media_url', 'progress', 'bytes_done', 'output_path')
+
+
+@dataclass
+class StoredJob:
+    job_id: int
+    url: str
+    download_path: str
+    state: str
+    video_id: Optional[str]
+    attempts: int
+    error: Optional[str]
+    media_url: Optional[str]
+    progress: float
+    bytes_done: int
+    output_path: Optional[str]
+    claimed_by: Optional[str]
+    created_at: float
+    updated_at: float
+    finished_at: Optional[float]
+    lease_until: Optional[float] = None  # Claimed with a lease: back to QUEUED unless renewed by then
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINAL_STATES
+
+
+class JobStore:
+    """Download jobs on disk, so a batch survives a crash, a closed window or a reboot
+
+    One row per (url, download_path) with its state, attempts, last error,
+    resolved media URL and bytes written. Jobs are handed out by claim(),
+    which moves the oldest QUEUED row to CLAIMED inside one write
+    transaction, so two engines on the same file never get the same job.
+    Rows that were claimed but never finished (the process died) go back
+    to QUEUED with requeue_unfinished().
+
+    Workers sharing the file (douyin_worker) claim with a lease instead:
+    they renew it with heartbeat() while the job runs, and a job whose
+    lease ran out (its worker died) is reclaimed by the next claim().
+    Updates that pass `worker` only apply while that worker holds the job.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOBS_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                download_path TEXT NOT NULL,
+                state TEXT NOT NULL,
+                video_id TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                media_url TEXT,
+                progress REAL NOT NULL DEFAULT 0,
+                bytes_done INTEGER NOT NULL DEFAULT 0,
+                output_path TEXT,
+                claimed_by TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                finished_at REAL,
+                lease_until REAL,
+                UNIQUE (url, download_path)
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if 'lease_until' not in columns:  # Files written before leases existed
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN lease_until REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, job_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_lease ON jobs (lease_until)")
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _row(self, conn: sqlite3.Connection, job_id: int) -> Optional[StoredJob]:
+        row = conn.execute(f"{_SELECT} WHERE job_id = ?", (job_id,)).fetchone()
+        return StoredJob(*row) if row else None
+
+    def add(self, url: str, download_path: str = "downloads") -> StoredJob:
+        """Queue a URL; returns the existing row (in whatever state) if it was added before"""
+        return self.add_many([url], download_path)[0]
+
+    def add_many(self, urls: Iterable[str], download_path: str = "downloads") -> List[StoredJob]:
+        """add() for many URLs in one transaction"""
+        now = time.time()
+        jobs = []
+        with self._transaction() as conn:
+            for url in urls:
+                conn.execute(
+                    "INSERT OR IGNORE INTO jobs (url, download_path, state, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (url, download_path, QUEUED, now, now),
+                )
+                row = conn.execute(f"{_SELECT} WHERE url = ? AND download_path = ?", (url, download_path)).fetchone()
+                jobs.append(StoredJob(*row))
+        return jobs
+
+    def get(self, job_id: int) -> Optional[StoredJob]:
+        with self._lock:
+            return self._row(self._conn, job_id)
+
+    def claim(self, worker: Optional[str] = None, lease: Optional[float] = None,
+              download_path: Optional[str] = None) -> Optional[StoredJob]:
+        """Take the oldest QUEUED job (QUEUED -> CLAIMED), or None if there is none
+
+        With `lease` (seconds) the job must be renewed with heartbeat() before it runs out.
+        With `download_path` only jobs for that folder are considered.
+        """
+        now = time.time()
+        query = "SELECT job_id FROM jobs WHERE state = ?"
+        params = [QUEUED]
+        if download_path is not None:
+            query += " AND download_path = ?"
+            params.append(download_path)
+        with self._transaction() as conn:
+            self._reclaim_expired(conn, now)
+            row = conn.execute(query + " ORDER BY job_id LIMIT 1", params).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE jobs SET state = ?, claimed_by = ?, lease_until = ?, updated_at = ? WHERE job_id = ?",
+                         (CLAIMED, worker, now + lease if lease else None, now, row[0]))
+            return self._row(conn, row[0])
+
+    def _reclaim_expired(self, conn: sqlite3.Connection, now: float) -> int:
+        cursor = conn.execute(
+            "UPDATE jobs SET state = ?, claimed_by = NULL, lease_until = NULL, updated_at = ? "
+            "WHERE lease_until < ? AND state NOT IN (?, ?, ?)",
+            (QUEUED, now, now, QUEUED, *FINAL_STATES),
+        )
+        return cursor.rowcount
+
+    def reclaim_expired(self) -> int:
+        """Queue again every job whose lease ran out; returns how many (claim() also does this)"""
+        with self._transaction() as conn:
+            return self._reclaim_expired(conn, time.time())
+
+    def heartbeat(self, worker: str, job_ids: Iterable[int], lease: float) -> List[int]:
+        """Renew the worker's leases on job_ids; returns the IDs it no longer holds (reclaimed or finished)"""
+        now = time.time()
+        lost = []
+        with self._transaction() as conn:
+            for job_id in job_ids:
+                cursor = conn.execute(
+                    "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE job_id = ? AND claimed_by = ? "
+                    "AND state NOT IN (?, ?, ?)",
+                    (now + lease, now, job_id, worker, QUEUED, *FINAL_STATES),
+                )
+                if not cursor.rowcount:
+                    lost.append(job_id)
+        return lost
+
+    def update(self, job_id: int, worker: Optional[str] = None, **fields) -> bool:
+        """Record progress of a claimed job: any of state, video_id, attempts, error, media_url, progress,
+        bytes_done, output_path; moving to DONE or FAILED also sets finished_at and drops the lease
+
+        Returns False if `worker` was given and no longer holds the job.
+        """
+        unknown = set(fields) - set(_UPDATABLE)
+        if unknown:
+            raise ValueError(f"unknown job fields: {', '.join(sorted(unknown))}")
+        now = time.time()
+        fields['updated_at'] = now
+        if fields.get('state') in FINAL_STATES:
+            fields['finished_at'] = now
+            fields['lease_until'] = None
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        query = f"UPDATE jobs SET {assignments} WHERE job_id = ?"
+        params = [*fields.values(), job_id]
+        if worker is not None:
+            query += " AND claimed_by = ? AND state NOT IN (?, ?, ?)"
+            params += [worker, QUEUED, *FINAL_STATES]
+        with self._transaction() as conn:
+            return conn.execute(query, params).rowcount > 0
+
+    def complete(self, job_id: int, ok: bool, error: Optional[str] = None, worker: Optional[str] = None,
+                 **fields) -> bool:
+        return self.update(job_id, worker, state=DONE if ok else FAILED, error=None if ok else error, **fields)
+
+    def release(self, job_id: int, worker: Optional[str] = None) -> bool:
+        """Hand an unfinished job back to the queue (the engine stopped before it was done)"""
+        query = ("UPDATE jobs SET state = ?, claimed_by = NULL, lease_until = NULL, updated_at = ? "
+                 "WHERE job_id = ? AND state NOT IN (?, ?)")
+        params = [QUEUED, time.time(), job_id, *FINAL_STATES]
+        if worker is not None:
+            query += " AND claimed_by = ?"
+            params.append(worker)
+        with self._transaction() as conn:
+            return conn.execute(query, params).rowcount > 0
+
+    def retry(self, job_id: int):
+        """Queue a finished job again with a clean attempt count"""
+        with self._transaction() as conn:
+            conn.execute("UPDATE jobs SET state = ?, attempts = 0, error = NULL, claimed_by = NULL, lease_until = NULL, "
+                         "finished_at = NULL, updated_at = ? WHERE job_id = ?", (QUEUED, time.time(), job_id))
+
+    def requeue_unfinished(self, download_path: Optional[str] = None) -> int:
+        """Put every claimed-but-unfinished job (of one folder, if given) back in the queue; returns how many
+
+        Jobs under a live lease are left to their workers; claims without a
+        lease are only safe to requeue while no other engine uses this file.
+        """
+        now = time.time()
+        query = ("UPDATE jobs SET state = ?, claimed_by = NULL, lease_until = NULL, updated_at = ? "
+                 "WHERE state NOT IN (?, ?, ?) AND (lease_until IS NULL OR lease_until < ?)")
+        params = [QUEUED, now, QUEUED, *FINAL_STATES, now]
+        if download_path is not None:
+            query += " AND download_path = ?"
+            params.append(download_path)
+        with self._transaction() as conn:
+            return conn.execute(query, params).rowcount
+
+    def held_by_workers(self, job_ids: Iterable[int]) -> Dict[int, str]:
+        """Which of job_ids a named worker (douyin_worker) has claimed or finished: job_id -> worker
+
+        Engines claim without a name, so an engine sharing the file will never run these.
+        """
+        job_ids = list(job_ids)
+        held = {}
+        with self._lock:
+            for i in range(0, len(job_ids), 500):  # Stay below SQLite's bound-parameter limit
+                chunk = job_ids[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT job_id, claimed_by FROM jobs WHERE claimed_by IS NOT NULL AND state != ? "
+                    f"AND job_id IN ({', '.join('?' * len(chunk))})",
+                    (QUEUED, *chunk),
+                ).fetchall()
+                held.update(rows)
+        return held
+
+    def unfinished(self, download_path: Optional[str] = None) -> List[StoredJob]:
+        """Jobs not DONE or FAILED, oldest first"""
+        query = f"{_SELECT} WHERE state NOT IN (?, ?)"
+        params = list(FINAL_STATES)
+        if download_path is not None:
+            query += " AND download_path = ?"
+            params.append(download_path)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY job_id", params).fetchall()
+        return [StoredJob(*row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        return dict(rows)
+
+    def count(self, state: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE state = ?", (state,)).fetchone()[0]
+
+    def purge_finished(self, older_than: float = 0) -> int:
+        """Delete DONE rows finished more than `older_than` seconds ago; FAILED rows are kept for retry"""
+        with self._transaction() as conn:
+            cursor = conn.execute("DELETE FROM jobs WHERE state = ? AND finished_at <= ?",
+                                  (DONE, time.time() - older_than))
+            return cursor.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,94 @@
+import threading
+from typing import Dict
+
+# URL patterns blocked in lean mode (Network.setBlockedURLs syntax, * wildcards).
+# Media hosts (douyinvod.com) and the captcha images on byteimg.com are left alone.
+LEAN_BLOCKED_URLS = [
+    '*douyinpic.com/*',        # Covers, thumbnails, avatars
+    '*.webp*', '*.gif*', '*.svg*', '*.ico*',
+    '*.woff*', '*.ttf*', '*.otf*', '*.eot*',
+    '*mcs.zijieapi.com/*',     # Analytics beacons
+    '*mon.zijieapi.com/*',     # Monitoring
+    '*/slardar/*',             # Performance monitor SDK
+    '*/monitor_browser/*',
+    '*google-analytics.com/*',
+    '*googletagmanager.com/*',
+]
+
+LEAN_CHROME_ARGS = [
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--mute-audio',
+    '--autoplay-policy=no-user-gesture-required',  # The player must still request the media
+]
+
+# Rough sizes used to estimate what a blocked request would have cost, by DevTools resource type
+TYPICAL_SIZES = {
+    'Image': 40 * 1024,
+    'Font': 60 * 1024,
+    'Script': 50 * 1024,
+    'Stylesheet': 20 * 1024,
+    'XHR': 2 * 1024,
+    'Fetch': 2 * 1024,
+    'Ping': 512,
+}
+DEFAULT_TYPICAL_SIZE = 8 * 1024
+
+
+def configure_lean_options(chrome_options):
+    for arg in LEAN_CHROME_ARGS:
+        chrome_options.add_argument(arg)
+    # Return from driver.get() at DOMContentLoaded; readiness is checked by douyin_wait
+    chrome_options.page_load_strategy = 'eager'
+
+
+def apply_lean_blocking(driver):
+    """Install request blocking on a running driver through CDP"""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URLS})
+
+
+class LeanStats:
+    """NetworkCapture listener counting transferred and blocked requests
+
+    Can be shared by several downloaders; bytes_saved is an estimate from
+    TYPICAL_SIZES since blocked requests never report a size.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes_transferred = 0
+        self.blocked_requests = 0
+        self.bytes_saved = 0
+        self.blocked_by_type: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, method: str, params: Dict):
+        if method == 'Network.loadingFinished':
+            with self._lock:
+                self.requests += 1
+                self.bytes_transferred += int(params.get('encodedDataLength') or 0)
+        elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+            resource_type = params.get('type', 'Other')
+            with self._lock:
+                self.blocked_requests += 1
+                self.bytes_saved += TYPICAL_SIZES.get(resource_type, DEFAULT_TYPICAL_SIZE)
+                self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'bytes_transferred': self.bytes_transferred,
+                'blocked_requests': self.blocked_requests,
+                'bytes_saved_estimate': self.bytes_saved,
+                'blocked_by_type': dict(self.blocked_by_type),
+            }
+
+    def summary(self) -> str:
+        with self._lock:
+            return (f"Chế độ nhẹ: đã chặn {self.blocked_requests} request "
+                    f"(tiết kiệm ~{self.bytes_saved / 1024 / 1024:.1f} MB), "
+                    f"đã tải {self.requests} request ({self.bytes_transferred / 1024 / 1024:.1f} MB)")
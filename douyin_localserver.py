@@ -0,0 +1,315 @@
+import glob
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from douyin_profile import FEED_PATH
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+MEDIA_PATH = '/media/'
+
+_RANGE = re.compile(r'bytes=(\d+)-(\d*)$')
+
+# Minimal profile page: loads the feed like douyin.com does and renders /video/ anchors
+_USER_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>fixture profile</title></head>
+<body>
+<ul id="posts"></ul>
+<div id="sentinel" style="height: 2000px"></div>
+<script>
+var cursor = 0, hasMore = true, loading = false;
+function loadMore() {
+    if (loading || !hasMore) { return; }
+    loading = true;
+    fetch('%(feed_path)s?sec_user_id=%(sec_uid)s&count=18&max_cursor=' + cursor)
+        .then(function (r) { return r.json(); })
+        .then(function (data) {
+            var list = document.getElementById('posts');
+            data.aweme_list.forEach(function (aweme) {
+                var li = document.createElement('li');
+                li.innerHTML = '<a href="/video/' + aweme.aweme_id + '">' + aweme.desc + '</a>';
+                list.appendChild(li);
+            });
+            cursor = data.max_cursor;
+            hasMore = !!data.has_more;
+            loading = false;
+        });
+}
+window.addEventListener('scroll', function () {
+    if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 10) { loadMore(); }
+});
+loadMore();
+</script>
+</body></html>
+"""
+
+# Video page: a player pointing at the stand-in CDN, found by DevTools capture, Resource Timing or the DOM
+_VIDEO_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>fixture video %(video_id)s</title></head>
+<body>
+<div data-e2e="video-player">
+<video autoplay muted playsinline preload="auto"><source src="%(media_url)s" type="video/mp4"></video>
+</div>
+</body></html>
+"""
+
+
+def load_feed_pages(pages_dir: str) -> Dict[int, Dict]:
+    """Map request max_cursor -> recorded response, chaining each page's max_cursor to the next file"""
+    pages = {}
+    cursor = 0
+    for path in sorted(glob.glob(os.path.join(pages_dir, 'page_*.json')),
+                       key=lambda p: int(os.path.basename(p)[5:-5])):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        pages[cursor] = data
+        cursor = int(data.get('max_cursor') or 0)
+    return pages
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: '_Server'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        stand_in = self.server.stand_in
+        if stand_in.latency:
+            time.sleep(stand_in.latency)
+        stand_in.requests.append(self.path)
+        parsed = urlparse(self.path)
+        for prefix, handler in stand_in.routes:
+            if parsed.path.startswith(prefix):
+                handler(self, parsed)
+                return
+        self._send(404, b'not found', 'text/plain')
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    stand_in: 'LocalServer'
+
+
+class LocalServer:
+    """Base for threaded stand-in servers bound to 127.0.0.1 on a free port"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency  # Added before every response, seconds
+        self.requests: List[str] = []
+        self.routes = []
+        self._server: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self._server.server_port}"
+
+    def start(self) -> 'LocalServer':
+        self._server = _Server((self.host, self.port), _Handler)
+        self._server.stand_in = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FeedReplayServer(LocalServer):
+    """Serve a fixture profile page and replay recorded aweme/post pages by max_cursor"""
+
+    def __init__(self, pages_dir: str = os.path.join(FIXTURES_DIR, 'feed'), sec_uid: str = 'MS4wLjABAAAA_fixture_user',
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.sec_uid = sec_uid
+        self.pages = load_feed_pages(pages_dir)
+        self.routes += [
+            (FEED_PATH, self._feed),
+            ('/user/', self._user_page),
+        ]
+
+    def user_url(self) -> str:
+        return f"{self.base_url}/user/{self.sec_uid}"
+
+    def _user_page(self, handler: _Handler, parsed):
+        body = _USER_PAGE % {'feed_path': FEED_PATH, 'sec_uid': self.sec_uid}
+        handler._send(200, body.encode('utf-8'), 'text/html; charset=utf-8')
+
+    def _feed(self, handler: _Handler, parsed):
+        cursor = parse_qs(parsed.query).get('max_cursor', ['0'])[0]
+        data = self.pages.get(int(cursor) if cursor.isdigit() else -1)
+        if data is None:
+            data = {'status_code': 0, 'aweme_list': [], 'max_cursor': 0, 'has_more': 0}
+        handler._send(200, json.dumps(data).encode('utf-8'), 'application/json')
+
+
+class _Pacer:
+    """Hands out send slots so the bytes reserved through it average `rate` bytes/s (0 = unlimited)"""
+
+    def __init__(self, rate: float = 0.0):
+        self.rate = rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, size: int) -> float:
+        """Monotonic time at which `size` more bytes may have been sent"""
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            self._next = max(self._next, time.monotonic()) + size / self.rate
+            return self._next
+
+
+class MediaServer(LocalServer):
+    """Range-capable stand-in for the video CDN, plus /video/<id> pages that play its files
+
+    Every /media/<name>.mp4 serves the same deterministic payload of
+    `video_size` bytes with an ETag, HEAD, single Range and If-Range
+    support. `bandwidth` caps all connections together and
+    `connection_bandwidth` each one (bytes/s, 0 = unlimited); past
+    `max_connections` concurrent transfers new requests get 429 like a
+    throttling CDN.
+    """
+
+    def __init__(self, video_size: int = 8 * 1024 * 1024, bandwidth: float = 0.0,
+                 connection_bandwidth: float = 0.0, max_connections: int = 0, write_size: int = 64 * 1024,
+                 seed: int = 0, **kwargs):
+        super().__init__(**kwargs)
+        self.payload = random.Random(seed).randbytes(video_size)
+        self.sha256 = hashlib.sha256(self.payload).hexdigest()
+        self.etag = f'"{self.sha256[:16]}"'
+        self.connection_bandwidth = connection_bandwidth
+        self.max_connections = max_connections
+        self.write_size = write_size
+        self.active = 0
+        self.peak_connections = 0
+        self.throttled = 0  # Requests answered with 429
+        self.bytes_sent = 0
+        self._pacer = _Pacer(bandwidth)
+        self._lock = threading.Lock()
+        self.routes += [
+            (MEDIA_PATH, self._media),
+            ('/video/', self._video_page),
+        ]
+
+    def media_url(self, video_id: str) -> str:
+        return f"{self.base_url}{MEDIA_PATH}{video_id}.mp4"
+
+    def video_url(self, video_id: str) -> str:
+        return f"{self.base_url}/video/{video_id}"
+
+    def _video_page(self, handler: _Handler, parsed):
+        video_id = parsed.path.rstrip('/').rsplit('/', 1)[-1]
+        body = _VIDEO_PAGE % {'video_id': video_id, 'media_url': self.media_url(video_id)}
+        handler._send(200, body.encode('utf-8'), 'text/html; charset=utf-8')
+
+    def _media(self, handler: _Handler, parsed):
+        with self._lock:
+            busy = bool(self.max_connections) and self.active >= self.max_connections
+            if busy:
+                self.throttled += 1
+            else:
+                self.active += 1
+                self.peak_connections = max(self.peak_connections, self.active)
+        if busy:
+            handler._send(429, b'too many connections', 'text/plain', {'Retry-After': '1'})
+            return
+        try:
+            self._send_media(handler)
+        except (BrokenPipeError, ConnectionResetError):
+            handler.close_connection = True  # Client gave up mid-transfer
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def _send_media(self, handler: _Handler):
+        size = len(self.payload)
+        start, end, status = 0, size - 1, 200
+        match = _RANGE.match(handler.headers.get('Range') or '')
+        if_range = handler.headers.get('If-Range')
+        if match and (not if_range or if_range == self.etag):
+            start = int(match.group(1))
+            end = min(end, int(match.group(2))) if match.group(2) else end
+            if start > end:
+                handler._send(416, b'', 'text/plain', {'Content-Range': f'bytes */{size}'})
+                return
+            status = 206
+
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'video/mp4')
+        handler.send_header('Content-Length', str(end - start + 1))
+        handler.send_header('Accept-Ranges', 'bytes')
+        handler.send_header('ETag', self.etag)
+        if status == 206:
+            handler.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        handler.end_headers()
+        if handler.command == 'HEAD':
+            return
+
+        body = memoryview(self.payload)[start:end + 1]
+        connection = _Pacer(self.connection_bandwidth)
+        for offset in range(0, len(body), self.write_size):
+            block = body[offset:offset + self.write_size]
+            delay = max(self._pacer.reserve(len(block)), connection.reserve(len(block))) - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            handler.wfile.write(block)
+            with self._lock:
+                self.bytes_sent += len(block)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'requests': len(self.requests),
+                'bytes_sent': self.bytes_sent,
+                'peak_connections': self.peak_connections,
+                'throttled': self.throttled,
+            }
+
+
+class StandInSite(MediaServer, FeedReplayServer):
+    """douyin.com and its CDN on one local port: profile page and feed, video pages and media files"""
+
+
+if __name__ == '__main__':
+    server = StandInSite(port=8765).start()
+    print(f"Trang user giả lập: {server.user_url()}")
+    print(f"Trang video giả lập: {server.video_url('7300000000000000001')}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Set
+
+MANIFEST_NAME = '.douyin_manifest.sqlite'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+@dataclass
+class ManifestEntry:
+    video_id: str
+    filename: str
+    size: int
+    sha256: Optional[str]
+    validator: Optional[str]  # ETag or Last-Modified of the media when it was downloaded
+    downloaded_at: float
+
+
+class DownloadManifest:
+    """Index of finished downloads kept next to the files (<download_path>/.douyin_manifest.sqlite)
+
+    Lets a batch skip videos that are already on disk before any page is
+    loaded. The default check only compares the recorded size with the
+    file (one stat call); verify='hash' re-reads the file and compares
+    its SHA-256.
+    """
+
+    def __init__(self, download_path: str, name: str = MANIFEST_NAME):
+        self.download_path = download_path
+        os.makedirs(download_path, exist_ok=True)
+        self.path = os.path.join(download_path, name)
+        self._lock = threading.Lock()
+        # Listed files that failed has() in this process; what is on disk for them must be fetched again
+        self._rejected: Set[str] = set()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS downloads (
+                video_id TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                sha256 TEXT,
+                validator TEXT,
+                downloaded_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, video_id: str) -> Optional[ManifestEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT video_id, filename, size, sha256, validator, downloaded_at FROM downloads WHERE video_id = ?",
+                (video_id,)
+            ).fetchone()
+        return ManifestEntry(*row) if row else None
+
+    def record(self, video_id: str, file_path: str, sha256: Optional[str] = None,
+               validator: Optional[str] = None) -> ManifestEntry:
+        """Add or replace the entry for a finished file; hashes it when no sha256 is given"""
+        entry = ManifestEntry(video_id, os.path.basename(file_path), os.path.getsize(file_path),
+                              sha256 or hash_file(file_path), validator, time.time())
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO downloads (video_id, filename, size, sha256, validator, downloaded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (entry.video_id, entry.filename, entry.size, entry.sha256, entry.validator, entry.downloaded_at),
+            )
+            self._conn.commit()
+            self._rejected.discard(video_id)
+        return entry
+
+    def forget(self, video_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM downloads WHERE video_id = ?", (video_id,))
+            self._conn.commit()
+
+    def has(self, video_id: str, file_path: str, verify: str = 'size') -> bool:
+        """Whether file_path is a finished download of video_id
+
+        Only listed files count. A file the manifest doesn't know (e.g.
+        written before it existed, possibly cut off) is left to the
+        download, which keeps it if it matches the remote size (see
+        download_file's keep_existing). Entries whose file is gone or no
+        longer matches are dropped, and the file is no longer adoptable,
+        so the video is fetched again.
+        """
+        entry = self.get(video_id)
+        if entry is None:
+            return False
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            self.forget(video_id)
+            return False
+        if size != entry.size or (verify == 'hash' and entry.sha256 and hash_file(file_path) != entry.sha256):
+            with self._lock:
+                self._rejected.add(video_id)
+            self.forget(video_id)
+            return False
+        return True
+
+    def adoptable(self, video_id: str) -> bool:
+        """Whether a complete-looking file for video_id may be kept as is (not if it just failed has())"""
+        with self._lock:
+            return video_id not in self._rejected
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM downloads").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_manifests: Dict[str, DownloadManifest] = {}
+_manifests_lock = threading.Lock()
+
+
+def open_manifest(download_path: str) -> DownloadManifest:
+    """Shared DownloadManifest for a download directory (one connection per directory per process)"""
+    key = os.path.abspath(download_path)
+    with _manifests_lock:
+        manifest = _manifests.get(key)
+        if manifest is None:
+            manifest = _manifests[key] = DownloadManifest(download_path)
+        return manifest
@@ -0,0 +1,374 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# Upper bounds (seconds) of the stage histogram buckets
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Stages timed by douyin_core / douyin_engine
+SETUP_DRIVER = 'setup_driver'
+PAGE_LOAD = 'page_load'
+CAPTCHA_CHECK = 'captcha_check'
+CAPTCHA_SOLVE = 'captcha_solve'
+MEDIA_URL = 'media_url'
+RESOLVE = 'resolve'
+TRANSFER = 'transfer'
+JOB = 'job'
+
+HELP = {
+    'stage_seconds': "Time spent in each stage of a download",
+    'stage_failures': "Stage runs that raised or returned no result",
+    'pages_loaded': "Douyin pages opened in Chrome",
+    'captchas_seen': "Pages that showed a captcha",
+    'captchas_solved': "Captchas solved through Capsolver",
+    'media_cache_hits': "Media URLs served from the cache without loading the page",
+    'media_cache_misses': "Media URLs that needed the browser",
+    'bytes_downloaded': "Bytes of finished downloads",
+    'retries': "Job attempts after the first",
+    'jobs': "Finished jobs by result",
+    'driver_restarts': "Chrome instances replaced after dying, failing or being recycled",
+    'active_drivers': "Downloaders that currently hold a Chrome instance",
+    'pool_drivers': "Driver pool Chrome instances by state",
+    'queue_depth': "Jobs waiting in each engine queue",
+    'active_jobs': "Jobs currently resolving or downloading",
+    'jobs_claimed': "Jobs a worker claimed from the shared queue",
+    'leases_lost': "Jobs whose lease ran out or was taken over while the worker still had them",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+GaugeFunction = Callable[[], Union[float, Dict[str, float]]]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _series(name: str, labels: Labels) -> str:
+    if not labels:
+        return name
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return name + '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Span:
+    """One timed stage run; set `ok = False` when it finished without a result"""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.ok = True
+        self.seconds = 0.0
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.failures = 0
+
+
+class Metrics:
+    """Thread-safe counters, gauges and per-stage timing histograms for one process
+
+        with metrics.job(job_id=7, url=url):     # context attached to the spans below
+            with metrics.span(PAGE_LOAD):
+                driver.get(url)
+        metrics.inc('captchas_seen')
+        metrics.register_gauge('queue_depth', engine_queue_sizes, label='queue')
+
+    Stage timings go into histograms (labelled by stage only, so the
+    Prometheus series stay few); with `events_path` every span and job is
+    also appended as one JSON line carrying its job context, for per-job
+    analysis. prometheus() / snapshot() export the aggregates, see
+    MetricsServer for serving them.
+    """
+
+    def __init__(self, events_path: Optional[str] = None, prefix: str = 'douyin',
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self.events_path = events_path
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        self._gauge_functions: Dict[str, Tuple[GaugeFunction, Optional[str]]] = {}
+        self._stages: Dict[str, _Histogram] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._events = None
+        self._events_lock = threading.Lock()
+        self._exporter: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        if events_path:
+            directory = os.path.dirname(events_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._events = open(events_path, 'a', encoding='utf-8')
+
+    # Recording
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[(name, _labels(labels))] = value
+
+    def register_gauge(self, name: str, function: GaugeFunction, label: Optional[str] = None):
+        """Gauge read at export time; with `label`, `function` returns {label value: number}
+
+        Registering a name again replaces the previous function (e.g. the engine of the last batch).
+        """
+        with self._lock:
+            self._gauge_functions[name] = (function, label)
+
+    def observe(self, stage: str, seconds: float, ok: bool = True, **fields):
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = _Histogram(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram.counts[i] += 1
+                    break
+            histogram.count += 1
+            histogram.sum += seconds
+            histogram.max = max(histogram.max, seconds)
+            if not ok:
+                histogram.failures += 1
+        if self._events is not None:
+            self.event('span', stage=stage, seconds=round(seconds, 4), ok=ok, **dict(self.context, **fields))
+
+    @contextmanager
+    def span(self, stage: str, **fields) -> Iterator[Span]:
+        """Time the block as one run of `stage`; an exception marks it failed and propagates"""
+        span = Span(stage)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.ok = False
+            raise
+        finally:
+            span.seconds = time.perf_counter() - start
+            self.observe(stage, span.seconds, span.ok, **fields)
+
+    @property
+    def context(self) -> Dict[str, object]:
+        return getattr(self._local, 'context', {})
+
+    @contextmanager
+    def job(self, **fields):
+        """Attach fields (job_id, url, video_id...) to every span recorded by this thread inside the block"""
+        previous = self.context
+        self._local.context = dict(previous, **fields)
+        try:
+            yield
+        finally:
+            self._local.context = previous
+
+    def event(self, kind: str, **fields):
+        """Append one JSON line to events_path (no-op without one)"""
+        if self._events is None:
+            return
+        line = json.dumps(dict({'type': kind, 'ts': round(time.time(), 3)}, **fields), ensure_ascii=False,
+                          default=str)
+        with self._events_lock:
+            if self._events is not None:
+                self._events.write(line + '\n')
+                self._events.flush()
+
+    # Export
+
+    def _read_gauges(self) -> Dict[Tuple[str, Labels], float]:
+        with self._lock:
+            gauges = dict(self._gauges)
+            functions = list(self._gauge_functions.items())
+        for name, (function, label) in functions:
+            try:
+                value = function()
+            except Exception:
+                continue  # The object behind the gauge is gone or mid-update; skip this read
+            if label is None:
+                gauges[(name, ())] = value
+            else:
+                for label_value, number in value.items():
+                    gauges[(name, _labels({label: label_value}))] = number
+        return gauges
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Counters and gauges by Prometheus series name, plus count/sum/mean/max/failures per stage"""
+        gauges = self._read_gauges()
+        with self._lock:
+            counters = {_series(f'{self.prefix}_{name}_total', labels): value
+                        for (name, labels), value in sorted(self._counters.items())}
+            stages = {
+                stage: {
+                    'count': h.count,
+                    'failures': h.failures,
+                    'sum_s': round(h.sum, 4),
+                    'mean_s': round(h.sum / h.count, 4) if h.count else 0.0,
+                    'max_s': round(h.max, 4),
+                }
+                for stage, h in sorted(self._stages.items())
+            }
+        return {
+            'counters': counters,
+            'gauges': {_series(f'{self.prefix}_{name}', labels): value for (name, labels), value in sorted(gauges.items())},
+            'stages': stages,
+        }
+
+    def prometheus(self) -> str:
+        """Everything in the Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+
+        def header(name: str, kind: str, help_key: str):
+            lines.append(f"# HELP {name} {HELP.get(help_key, help_key)}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        gauges = self._read_gauges()
+        with self._lock:
+            counters = sorted(self._counters.items())
+            stages = [(stage, list(h.counts), h.count, h.sum, h.failures) for stage, h in sorted(self._stages.items())]
+
+        if stages:
+            name = f'{self.prefix}_stage_seconds'
+            header(name, 'histogram', 'stage_seconds')
+            for stage, counts, count, total, _ in stages:
+                cumulative = 0
+                for bound, bucket in zip(self.buckets, counts):
+                    cumulative += bucket
+                    lines.append(f"{_series(name + '_bucket', (('stage', stage), ('le', _number(bound))))} "
+                                 f"{cumulative}")
+                lines.append(f"{_series(name + '_bucket', (('stage', stage), ('le', '+Inf')))} {count}")
+                lines.append(f"{_series(name + '_sum', _labels({'stage': stage}))} {_number(round(total, 6))}")
+                lines.append(f"{_series(name + '_count', _labels({'stage': stage}))} {count}")
+            name = f'{self.prefix}_stage_failures_total'
+            header(name, 'counter', 'stage_failures')
+            for stage, _, _, _, failures in stages:
+                lines.append(f"{_series(name, _labels({'stage': stage}))} {failures}")
+
+        for kind, items, suffix in (('counter', counters, '_total'), ('gauge', sorted(gauges.items()), '')):
+            seen = set()
+            for (metric, labels), value in items:
+                name = f'{self.prefix}_{metric}{suffix}'
+                if name not in seen:
+                    seen.add(name)
+                    header(name, kind, metric)
+                lines.append(f"{_series(name, labels)} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        """Write prometheus() to `path` atomically (for node_exporter's textfile collector)"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus())
+        os.replace(tmp_path, path)
+
+    def start_file_export(self, path: str, interval: float = 10.0):
+        """Rewrite `path` every `interval` seconds until close()"""
+        def run():
+            while not self._stopping.wait(interval):
+                try:
+                    self.write_prometheus(path)
+                except OSError:
+                    pass
+            self.write_prometheus(path)
+
+        self._exporter = threading.Thread(target=run, name="douyin-metrics-file", daemon=True)
+        self._exporter.start()
+
+    def close(self):
+        """Stop the file export (writing it one last time), log a final snapshot and close the events file"""
+        self._stopping.set()
+        if self._exporter:
+            self._exporter.join()
+            self._exporter = None
+        if self._events is not None:
+            self.event('snapshot', **self.snapshot())
+            with self._events_lock:
+                self._events.close()
+                self._events = None
+
+
+def timed(stage: str, result_is_ok: bool = True):
+    """Method decorator: run the method in `self.metrics.span(stage)` when the object has metrics
+
+    With result_is_ok a falsy return value marks the span failed
+    (methods here report failure by returning False/None).
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics = getattr(self, 'metrics', None)
+            if metrics is None:
+                return method(self, *args, **kwargs)
+            with metrics.span(stage) as span:
+                result = method(self, *args, **kwargs)
+                if result_is_ok and not result:
+                    span.ok = False
+                return result
+        return wrapper
+    return decorate
+
+
+class MetricsServer:
+    """Serve /metrics (Prometheus text) and /metrics.json from a background thread"""
+
+    def __init__(self, metrics: Metrics, host: str = '127.0.0.1', port: int = 9464):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self._server.server_port}/metrics"
+
+    def start(self) -> 'MetricsServer':
+        # http.server is imported here so douyin_core (which imports this module) stays light
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/metrics':
+                    body = metrics.prometheus().encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                elif path == '/metrics.json':
+                    body = json.dumps(metrics.snapshot(), ensure_ascii=False).encode('utf-8')
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="douyin-metrics-http", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
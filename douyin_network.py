@@ -0,0 +1,101 @@
+import json
+from typing import Callable, Dict, List, Optional
+
+from douyin_wait import is_media_url, wait_for
+
+
+def enable_network_capture(chrome_options):
+    """Turn on Chrome performance logging so DevTools network events can be read back"""
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    chrome_options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+
+
+def is_media_response(response: Dict) -> bool:
+    url = response.get('url', '')
+    if not url.startswith('http'):
+        return False
+    mime_type = (response.get('mimeType') or '').lower()
+    return mime_type.startswith('video/') or 'douyinvod.com' in url or is_media_url(url)
+
+
+def _content_length(headers: Dict[str, str]) -> int:
+    # 206 responses carry the full size after the slash in Content-Range
+    content_range = headers.get('content-range', '')
+    if '/' in content_range and content_range.rsplit('/', 1)[1].isdigit():
+        return int(content_range.rsplit('/', 1)[1])
+    length = headers.get('content-length', '')
+    return int(length) if length.isdigit() else 0
+
+
+class NetworkCapture:
+    """Read DevTools network events (Network.responseReceived) from a driver's performance log
+
+    get_log() drains Chrome's buffer, so call reset() right before
+    navigating and poll() afterwards. Listeners get every (method, params)
+    pair that passes through.
+    """
+
+    def __init__(self, driver, is_media: Callable[[Dict], bool] = is_media_response):
+        self.driver = driver
+        self.is_media = is_media
+        self.media: List[Dict] = []
+        self.listeners: List[Callable[[str, Dict], None]] = []
+        self.available = True
+
+    def reset(self):
+        self.poll()
+        self.media = []
+
+    def poll(self) -> int:
+        """Process pending log entries, return how many events were read"""
+        if not self.available:
+            return 0
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception:
+            # Driver was started without performance logging
+            self.available = False
+            return 0
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, TypeError, ValueError):
+                continue
+            method = message.get('method', '')
+            params = message.get('params', {})
+            if method == 'Network.responseReceived':
+                self._on_response(params)
+            for listener in self.listeners:
+                try:
+                    listener(method, params)
+                except Exception:
+                    pass
+        return len(entries)
+
+    def _on_response(self, params: Dict):
+        response = params.get('response', {})
+        if not self.is_media(response):
+            return
+        headers = {k.lower(): str(v) for k, v in (response.get('headers') or {}).items()}
+        self.media.append({
+            'url': response['url'],
+            'status': response.get('status'),
+            'mime_type': response.get('mimeType'),
+            'headers': headers,
+            'content_length': _content_length(headers),
+            'request_id': params.get('requestId'),
+        })
+
+    def first_media(self) -> Optional[Dict]:
+        for media in self.media:
+            if media['status'] in (200, 206):
+                return media
+        return None
+
+    def media_ready(self) -> Optional[Dict]:
+        """Condition for wait_for(): poll, then return the captured media response if any"""
+        self.poll()
+        return self.first_media()
+
+    def wait_for_media(self, timeout: float) -> Optional[Dict]:
+        return wait_for(self.media_ready, timeout)
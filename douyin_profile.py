@@ -0,0 +1,315 @@
+import base64
+import json
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+
+from douyin_metrics import PAGE_LOAD
+from douyin_network import NetworkCapture
+from douyin_ratelimit import PAGE
+from douyin_wait import wait_for, any_of, anchor_count_above, captcha_present, scroll_height_changed
+
+# Anchors from index arguments[0] on, so each call only ships the new ones
+_NEW_ANCHORS_JS = """
+    var anchors = document.querySelectorAll("a[href*='/video/']");
+    var hrefs = [];
+    for (var i = arguments[0]; i < anchors.length; i++) { hrefs.push(anchors[i].href); }
+    return [anchors.length, hrefs];
+"""
+
+
+class ProfileCrawler:
+    """Walk a user profile once, yielding each video the first time it appears
+
+    The crawler keeps the page, its scroll position, the number of anchors
+    already read and the set of seen IDs between calls, so listing a
+    profile costs one pass no matter how often the caller pauses.
+    """
+
+    def __init__(self, downloader, url: str, max_empty_scrolls: int = 3):
+        self.downloader = downloader
+        self.url = url
+        self.max_empty_scrolls = max_empty_scrolls
+        self.seen: Set[str] = set()
+        self.anchor_index = 0
+        self.exhausted = False
+        self._opened = False
+        # Discovered but not yet handed out (the caller may stop iterating mid-batch)
+        self._pending: Deque[Dict[str, str]] = deque()
+
+    @property
+    def driver(self):
+        return self.downloader.driver
+
+    def _open(self) -> bool:
+        downloader = self.downloader
+        downloader._ensure_driver()
+        downloader.log("Đang truy cập trang người dùng...")
+        downloader._throttle(PAGE)
+        with downloader._span(PAGE_LOAD):
+            self.driver.get(self.url)
+            wait_for(any_of(anchor_count_above(self.driver, 0), captcha_present(self.driver)),
+                     downloader.wait_timeouts['page'])
+        captcha = downloader._check_for_captcha()
+        if captcha and not downloader._solve_captcha():
+            downloader._record_page_load(captcha=True, solved=False)
+            return False
+        downloader._record_page_load(captcha=captcha, solved=captcha)
+        self._opened = True
+        return True
+
+    def _read_new(self) -> List[Dict[str, str]]:
+        count, hrefs = self.driver.execute_script(_NEW_ANCHORS_JS, self.anchor_index)
+        if count < self.anchor_index:
+            # The list was re-rendered; rescan it, the seen set filters duplicates
+            count, hrefs = self.driver.execute_script(_NEW_ANCHORS_JS, 0)
+        self.anchor_index = count
+
+        videos = []
+        for href in hrefs:
+            video_id = self.downloader.extract_video_id(href or '')
+            if video_id and video_id not in self.seen:
+                self.seen.add(video_id)
+                videos.append({'url': f"https://www.douyin.com/video/{video_id}", 'id': video_id})
+        return videos
+
+    def _scroll(self) -> bool:
+        """Scroll one screen further, return whether anything new loaded"""
+        last_height = self.driver.execute_script("return document.body.scrollHeight")
+        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        return bool(wait_for(any_of(anchor_count_above(self.driver, self.anchor_index),
+                                    scroll_height_changed(self.driver, last_height)),
+                             self.downloader.wait_timeouts['scroll']))
+
+    def iter_videos(self) -> Iterator[Dict[str, str]]:
+        """Yield newly discovered videos; a later call continues where this one stopped"""
+        while self._pending:
+            yield self._pending.popleft()
+        if self.exhausted:
+            return
+        if not self._opened and not self._open():
+            self.exhausted = True
+            return
+
+        empty_scrolls = 0
+        while True:
+            for video in self._read_new():
+                self.downloader.log(f"Tìm thấy video mới: {video['id']}")
+                self._pending.append(video)
+            while self._pending:
+                yield self._pending.popleft()
+            if self._scroll():
+                empty_scrolls = 0
+            else:
+                empty_scrolls += 1
+                if empty_scrolls >= self.max_empty_scrolls:  # Stop after 3 unsuccessful scrolls
+                    break
+
+        self.exhausted = True
+        self.downloader.log(f"Đã tìm thấy tổng cộng {len(self.seen)} video")
+
+
+# The paginated post list the profile page itself requests
+FEED_PATH = '/aweme/v1/web/aweme/post/'
+
+# Re-issue a feed request from inside the page so it carries the session cookies
+_FETCH_JS = """
+    var done = arguments[arguments.length - 1];
+    fetch(arguments[0], {credentials: 'include'})
+        .then(function (r) { return r.text(); })
+        .then(done)
+        .catch(function () { done(null); });
+"""
+
+
+def parse_feed_page(data: Dict) -> Optional[Tuple[List[Dict[str, str]], int, bool]]:
+    """Return (videos, max_cursor, has_more) of one aweme/post response, or None if it isn't one"""
+    if not isinstance(data, dict) or not isinstance(data.get('aweme_list'), list):
+        return None
+    videos = []
+    for aweme in data['aweme_list']:
+        video_id = str(aweme.get('aweme_id') or '')
+        if not video_id.isdigit():
+            continue
+        url_list = ((aweme.get('video') or {}).get('play_addr') or {}).get('url_list') or []
+        videos.append({
+            'url': f"https://www.douyin.com/video/{video_id}",
+            'id': video_id,
+            'play_url': url_list[0] if url_list else '',
+            'desc': aweme.get('desc') or '',
+        })
+    return videos, int(data.get('max_cursor') or 0), bool(data.get('has_more'))
+
+
+def with_cursor(feed_url: str, cursor: int) -> str:
+    parsed = urlparse(feed_url)
+    query = parse_qs(parsed.query, keep_blank_values=True)
+    query['max_cursor'] = [str(cursor)]
+    return urlunparse(parsed._replace(query=urlencode(query, doseq=True)))
+
+
+class FeedCollector:
+    """NetworkCapture listener that keeps the JSON bodies of finished feed responses"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages: Deque[Tuple[str, Dict]] = deque()
+        self._in_flight: Dict[str, str] = {}
+
+    def __call__(self, method: str, params: Dict):
+        if method == 'Network.responseReceived':
+            url = params.get('response', {}).get('url', '')
+            if FEED_PATH in url:
+                self._in_flight[params.get('requestId')] = url
+        elif method == 'Network.loadingFinished':
+            url = self._in_flight.pop(params.get('requestId'), None)
+            if url:
+                body = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': params['requestId']})
+                text = body.get('body', '')
+                if body.get('base64Encoded'):
+                    text = base64.b64decode(text).decode('utf-8', 'replace')
+                try:
+                    self.pages.append((url, json.loads(text)))
+                except ValueError:
+                    pass
+
+
+class FeedCrawler:
+    """List a profile from the aweme/post JSON the page fetches, following max_cursor
+
+    The first page is captured from the live session. Later pages are
+    re-requested from inside the page with the new cursor, and if that
+    is refused the page is scrolled so it fetches them itself. Play URLs
+    from the feed go into the downloader's media cache, so downloading
+    those videos needs no page load. Profiles whose feed can't be seen
+    fall back to the DOM ProfileCrawler on the already open page.
+    """
+
+    def __init__(self, downloader, url: str, max_empty_scrolls: int = 3):
+        self.downloader = downloader
+        self.url = url
+        self.max_empty_scrolls = max_empty_scrolls
+        self.seen: Set[str] = set()
+        self.cursor = 0
+        self.has_more = True
+        self.feed_url: Optional[str] = None
+        self.exhausted = False
+        self._opened = False
+        self._pending: Deque[Dict[str, str]] = deque()
+        self._capture: Optional[NetworkCapture] = None
+        self._collector: Optional[FeedCollector] = None
+        self._fallback: Optional[ProfileCrawler] = None
+        self._replayed: Set[str] = set()  # Fetched by us; their copies in the network log are skipped
+
+    @property
+    def driver(self):
+        return self.downloader.driver
+
+    def _feed_ready(self):
+        self._capture.poll()
+        return bool(self._collector.pages)
+
+    def _open(self) -> bool:
+        downloader = self.downloader
+        downloader._ensure_driver()
+        self._capture = downloader.new_network_capture()
+        self._collector = FeedCollector(self.driver)
+        self._capture.listeners.append(self._collector)
+        self._capture.reset()
+
+        downloader.log("Đang truy cập trang người dùng...")
+        downloader._throttle(PAGE)
+        with downloader._span(PAGE_LOAD):
+            self.driver.get(self.url)
+            wait_for(any_of(self._feed_ready, captcha_present(self.driver)), downloader.wait_timeouts['page'])
+        captcha = downloader._check_for_captcha()
+        if captcha:
+            if not downloader._solve_captcha():
+                downloader._record_page_load(captcha=True, solved=False)
+                return False
+            wait_for(self._feed_ready, downloader.wait_timeouts['page'])
+        downloader._record_page_load(captcha=captcha, solved=captcha)
+        self._opened = True
+        return True
+
+    def _add_page(self, data: Dict, feed_url: Optional[str] = None) -> bool:
+        parsed = parse_feed_page(data)
+        if parsed is None:
+            return False
+        videos, self.cursor, self.has_more = parsed
+        if feed_url:
+            self.feed_url = feed_url
+        media_cache = self.downloader.media_cache
+        for video in videos:
+            if video['id'] in self.seen:
+                continue
+            self.seen.add(video['id'])
+            if media_cache is not None and video['play_url']:
+                media_cache.put(video['id'], video['play_url'], headers={'Referer': 'https://www.douyin.com/'})
+            self._pending.append(video)
+        return True
+
+    def _drain_collector(self) -> bool:
+        self._capture.poll()
+        added = False
+        while self._collector.pages:
+            feed_url, data = self._collector.pages.popleft()
+            if feed_url in self._replayed:
+                continue
+            added = self._add_page(data, feed_url) or added
+        return added
+
+    def _fetch_next(self) -> bool:
+        """Request the page after self.cursor; return whether a valid feed page came back"""
+        if self.feed_url:
+            next_url = with_cursor(self.feed_url, self.cursor)
+            self._replayed.add(next_url)
+            self.downloader._throttle(PAGE)
+            try:
+                text = self.driver.execute_async_script(_FETCH_JS, next_url)
+                if text and self._add_page(json.loads(text)):
+                    return True
+            except Exception:
+                pass
+        # The replay was refused (e.g. signed query); let the page load more itself
+        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        wait_for(self._feed_ready, self.downloader.wait_timeouts['scroll'])
+        return self._drain_collector()
+
+    def iter_videos(self) -> Iterator[Dict[str, str]]:
+        """Yield newly discovered videos; a later call continues where this one stopped"""
+        while self._pending:
+            yield self._pending.popleft()
+        if self._fallback:
+            yield from self._fallback.iter_videos()
+            return
+        if self.exhausted:
+            return
+        if not self._opened:
+            if not self._open():
+                self.exhausted = True
+                return
+            if not self._drain_collector():
+                self.downloader.log("Không bắt được danh sách video dạng JSON, chuyển sang đọc trang")
+                self._fallback = ProfileCrawler(self.downloader, self.url, self.max_empty_scrolls)
+                self._fallback._opened = True
+                yield from self._fallback.iter_videos()
+                return
+
+        empty_fetches = 0
+        while True:
+            while self._pending:
+                video = self._pending.popleft()
+                self.downloader.log(f"Tìm thấy video mới: {video['id']}")
+                yield video
+            if not self.has_more:
+                break
+            if self._fetch_next():
+                empty_fetches = 0
+            else:
+                empty_fetches += 1
+                if empty_fetches >= self.max_empty_scrolls:
+                    break
+
+        self.exhausted = True
+        self.downloader.log(f"Đã tìm thấy tổng cộng {len(self.seen)} video")
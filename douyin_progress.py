@@ -0,0 +1,222 @@
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+# Job states (douyin_jobstore adds QUEUED and CLAIMED)
+RESOLVING = 'resolving'
+DOWNLOADING = 'downloading'
+DONE = 'done'
+FAILED = 'failed'
+
+
+@dataclass
+class JobProgress:
+    key: str
+    video_id: Optional[str] = None
+    state: str = RESOLVING
+    downloaded: int = 0
+    total: int = 0
+    speed: float = 0.0  # Bytes/s over the last speed_window seconds
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def percent(self) -> float:
+        return self.downloaded * 100.0 / self.total if self.total else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        if not self.total or self.speed <= 0:
+            return None
+        return max(0, self.total - self.downloaded) / self.speed
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, FAILED)
+
+
+@dataclass
+class ProgressSnapshot:
+    jobs: List[JobProgress]
+    taken_at: float = field(default_factory=time.time)
+
+    def _count(self, *states) -> int:
+        return sum(1 for job in self.jobs if job.state in states)
+
+    @property
+    def active(self) -> int:
+        return self._count(RESOLVING, DOWNLOADING)
+
+    @property
+    def done(self) -> int:
+        return self._count(DONE)
+
+    @property
+    def failed(self) -> int:
+        return self._count(FAILED)
+
+    @property
+    def downloaded(self) -> int:
+        return sum(job.downloaded for job in self.jobs)
+
+    @property
+    def speed(self) -> float:
+        return sum(job.speed for job in self.jobs if not job.finished)
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Seconds until the running transfers finish at the current aggregate speed"""
+        running = [job for job in self.jobs if job.state == DOWNLOADING]
+        if not running or self.speed <= 0 or any(not job.total for job in running):
+            return None
+        return sum(max(0, job.total - job.downloaded) for job in running) / self.speed
+
+    def summary(self) -> str:
+        text = f"Đang chạy {self.active} | xong {self.done} | lỗi {self.failed} | {self.speed / 1024 / 1024:.1f} MB/s"
+        if self.eta is not None:
+            text += f" | còn ~{self.eta:.0f}s"
+        return text
+
+
+class ProgressBus:
+    """Collects progress from every concurrent job and publishes coalesced snapshots
+
+    Producers call update() as often as they like (per chunk is fine,
+    it only takes a lock and stores numbers). Every `interval` seconds,
+    and only if something changed, a background thread builds one
+    ProgressSnapshot and hands it to each subscriber: callbacks run on
+    that thread, queues receive it with put_nowait. Tk consumers should
+    subscribe a queue and drain it from root.after() on the main thread.
+    """
+
+    def __init__(self, interval: float = 0.1, speed_window: float = 3.0, keep_finished: float = 60.0):
+        self.interval = interval
+        self.speed_window = speed_window
+        self.keep_finished = keep_finished  # Seconds finished jobs stay in snapshots
+        self._jobs: Dict[str, JobProgress] = {}
+        self._samples: Dict[str, Deque[Tuple[float, int]]] = {}
+        self._callbacks: List[Callable[[ProgressSnapshot], None]] = []
+        self._queues: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, callback: Optional[Callable[[ProgressSnapshot], None]] = None) -> Optional[queue.Queue]:
+        """Register a callback, or with no argument return a queue that receives every snapshot"""
+        snapshots = None
+        with self._lock:
+            if callback is not None:
+                self._callbacks.append(callback)
+            else:
+                snapshots = queue.Queue(maxsize=100)
+                self._queues.append(snapshots)
+        self.start()
+        return snapshots
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber in self._callbacks:
+                self._callbacks.remove(subscriber)
+            if subscriber in self._queues:
+                self._queues.remove(subscriber)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="douyin-progress", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self._publish()  # Final state
+
+    def update(self, key: str, downloaded: Optional[int] = None, total: Optional[int] = None,
+               state: Optional[str] = None, video_id: Optional[str] = None, error: Optional[str] = None):
+        now = time.time()
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or (job.finished and state not in (None, DONE, FAILED)):
+                job = self._jobs[key] = JobProgress(key, video_id)  # New job, or a finished one restarted
+                self._samples[key] = deque()
+            if video_id:
+                job.video_id = video_id
+            if state:
+                job.state = state
+            if error is not None:
+                job.error = error
+            if total is not None:
+                job.total = total
+            if downloaded is not None:
+                job.downloaded = downloaded
+                if job.state != DOWNLOADING and not job.finished:
+                    job.state = DOWNLOADING
+                samples = self._samples[key]
+                samples.append((now, downloaded))
+                while len(samples) > 2 and now - samples[0][0] > self.speed_window:
+                    samples.popleft()
+            job.updated_at = now
+            self._dirty = True
+
+    def finish(self, key: str, ok: bool, error: Optional[str] = None):
+        self.update(key, state=DONE if ok else FAILED, error=error)
+
+    def snapshot(self) -> ProgressSnapshot:
+        now = time.time()
+        with self._lock:
+            jobs = []
+            for key, job in list(self._jobs.items()):
+                if job.finished and now - job.updated_at > self.keep_finished:
+                    del self._jobs[key]
+                    self._samples.pop(key, None)
+                    continue
+                samples = self._samples.get(key)
+                speed = 0.0
+                if not job.finished and samples and len(samples) > 1:
+                    # Count the idle time since the last chunk, so a stalled transfer decays to 0
+                    elapsed = max(now, samples[-1][0]) - samples[0][0]
+                    if elapsed > 0:
+                        speed = max(0.0, (samples[-1][1] - samples[0][1]) / elapsed)
+                jobs.append(replace(job, speed=speed))
+        return ProgressSnapshot(jobs, now)
+
+    def _publish(self):
+        with self._lock:
+            self._dirty = False
+            callbacks = list(self._callbacks)
+            queues = list(self._queues)
+        if not callbacks and not queues:
+            return
+        snapshot = self.snapshot()
+        for callback in callbacks:
+            try:
+                callback(snapshot)
+            except Exception:
+                pass
+        for snapshots in queues:
+            while True:
+                try:
+                    snapshots.put_nowait(snapshot)
+                    break
+                except queue.Full:
+                    pass
+                # Consumer fell behind; it only needs the latest one, so drop the oldest
+                try:
+                    snapshots.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            with self._lock:
+                dirty = self._dirty or any(not job.finished for job in self._jobs.values())
+            if dirty:
+                self._publish()
@@ -0,0 +1,190 @@
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+# Host classes, each with its own bucket
+PAGE = 'page'        # www.douyin.com pages and APIs (Selenium)
+MEDIA = 'media'      # CDN hosts serving the files
+CAPTCHA = 'captcha'  # Capsolver API
+
+# host class -> (requests per second, burst)
+DEFAULT_RATES: Dict[str, Tuple[float, float]] = {
+    PAGE: (1.0, 3),
+    MEDIA: (8.0, 16),
+    CAPTCHA: (0.5, 1),
+}
+
+# Statuses that mean "slow down"
+THROTTLE_STATUSES = (403, 429)
+
+
+def host_class(url_or_class: str) -> str:
+    if url_or_class in DEFAULT_RATES:
+        return url_or_class
+    host = urlparse(url_or_class).hostname or ''
+    if 'capsolver' in host:
+        return CAPTCHA
+    if host.endswith('douyin.com') and 'douyinvod' not in host:
+        return PAGE
+    return MEDIA
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date), None if absent or unreadable"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    from email.utils import parsedate_to_datetime  # Rare; keeps email out of the import of douyin_transfer
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Exponential backoff with full jitter for the given 1-based retry attempt"""
+    return random.uniform(0, min(cap, base * 2 ** max(0, attempt - 1)))
+
+
+class TokenBucket:
+    """Token bucket whose rate is adapted AIMD-style from server feedback"""
+
+    def __init__(self, rate: float, burst: float, min_rate: float = 0.05, max_rate: Optional[float] = None):
+        self.rate = rate
+        self.initial_rate = rate
+        self.burst = max(1.0, float(burst))
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate * 4
+        self.tokens = self.burst
+        self.penalties = 0
+        self.strikes = 0  # Consecutive penalties, drives the cool-down length
+        self.successes = 0  # Since the last rate change
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """Take one token if there is one now and return 0, otherwise return the seconds until there may be"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now >= self.blocked_until and self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return max(self.blocked_until - now, (1 - self.tokens) / self.rate, 0.001)
+
+    def acquire(self, timeout: Optional[float] = None) -> float:
+        """Take one token, sleeping as needed; return the seconds waited (-1 on timeout)"""
+        start = time.monotonic()
+        while True:
+            delay = self.try_acquire()
+            waited = time.monotonic() - start
+            if not delay:
+                return waited
+            if timeout is not None and waited + delay > timeout:
+                return -1.0
+            time.sleep(min(delay, 1.0))
+
+    def penalize(self, decrease: float, base_backoff: float, max_backoff: float,
+                 min_pause: Optional[float] = None) -> float:
+        """Cut the rate and pause the bucket (at least `min_pause`, up to max_backoff); return the pause length"""
+        with self._lock:
+            self.penalties += 1
+            self.strikes += 1
+            self.successes = 0
+            self.rate = max(self.min_rate, self.rate * decrease)
+            self.tokens = 0
+            pause = backoff_delay(self.strikes, base_backoff, max_backoff)
+            if min_pause:
+                pause = min(max_backoff, max(pause, min_pause))
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+            return pause
+
+    def reward(self, increase: float, increase_after: int):
+        """Count a success; every `increase_after` in a row raise the rate additively"""
+        with self._lock:
+            self.strikes = 0
+            self.successes += 1
+            if self.successes >= increase_after:
+                self.successes = 0
+                self.rate = min(self.max_rate, self.rate + increase * self.initial_rate)
+
+
+class RateLimiter:
+    """Per-host-class pacing shared by every downloader in the process
+
+        limiter.acquire(url)                 # before the request (try_acquire() from asyncio code)
+        limiter.feedback(url, status=429)    # after it (or captcha=True / ok=True)
+
+    Throttling signals (403/429, a captcha wall) halve the class's rate
+    and pause it for an exponentially growing, jittered interval, or for
+    as long as the server's Retry-After asks if that is longer; every
+    `increase_after` successes in a row give back `increase` x the
+    starting rate, up to 4x the starting rate.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, Tuple[float, float]]] = None, decrease: float = 0.5,
+                 increase: float = 0.1, increase_after: int = 10, base_backoff: float = 2.0,
+                 max_backoff: float = 120.0, log_callback=None):
+        self.decrease = decrease
+        self.increase = increase
+        self.increase_after = increase_after
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.log_callback = log_callback
+        self.buckets: Dict[str, TokenBucket] = {
+            name: TokenBucket(rate, burst) for name, (rate, burst) in dict(DEFAULT_RATES, **(rates or {})).items()
+        }
+
+    def log(self, message: str):
+        if self.log_callback:
+            self.log_callback(message)
+        else:
+            print(message)
+
+    def acquire(self, url_or_class: str, timeout: Optional[float] = None) -> float:
+        return self.buckets[host_class(url_or_class)].acquire(timeout)
+
+    def try_acquire(self, url_or_class: str) -> float:
+        """Non-blocking acquire for event loops: 0 once a token is taken, else the seconds to wait before retrying"""
+        return self.buckets[host_class(url_or_class)].try_acquire()
+
+    def feedback(self, url_or_class: str, status: Optional[int] = None, captcha: bool = False,
+                 ok: Optional[bool] = None, retry_after: Optional[float] = None):
+        """Report the outcome of a request; `ok` defaults to "2xx/3xx status and no captcha" """
+        name = host_class(url_or_class)
+        bucket = self.buckets[name]
+        if captcha or status in THROTTLE_STATUSES:
+            pause = bucket.penalize(self.decrease, self.base_backoff, self.max_backoff, retry_after)
+            reason = 'captcha' if captcha else f'HTTP {status}'
+            self.log(f"Bị giới hạn ({name}, {reason}): giảm tốc độ xuống {bucket.rate:.2f} req/s, "
+                     f"tạm dừng {pause:.1f}s")
+        elif ok or (ok is None and status is not None and status < 400):
+            bucket.reward(self.increase, self.increase_after)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        now = time.monotonic()
+        result = {}
+        for name, bucket in self.buckets.items():
+            with bucket._lock:
+                bucket._refill(now)
+                result[name] = {
+                    'rate': round(bucket.rate, 3),
+                    'burst': bucket.burst,
+                    'tokens': round(bucket.tokens, 2),
+                    'penalties': bucket.penalties,
+                    'paused_for': round(max(0.0, bucket.blocked_until - now), 1),
+                }
+        return result
+
+    def summary(self) -> str:
+        parts = [f"{name} {s['rate']:.2f} req/s ({s['penalties']} lần bị chặn)" for name, s in self.snapshot().items()]
+        return "Tốc độ hiện tại: " + ", ".join(parts)
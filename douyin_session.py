@@ -0,0 +1,251 @@
+import json
+import os
+import threading
+import time
+import uuid
+import weakref
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+DEFAULT_SESSION_PATH = os.path.join(os.path.expanduser('~'), '.douyin_downloader', 'sessions.json')
+
+# Cookies restored into new drivers and the HTTP session; CDN media hosts don't need them
+_COOKIE_DOMAINS = ('douyin.com', 'bytedance.com', 'byteimg.com', 'zijieapi.com')
+
+_READ_STORAGE_JS = """
+    var items = {};
+    for (var i = 0; i < window.localStorage.length; i++) {
+        var key = window.localStorage.key(i);
+        items[key] = window.localStorage.getItem(key);
+    }
+    return items;
+"""
+
+# Runs before any page script, so the site sees its saved localStorage on the first load
+_RESTORE_STORAGE_JS = """
+(function () {
+    if (location.hostname.slice(-10) !== 'douyin.com') { return; }
+    var items = %s;
+    try {
+        for (var key in items) {
+            if (window.localStorage.getItem(key) === null) { window.localStorage.setItem(key, items[key]); }
+        }
+    } catch (e) {}
+})();
+"""
+
+
+@dataclass
+class BrowserSession:
+    session_id: str
+    cookies: List[Dict] = field(default_factory=list)
+    local_storage: Dict[str, str] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    saved_at: float = 0.0
+    pages: int = 0
+    captchas: int = 0
+    solves: int = 0
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    @property
+    def captcha_rate(self) -> float:
+        return self.captchas / self.pages if self.pages else 0.0
+
+
+class SessionStore:
+    """Keep browser sessions (cookies + localStorage) alive across drivers
+
+    A session is captured from a driver after a captcha solve or a clean
+    page load, and restored into every new driver and into the HTTP
+    session, so one solve covers many page loads. Sessions older than
+    `max_age`, or challenged on more than `max_captcha_rate` of their
+    pages, are rotated out. Safe to share between downloaders.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_SESSION_PATH, max_age: float = 12 * 3600,
+                 max_captcha_rate: float = 0.3, min_pages: int = 5, max_sessions: int = 5,
+                 capture_interval: float = 300, log_callback=None):
+        self.path = path  # None keeps sessions in memory only
+        self.max_age = max_age
+        self.max_captcha_rate = max_captcha_rate
+        self.min_pages = min_pages  # Pages to see before judging a session by its captcha rate
+        self.max_sessions = max_sessions
+        self.capture_interval = capture_interval  # Min seconds between captures after plain page loads
+        self.log_callback = log_callback
+        self.sessions: Dict[str, BrowserSession] = {}
+        self._lock = threading.RLock()
+        # driver -> (session_id, storage script identifier); drivers are shared through DriverPool
+        self._drivers = weakref.WeakKeyDictionary()
+        self._load()
+
+    def log(self, message: str):
+        if self.log_callback:
+            self.log_callback(message)
+        else:
+            print(message)
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for item in data.get('sessions', []):
+                session = BrowserSession(**item)
+                self.sessions[session.session_id] = session
+        except (OSError, ValueError, TypeError):
+            self.sessions = {}
+        self._prune()
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {'sessions': [asdict(s) for s in self.sessions.values()]}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"  # Worker processes may save the same file
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def _is_healthy(self, session: BrowserSession) -> bool:
+        if session.age > self.max_age:
+            return False
+        return session.pages < self.min_pages or session.captcha_rate <= self.max_captcha_rate
+
+    def _prune(self):
+        with self._lock:
+            for session_id, session in list(self.sessions.items()):
+                if not self._is_healthy(session):
+                    del self.sessions[session_id]
+            # Drop the oldest beyond the cap
+            for session in sorted(self.sessions.values(), key=lambda s: s.created_at)[:-self.max_sessions]:
+                del self.sessions[session.session_id]
+
+    def best(self) -> Optional[BrowserSession]:
+        """Healthy session with the lowest captcha rate, newest first on ties"""
+        with self._lock:
+            healthy = [s for s in self.sessions.values() if self._is_healthy(s) and s.cookies]
+            if not healthy:
+                return None
+            return min(healthy, key=lambda s: (s.captcha_rate, -s.created_at))
+
+    def session_for(self, driver) -> Optional[BrowserSession]:
+        with self._lock:
+            session_id = self._drivers.get(driver, (None, None))[0]
+            return self.sessions.get(session_id)
+
+    def restore(self, driver, session: Optional[BrowserSession] = None) -> Optional[BrowserSession]:
+        """Load a saved session into a fresh driver through CDP; no page load needed"""
+        session = session or self.best()
+        if session is None:
+            return None
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            cookies = [self._cdp_cookie(c) for c in session.cookies]
+            driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+            script_id = None
+            if session.local_storage:
+                script = _RESTORE_STORAGE_JS % json.dumps(session.local_storage)
+                script_id = driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument',
+                                                   {'source': script}).get('identifier')
+        except Exception as e:
+            self.log(f"Không khôi phục được phiên đăng nhập: {str(e)}")
+            return None
+        with self._lock:
+            self._drivers[driver] = (session.session_id, script_id)
+        return session
+
+    def capture(self, driver, force: bool = False) -> Optional[BrowserSession]:
+        """Save the driver's cookies and localStorage into its session (a new one if it has none)"""
+        with self._lock:
+            session_id, script_id = self._drivers.get(driver, (None, None))
+            session = self.sessions.get(session_id)
+            if session and not force and time.time() - session.saved_at < self.capture_interval:
+                return session
+        try:
+            cookies = driver.execute_cdp_cmd('Network.getAllCookies', {}).get('cookies', [])
+            local_storage = driver.execute_script(_READ_STORAGE_JS) or {}
+        except Exception:
+            return None
+        cookies = [c for c in cookies if c.get('domain', '').lstrip('.').endswith(_COOKIE_DOMAINS)]
+        if not cookies:
+            return None
+        with self._lock:
+            if session is None:
+                session = BrowserSession(session_id=uuid.uuid4().hex[:12])
+                self.sessions[session.session_id] = session
+                self._drivers[driver] = (session.session_id, script_id)
+            session.cookies = cookies
+            session.local_storage = {k: v for k, v in local_storage.items() if isinstance(v, str)}
+            session.saved_at = time.time()
+            self._prune()
+        self.save()
+        return session
+
+    def record_page(self, driver, captcha: bool = False, solved: bool = False):
+        """Count one page load on the driver's session"""
+        with self._lock:
+            session = self.session_for(driver)
+            if session is None:
+                return
+            session.pages += 1
+            if captcha:
+                session.captchas += 1
+            if solved:
+                session.solves += 1
+
+    def should_rotate(self, driver) -> bool:
+        session = self.session_for(driver)
+        return session is not None and not self._is_healthy(session)
+
+    def rotate(self, driver) -> Optional[BrowserSession]:
+        """Retire the driver's session, clear it from the browser and load the next best one"""
+        with self._lock:
+            session_id, script_id = self._drivers.pop(driver, (None, None))
+            retired = self.sessions.pop(session_id, None)
+        if retired:
+            self.log(f"Đổi phiên trình duyệt (tỉ lệ captcha {retired.captcha_rate:.0%}, "
+                     f"{retired.age / 60:.0f} phút)")
+        try:
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            if script_id:
+                driver.execute_cdp_cmd('Page.removeScriptToEvaluateOnNewDocument', {'identifier': script_id})
+            driver.execute_script("try { window.localStorage.clear(); } catch (e) {}")
+        except Exception:
+            pass
+        self.save()
+        return self.restore(driver)
+
+    def apply_to_http(self, http_session, session: Optional[BrowserSession] = None):
+        """Copy a session's cookies into a requests.Session cookie jar"""
+        session = session or self.best()
+        if session is None:
+            return
+        for cookie in session.cookies:
+            http_session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''),
+                                     path=cookie.get('path', '/'))
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            sessions = list(self.sessions.values())
+        pages = sum(s.pages for s in sessions)
+        return {
+            'sessions': len(sessions),
+            'pages': pages,
+            'captchas': sum(s.captchas for s in sessions),
+            'solves': sum(s.solves for s in sessions),
+            'captcha_rate': sum(s.captchas for s in sessions) / pages if pages else 0.0,
+        }
+
+    @staticmethod
+    def _cdp_cookie(cookie: Dict) -> Dict:
+        """Network.getAllCookies output -> Network.setCookies input"""
+        keys = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expires')
+        result = {k: cookie[k] for k in keys if k in cookie}
+        if result.get('expires', 0) <= 0:
+            result.pop('expires', None)  # Session cookie
+        return result
@@ -0,0 +1,369 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Union
+
+from douyin_ratelimit import parse_retry_after
+from douyin_writer import DEFAULT_BUFFER_SIZE, MediaWriter
+
+if TYPE_CHECKING:
+    import requests  # Imported on first use in _client, keeps `import douyin_transfer` light
+
+CHUNK_SIZE = DEFAULT_BUFFER_SIZE  # Read/write size; large so per-chunk Python work stays negligible
+PROGRESS_INTERVAL = 0.1  # Min seconds between progress callbacks
+MIN_SEGMENT_SIZE = 1024 * 1024  # Don't split below 1MB per segment
+STATE_SAVE_INTERVAL = 1.0  # Seconds between sidecar updates while downloading
+
+# Either one number or a (connect, read) pair, as accepted by requests
+Timeout = Union[float, Tuple[float, float]]
+
+
+class TransferError(Exception):
+    pass
+
+
+class RemoteChangedError(TransferError):
+    """The server no longer serves the file a .part was started from"""
+
+
+class MediaUrlExpiredError(TransferError):
+    """The CDN rejected the signed media URL (403/410); it has to be resolved again"""
+
+
+class ThrottledError(TransferError):
+    """The CDN answered 429 Too Many Requests; retry_after is its Retry-After in seconds, if it sent one"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class TransferResult:
+    size: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    sha256: Optional[str] = None
+
+    @property
+    def validator(self) -> Optional[str]:
+        return self.etag or self.last_modified
+
+
+class _Progress:
+    """Thread-safe byte counter shared by all segments of one transfer"""
+
+    def __init__(self, total: int, callback: Optional[Callable[[float], None]], downloaded: int = 0,
+                 bytes_callback: Optional[Callable[[int, int], None]] = None):
+        self.total = total
+        self.callback = callback
+        self.bytes_callback = bytes_callback  # (downloaded, total) after every chunk, e.g. ProgressBus
+        self.downloaded = downloaded
+        self._lock = threading.Lock()
+        self._last_report = 0.0
+
+    def add(self, size: int):
+        with self._lock:
+            self.downloaded += size
+            downloaded = self.downloaded
+            now = time.monotonic()
+            due = now - self._last_report >= PROGRESS_INTERVAL or downloaded >= self.total
+            if due:
+                self._last_report = now
+        if self.bytes_callback:
+            self.bytes_callback(downloaded, self.total)
+        if due and self.total and self.callback:
+            self.callback((downloaded / self.total) * 100)
+
+
+class ResumeState:
+    """Sidecar (<file>.part.json) describing what is already in the .part file
+
+    segments is a list of [start, end, done] where done counts the bytes
+    already written from start.
+    """
+
+    def __init__(self, path: str, url: str, remote: Dict, segments: List[List[int]]):
+        self.path = path
+        self.url = url
+        self.etag = remote.get('etag')
+        self.last_modified = remote.get('last_modified')
+        self.content_length = remote['size']
+        self.segments = segments
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+
+    @classmethod
+    def load(cls, path: str, url: str, remote: Dict) -> Optional['ResumeState']:
+        """Return the saved state if it still describes the same remote file"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('content_length') != remote['size']:
+            return None
+        # Signed CDN URLs change between resolves, so trust the validators rather than the URL
+        for key in ('etag', 'last_modified'):
+            if data.get(key) and remote.get(key) and data[key] != remote[key]:
+                return None
+        state = cls(path, url, remote, data.get('segments') or [])
+        state.etag = state.etag or data.get('etag')
+        state.last_modified = state.last_modified or data.get('last_modified')
+        return state
+
+    @property
+    def bytes_completed(self) -> int:
+        return sum(done for _, _, done in self.segments)
+
+    def if_range(self) -> Optional[str]:
+        return self.etag or self.last_modified
+
+    def advance(self, index: int, size: int):
+        with self._lock:
+            self.segments[index][2] += size
+            due = time.time() - self._last_save >= STATE_SAVE_INTERVAL
+        if due:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            self._last_save = time.time()
+            data = {
+                'url': self.url,
+                'etag': self.etag,
+                'last_modified': self.last_modified,
+                'content_length': self.content_length,
+                'bytes_completed': self.bytes_completed,
+                'segments': [list(segment) for segment in self.segments],
+            }
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def _client(session: Optional['requests.Session']):
+    if session is not None:
+        return session
+    import requests
+    return requests
+
+
+def _raise_for_status(r: 'requests.Response'):
+    if r.status_code in (403, 410):
+        raise MediaUrlExpiredError(f"URL video đã hết hạn hoặc bị từ chối ({r.status_code})")
+    if r.status_code == 429:
+        raise ThrottledError("Máy chủ video đang giới hạn tốc độ (429)",
+                             parse_retry_after(r.headers.get('retry-after')))
+    r.raise_for_status()
+
+
+def part_path_for(output_path: str) -> str:
+    return output_path + '.part'
+
+
+def remote_info(status_code: int, headers) -> Dict:
+    """Size, Range support and validators from the response to a `Range: bytes=0-0` probe"""
+    remote = {
+        'size': int(headers.get('content-length', 0)),
+        'ranges': False,
+        'etag': headers.get('etag'),
+        'last_modified': headers.get('last-modified'),
+    }
+    if status_code == 206:
+        # Content-Range: bytes 0-0/12345
+        match = re.search(r'/(\d+)$', headers.get('content-range', ''))
+        if match:
+            remote['size'] = int(match.group(1))
+            remote['ranges'] = True
+    return remote
+
+
+def probe(url: str, headers: Dict[str, str], timeout: Timeout = 30,
+          session: Optional['requests.Session'] = None) -> Dict:
+    """Return size, Range support and validators (ETag/Last-Modified) of a remote file"""
+    probe_headers = dict(headers, Range='bytes=0-0')
+    with _client(session).get(url, headers=probe_headers, stream=True, timeout=timeout) as r:
+        _raise_for_status(r)
+        if r.status_code == 206:
+            r.content  # Read the 1-byte body, otherwise the keep-alive connection is dropped instead of pooled
+        return remote_info(r.status_code, r.headers)
+
+
+def is_complete(output_path: str, remote: Dict) -> bool:
+    """Whether output_path has exactly the probed remote size (a finished file, not a cut-off one)"""
+    try:
+        return bool(remote['size']) and os.path.getsize(output_path) == remote['size']
+    except OSError:
+        return False
+
+
+def split_ranges(total: int, segments: int, min_segment_size: int = MIN_SEGMENT_SIZE) -> List[Tuple[int, int]]:
+    """Split [0, total) into at most `segments` inclusive byte ranges"""
+    segments = max(1, min(segments, total // max(1, min_segment_size)))
+    size = total // segments
+    ranges = []
+    for i in range(segments):
+        start = i * size
+        end = total - 1 if i == segments - 1 else start + size - 1
+        ranges.append((start, end))
+    return ranges
+
+
+def download_single(url: str, output_path: str, headers: Dict[str, str], timeout: Timeout = 30,
+                    progress_callback: Optional[Callable[[float], None]] = None,
+                    min_size: int = 0, session: Optional['requests.Session'] = None,
+                    chunk_size: int = CHUNK_SIZE,
+                    bytes_callback: Optional[Callable[[int, int], None]] = None,
+                    before_request: Optional[Callable[[], None]] = None) -> TransferResult:
+    """Stream the whole file over one connection into <output_path>.part, then rename it"""
+    stream_headers = dict(headers, Range='bytes=0-')  # Request full file
+    if before_request:
+        before_request()
+    with _client(session).get(url, headers=stream_headers, stream=True, timeout=timeout) as r:
+        _raise_for_status(r)
+        total = int(r.headers.get('content-length', 0))
+        if total < min_size:
+            raise TransferError("File size quá nhỏ, có thể không phải video")
+
+        progress = _Progress(total, progress_callback, bytes_callback=bytes_callback)
+        with MediaWriter(output_path, total) as writer:
+            for chunk in r.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    writer.write(chunk)
+                    progress.add(len(chunk))
+            if total and progress.downloaded != total:
+                raise TransferError(f"Tải thiếu dữ liệu ({progress.downloaded}/{total} bytes)")
+            size, sha256 = writer.commit()
+        return TransferResult(size, r.headers.get('etag'), r.headers.get('last-modified'), sha256)
+
+
+def _download_range(url: str, writer: MediaWriter, headers: Dict[str, str], state: ResumeState,
+                    index: int, timeout: Timeout, progress: _Progress, session: Optional['requests.Session'],
+                    chunk_size: int = CHUNK_SIZE, abort: Optional[threading.Event] = None,
+                    before_request: Optional[Callable[[], None]] = None):
+    """Fetch the rest of one segment; returns early, leaving it unfinished, once `abort` is set"""
+    start, end, done = state.segments[index]
+    if start + done > end:
+        return
+    if before_request:
+        before_request()
+    if abort is not None and abort.is_set():
+        return
+    range_headers = dict(headers, Range=f'bytes={start + done}-{end}')
+    if done and state.if_range():
+        # Only continue if the file is still the one we started on
+        range_headers['If-Range'] = state.if_range()
+    with _client(session).get(url, headers=range_headers, stream=True, timeout=timeout) as r:
+        _raise_for_status(r)
+        if r.status_code != 206:
+            raise RemoteChangedError(f"Máy chủ không trả về đoạn yêu cầu ({r.status_code})")
+        expected = end - start - done + 1
+        received = 0
+        for chunk in r.iter_content(chunk_size=chunk_size):
+            if abort is not None and abort.is_set():
+                return  # Another segment failed; closing the response drops the connection
+            if chunk:
+                chunk = chunk[:expected - received]
+                writer.write_at(start + done + received, chunk)
+                received += len(chunk)
+                state.advance(index, len(chunk))
+                progress.add(len(chunk))
+                if received >= expected:
+                    break
+        if received != expected:
+            raise TransferError(f"Đoạn {start}-{end} bị thiếu dữ liệu ({received}/{expected} bytes)")
+
+
+def download_file(url: str, output_path: str, headers: Dict[str, str], segments: int = 1,
+                  timeout: Timeout = 30, progress_callback: Optional[Callable[[float], None]] = None,
+                  min_size: int = 0, min_segment_size: int = MIN_SEGMENT_SIZE,
+                  session: Optional['requests.Session'] = None, chunk_size: int = CHUNK_SIZE,
+                  bytes_callback: Optional[Callable[[int, int], None]] = None,
+                  keep_existing: bool = False,
+                  before_request: Optional[Callable[[], None]] = None) -> TransferResult:
+    """Download into <output_path>.part and rename on success, resuming a previous .part if possible
+
+    With segments > 1 the file is fetched as parallel byte ranges. Servers
+    that ignore Range get a plain single stream (which cannot be resumed).
+    The .part is preallocated to the full size and hashed while it is
+    written; the result carries the SHA-256.
+
+    With keep_existing, an output_path already on disk with exactly the
+    remote size is kept as it is (the result has no SHA-256 then).
+
+    before_request is called ahead of every HTTP request (the probe, the
+    single stream or each range), e.g. to take a rate limiter token.
+    """
+    part_path = part_path_for(output_path)
+    state_path = part_path + '.json'
+
+    if before_request:
+        before_request()
+    remote = probe(url, headers, timeout, session)
+    if keep_existing and remote['size'] >= min_size and is_complete(output_path, remote):
+        return TransferResult(remote['size'], remote['etag'], remote['last_modified'])
+    if not remote['ranges'] or not remote['size']:
+        return download_single(url, output_path, headers, timeout, progress_callback, min_size, session, chunk_size,
+                               bytes_callback, before_request)
+    total = remote['size']
+    if total < min_size:
+        raise TransferError("File size quá nhỏ, có thể không phải video")
+
+    state = None
+    if os.path.exists(part_path) and os.path.getsize(part_path) == total:
+        state = ResumeState.load(state_path, url, remote)
+    resume = bool(state and state.segments)
+    if resume:
+        state.url = url
+    else:
+        state = ResumeState(state_path, url, remote,
+                             [[start, end, 0] for start, end in split_ranges(total, segments, min_segment_size)])
+    # Preallocated to the full size, so every segment writes at its own offset
+    writer = MediaWriter(output_path, total, resume=resume)
+    state.save()
+
+    progress = _Progress(total, progress_callback, state.bytes_completed, bytes_callback)
+    try:
+        pending = [i for i, (start, end, done) in enumerate(state.segments) if start + done <= end]
+        if len(pending) == 1:
+            _download_range(url, writer, headers, state, pending[0], timeout, progress, session, chunk_size,
+                            before_request=before_request)
+        elif pending:
+            abort = threading.Event()  # Set on the first failure so the other segments stop at their next chunk
+            with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+                futures = [pool.submit(_download_range, url, writer, headers, state, i, timeout, progress,
+                                       session, chunk_size, abort, before_request)
+                           for i in pending]
+                try:
+                    for future in as_completed(futures):
+                        future.result()
+                except BaseException:
+                    abort.set()
+                    raise
+    except RemoteChangedError:
+        # The remote file changed under us; start from scratch next time
+        writer.close()
+        state.remove()
+        raise
+    except BaseException:
+        writer.close()
+        raise
+    finally:
+        if os.path.exists(state.path):
+            state.save()
+
+    size, sha256 = writer.commit()
+    state.remove()
+    return TransferResult(size, remote['etag'], remote['last_modified'], sha256)
@@ -0,0 +1,197 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+from urllib.parse import urljoin
+
+if TYPE_CHECKING:
+    import requests
+
+VIDEO_URL = 'https://www.douyin.com/video/{}'
+USER_URL = 'https://www.douyin.com/user/{}'
+
+# Kinds of pasted links
+VIDEO = 'video'
+PROFILE = 'profile'
+SHORT = 'short'      # v.douyin.com code whose target is not known yet
+UNKNOWN = 'unknown'
+
+_URL_IN_TEXT = re.compile(r'https?://[^\s"\'<>]+')
+_VIDEO_PATH = re.compile(r'/(?:share/)?video/(\d+)')
+_QUERY_ID = re.compile(r'[?&#](?:modal_id|vid|aweme_id)=(\d+)')
+_USER_PATH = re.compile(r'/(?:share/)?user/([\w.-]+)')
+_SHORT_LINK = re.compile(r'(?:https?://)?v\.douyin\.com/([\w-]+)')
+_LONG_NUMBER = re.compile(r'(\d{10,20})')
+
+# v.douyin.com code -> canonical target URL, shared by every normalizer in the process
+_expanded: Dict[str, str] = {}
+_expanded_lock = threading.Lock()
+
+
+@dataclass
+class NormalizedUrl:
+    raw: str
+    url: str
+    kind: str
+    video_id: Optional[str] = None
+
+
+def find_url(text: str) -> str:
+    """The first http(s) URL in a line of share text ("7.94 复制打开抖音... https://v.douyin.com/xxx/"), else the line"""
+    match = _URL_IN_TEXT.search(text)
+    return match.group(0) if match else text.strip()
+
+
+def short_code(url: str) -> Optional[str]:
+    match = _SHORT_LINK.search(url)
+    return match.group(1) if match else None
+
+
+def video_id_from_url(url: str) -> Optional[str]:
+    """Numeric video ID from a page URL (/video/<id>, ?modal_id=, ?vid=), without any network access"""
+    match = _VIDEO_PATH.search(url) or _QUERY_ID.search(url)
+    return match.group(1) if match else None
+
+
+def _canonical(url: str) -> Optional[NormalizedUrl]:
+    """Classify a URL whose target is known from the text alone"""
+    video_id = video_id_from_url(url)
+    if video_id:
+        return NormalizedUrl(url, VIDEO_URL.format(video_id), VIDEO, video_id)
+    match = _USER_PATH.search(url)
+    if match:
+        return NormalizedUrl(url, USER_URL.format(match.group(1)), PROFILE)
+    return None
+
+
+def standardize_url(url: str) -> str:
+    """https://www.douyin.com/video/<id> for anything carrying a video ID; other URLs come back unchanged
+
+    Short links are only rewritten if they were expanded before (see UrlNormalizer).
+    """
+    url = find_url(url)
+    normalized = _canonical(url)
+    if normalized:
+        return normalized.url
+    code = short_code(url)
+    if code:
+        with _expanded_lock:
+            return _expanded.get(code, url)
+    match = _LONG_NUMBER.search(url)
+    if match:
+        return VIDEO_URL.format(match.group(1))
+    return url
+
+
+class UrlNormalizer:
+    """Turn pasted lines into canonical video/profile URLs, expanding v.douyin.com links over HTTP
+
+        normalizer = UrlNormalizer(session)
+        for item in normalizer.normalize_many(clipboard_text.splitlines()):
+            item.url, item.video_id
+
+    Everything that can be decided from the text uses precompiled
+    patterns only. Short links are resolved by following their redirects
+    (not downloading the page) on `workers` threads sharing the pooled
+    session; the code -> URL results are memoized for the process.
+    """
+
+    def __init__(self, session: Optional['requests.Session'] = None, workers: int = 8, timeout: float = 10.0,
+                 max_redirects: int = 5):
+        self._session = session
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+
+    @property
+    def session(self) -> 'requests.Session':
+        if self._session is None:
+            from douyin_http import create_session
+            self._session = create_session()
+        return self._session
+
+    def expand(self, url_or_code: str) -> Optional[str]:
+        """Canonical URL behind a v.douyin.com link (memoized), None if it leads nowhere known"""
+        code = short_code(url_or_code) or url_or_code
+        with _expanded_lock:
+            if code in _expanded:
+                return _expanded[code]
+        url = f"https://v.douyin.com/{code}/"
+        target = None
+        try:
+            for _ in range(self.max_redirects):
+                with self.session.get(url, allow_redirects=False, stream=True, timeout=self.timeout) as r:
+                    location = r.headers.get('location')
+                if not location:
+                    break
+                url = urljoin(url, location)
+                normalized = _canonical(url)
+                if normalized:
+                    target = normalized.url
+                    break
+        except Exception:
+            return None  # Network errors are not cached; the next call tries again
+        if target:
+            with _expanded_lock:
+                _expanded[code] = target
+        return target
+
+    def video_id(self, url: str) -> Optional[str]:
+        """Numeric video ID of a page or short link (short links may need one round trip)"""
+        video_id = video_id_from_url(url)
+        if video_id:
+            return video_id
+        code = short_code(url)
+        if code:
+            target = self.expand(code)
+            return video_id_from_url(target) if target else None
+        return None
+
+    def normalize(self, line: str, expand: bool = True) -> Optional[NormalizedUrl]:
+        return next(iter(self.normalize_many([line], expand)), None)
+
+    def normalize_many(self, lines: Iterable[str], expand: bool = True) -> List[NormalizedUrl]:
+        """Normalize and de-duplicate lines in order; blank lines and # comments are skipped
+
+        With expand=False short links are kept as SHORT entries instead of being looked up.
+        """
+        items: List[NormalizedUrl] = []
+        pending: Dict[str, List[NormalizedUrl]] = {}
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            url = find_url(line)
+            item = _canonical(url)
+            if item is None:
+                code = short_code(url)
+                if code:
+                    item = NormalizedUrl(url, url, SHORT)
+                    pending.setdefault(code, []).append(item)
+                else:
+                    match = _LONG_NUMBER.search(url)
+                    if match:
+                        item = NormalizedUrl(url, VIDEO_URL.format(match.group(1)), VIDEO, match.group(1))
+                    else:
+                        item = NormalizedUrl(url, url, UNKNOWN)
+            item.raw = line
+            items.append(item)
+
+        if pending and expand:
+            codes = list(pending)
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(codes))) as pool:
+                for code, target in zip(codes, pool.map(self.expand, codes)):
+                    if target is None:
+                        continue
+                    resolved = _canonical(target)
+                    for item in pending[code]:
+                        item.url, item.kind, item.video_id = resolved.url, resolved.kind, resolved.video_id
+
+        seen = set()
+        unique = []
+        for item in items:
+            if item.url not in seen:
+                seen.add(item.url)
+                unique.append(item)
+        return unique
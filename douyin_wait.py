@@ -0,0 +1,111 @@
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Per-condition timeouts in seconds; DouyinDownloader(wait_timeouts=...) overrides single keys
+DEFAULT_TIMEOUTS = {
+    'page': 10,      # First sign of life after driver.get (content, media or captcha)
+    'media': 8,      # Media request / <video> src after the page is up
+    'scroll': 3,     # New anchors or a taller page after one scroll
+    'captcha': 5,    # Slider gone after submitting a captcha solution
+}
+
+_MEDIA_ENTRIES_JS = """
+    var performance = window.performance || {};
+    if (!performance.getEntriesByType) { return []; }
+    return performance.getEntriesByType('resource').map(function (e) { return e.name; });
+"""
+
+_VIDEO_SRC_JS = """
+    var video = document.querySelector('video');
+    if (!video) { return null; }
+    var source = video.querySelector('source');
+    return video.currentSrc || video.src || (source && source.src) || null;
+"""
+
+_ANCHOR_COUNT_JS = "return document.querySelectorAll(\"a[href*='/video/']\").length;"
+
+_CAPTCHA_JS = "return !!document.querySelector(\"div[class*='captcha'], div[class*='verify']\");"
+
+
+def wait_for(condition: Callable[[], Any], timeout: float, poll: float = 0.05,
+             max_poll: float = 0.5, backoff: float = 1.5) -> Any:
+    """Poll `condition` until it returns something truthy and return that value
+
+    The poll interval starts short and grows by `backoff` up to `max_poll`,
+    so fast pages are picked up quickly without hammering slow ones.
+    Returns None on timeout. Exceptions from the condition count as "not yet".
+    """
+    deadline = time.time() + timeout
+    while True:
+        try:
+            result = condition()
+            if result:
+                return result
+        except Exception:
+            pass
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None
+        time.sleep(min(poll, remaining))
+        poll = min(poll * backoff, max_poll)
+
+
+def is_media_url(url: str) -> bool:
+    return '.mp4' in url and ('v26' in url or 'v3' in url)
+
+
+def media_request_seen(driver) -> Callable[[], Optional[str]]:
+    """A media request shows up in the Resource Timing buffer"""
+    def check():
+        for name in driver.execute_script(_MEDIA_ENTRIES_JS) or []:
+            if name and is_media_url(name):
+                return name
+        return None
+    return check
+
+
+def video_src_ready(driver) -> Callable[[], Optional[str]]:
+    """The <video> element has a usable src"""
+    def check():
+        src = driver.execute_script(_VIDEO_SRC_JS)
+        return src if src and not src.startswith('blob:') else None
+    return check
+
+
+def captcha_present(driver) -> Callable[[], bool]:
+    return lambda: bool(driver.execute_script(_CAPTCHA_JS))
+
+
+def anchor_count_above(driver, count: int) -> Callable[[], Optional[int]]:
+    """More /video/ anchors than `count` are in the DOM"""
+    def check():
+        current = driver.execute_script(_ANCHOR_COUNT_JS)
+        return current if current > count else None
+    return check
+
+
+def scroll_height_changed(driver, last_height: int) -> Callable[[], Optional[int]]:
+    def check():
+        height = driver.execute_script("return document.body.scrollHeight")
+        return height if height != last_height else None
+    return check
+
+
+def any_of(*conditions: Callable[[], Any]) -> Callable[[], Any]:
+    """Return the first truthy result among several conditions"""
+    def check():
+        for condition in conditions:
+            try:
+                result = condition()
+            except Exception:
+                continue
+            if result:
+                return result
+        return None
+    return check
+
+
+def merge_timeouts(overrides: Optional[Dict[str, float]]) -> Dict[str, float]:
+    timeouts = dict(DEFAULT_TIMEOUTS)
+    timeouts.update(overrides or {})
+    return timeouts
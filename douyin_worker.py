@@ -0,0 +1,635 @@
+import argparse
+import hmac
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from queue import Empty
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Set, Union
+
+from douyin_cli import (add_download_arguments, add_input_arguments, downloader_factory, job_record, read_inputs,
+                        stderr_logger)
+from douyin_core import DouyinDownloader
+from douyin_driver_pool import DriverPool
+from douyin_engine import DownloadJob, DownloadPipeline
+from douyin_jobstore import DEFAULT_JOBS_PATH, JobStore, StoredJob
+from douyin_metrics import Metrics, MetricsServer
+from douyin_progress import RESOLVING, DOWNLOADING, DONE, FAILED
+from douyin_urls import PROFILE, SHORT, UrlNormalizer
+
+if TYPE_CHECKING:
+    import requests
+
+DEFAULT_QUEUE_PORT = 8765
+DEFAULT_LEASE = 120.0
+TOKEN_ENV = 'DOUYIN_QUEUE_TOKEN'
+
+
+class HttpJobQueue:
+    """The JobStore calls a Worker needs, sent to a JobQueueServer on another host
+
+    JobStore itself is the single-host backend (processes share the
+    SQLite file); this is the network one. Both are used the same way:
+
+        queue = open_queue('http://10.0.0.5:8765')  # or open_queue('jobs.sqlite')
+        stored = queue.claim('host-a:1234', lease=120)
+    """
+
+    def __init__(self, base_url: str, token: Optional[str] = None, session: Optional['requests.Session'] = None,
+                 timeout: float = 30.0):
+        self.base_url = base_url.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+        self._session = session
+
+    @property
+    def session(self) -> 'requests.Session':
+        if self._session is None:
+            from douyin_http import create_session
+            self._session = create_session()
+        return self._session
+
+    def _call(self, method: str, path: str, payload: Optional[Dict] = None):
+        headers = {'Authorization': f"Bearer {self.token}"} if self.token else {}
+        response = self.session.request(method, self.base_url + path, json=payload, headers=headers,
+                                        timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def add(self, url: str, download_path: str = "downloads") -> StoredJob:
+        return self.add_many([url], download_path)[0]
+
+    def add_many(self, urls: Iterable[str], download_path: str = "downloads") -> List[StoredJob]:
+        data = self._call('POST', '/jobs', {'urls': list(urls), 'download_path': download_path})
+        return [StoredJob(**job) for job in data['jobs']]
+
+    def claim(self, worker: Optional[str] = None, lease: Optional[float] = None) -> Optional[StoredJob]:
+        data = self._call('POST', '/claim', {'worker': worker, 'lease': lease})
+        return StoredJob(**data['job']) if data['job'] else None
+
+    def heartbeat(self, worker: str, job_ids: Iterable[int], lease: float) -> List[int]:
+        return self._call('POST', '/heartbeat', {'worker': worker, 'job_ids': list(job_ids), 'lease': lease})['lost']
+
+    def update(self, job_id: int, worker: Optional[str] = None, **fields) -> bool:
+        return self._call('POST', f'/jobs/{job_id}/update', {'worker': worker, 'fields': fields})['ok']
+
+    def complete(self, job_id: int, ok: bool, error: Optional[str] = None, worker: Optional[str] = None,
+                 **fields) -> bool:
+        payload = {'worker': worker, 'ok': ok, 'error': error, 'fields': fields}
+        return self._call('POST', f'/jobs/{job_id}/complete', payload)['ok']
+
+    def release(self, job_id: int, worker: Optional[str] = None) -> bool:
+        return self._call('POST', f'/jobs/{job_id}/release', {'worker': worker})['ok']
+
+    def counts(self) -> Dict[str, int]:
+        return self._call('GET', '/counts')
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+
+JobQueue = Union[JobStore, HttpJobQueue]
+
+
+class _NotFound(Exception):
+    pass
+
+
+def open_queue(spec: str = DEFAULT_JOBS_PATH, token: Optional[str] = None) -> JobQueue:
+    """http(s)://host:port for a JobQueueServer, anything else is a JobStore file path"""
+    if spec.startswith(('http://', 'https://')):
+        return HttpJobQueue(spec, token=token)
+    return JobStore(spec)
+
+
+class _QueueHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: '_QueueHttpServer'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self) -> bool:
+        token = self.server.queue_server.token
+        if not token:
+            return True
+        return hmac.compare_digest(self.headers.get('Authorization', ''), f"Bearer {token}")
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        if not self._authorized():
+            self._send(401, {'error': 'unauthorized'})
+            return
+        try:
+            payload = json.loads(raw or b'{}') or {}
+            self._send(200, self.server.queue_server.handle(self.command, self.path.split('?', 1)[0], payload))
+        except _NotFound:
+            self._send(404, {'error': 'not found'})
+        except (KeyError, TypeError, ValueError) as e:
+            self._send(400, {'error': f"{type(e).__name__}: {e}"})
+
+
+class _QueueHttpServer(ThreadingHTTPServer):
+    daemon_threads = True
+    queue_server: 'JobQueueServer'
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):  # Workers dropping keep-alive connections
+            super().handle_error(request, client_address)
+
+
+class JobQueueServer:
+    """Serve a JobStore to workers on other hosts as JSON over HTTP
+
+        POST /jobs               {"urls": [...], "download_path": "..."}
+        POST /claim              {"worker": "...", "lease": 120}
+        POST /heartbeat          {"worker": "...", "job_ids": [...], "lease": 120}
+        POST /jobs/<id>/update   {"worker": "...", "fields": {...}}
+        POST /jobs/<id>/complete {"worker": "...", "ok": true, "error": null, "fields": {...}}
+        POST /jobs/<id>/release  {"worker": "..."}
+        GET  /counts
+
+    With a token every request needs "Authorization: Bearer <token>".
+    Bound to 127.0.0.1 unless another host is given.
+    """
+
+    def __init__(self, store: JobStore, host: str = '127.0.0.1', port: int = DEFAULT_QUEUE_PORT,
+                 token: Optional[str] = None):
+        self.store = store
+        self.host = host
+        self.port = port
+        self.token = token
+        self._server: Optional[_QueueHttpServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self._server.server_port}"
+
+    def start(self) -> 'JobQueueServer':
+        self._server = _QueueHttpServer((self.host, self.port), _QueueHandler)
+        self._server.queue_server = self
+        threading.Thread(target=self._server.serve_forever, name="douyin-queue-http", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle(self, method: str, path: str, payload: Dict):
+        """Run one request against the store and return the JSON response"""
+        store = self.store
+        parts = path.strip('/').split('/')
+        if method == 'GET' and parts == ['counts']:
+            return store.counts()
+        if method != 'POST':
+            raise _NotFound(path)
+        if parts == ['jobs']:
+            jobs = store.add_many(payload['urls'], payload.get('download_path') or 'downloads')
+            return {'jobs': [asdict(job) for job in jobs]}
+        if parts == ['claim']:
+            job = store.claim(payload.get('worker'), payload.get('lease'))
+            return {'job': asdict(job) if job else None}
+        if parts == ['heartbeat']:
+            return {'lost': store.heartbeat(payload['worker'], payload['job_ids'], payload['lease'])}
+        if len(parts) == 3 and parts[0] == 'jobs' and parts[1].isdigit():
+            job_id, action = int(parts[1]), parts[2]
+            worker = payload.get('worker')
+            if action == 'update':
+                return {'ok': store.update(job_id, worker, **payload.get('fields', {}))}
+            if action == 'complete':
+                return {'ok': store.complete(job_id, payload['ok'], payload.get('error'), worker,
+                                             **payload.get('fields', {}))}
+            if action == 'release':
+                return {'ok': store.release(job_id, worker)}
+        raise _NotFound(path)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Worker:
+    """Claim jobs from a shared queue and download them on a local DownloadPipeline
+
+    Any number of workers, in several processes or on several hosts, can
+    share one queue (a JobStore file or an HttpJobQueue). A worker holds at
+    most resolvers + transfers jobs at a time, each under a lease that a
+    heartbeat thread renews every lease / 3 seconds. If the worker dies its
+    leases run out and the next claim() anywhere hands the jobs out again;
+    a job finished twice that way ends at the manifest check. Results
+    (state, attempts, error, media URL, bytes) are reported back to the
+    queue; a job stopped before it finished is released, not failed.
+    Profile URLs are listed on a thread of their own (one profile at a
+    time) and their videos added to the queue; meanwhile the worker keeps
+    reporting results and renewing leases.
+    """
+
+    def __init__(self, queue: JobQueue, downloader_factory: Callable[[], DouyinDownloader],
+                 worker_id: Optional[str] = None, resolve_workers: int = 2, transfer_workers: int = 6,
+                 retries: int = 3, lease: float = DEFAULT_LEASE, poll_interval: float = 2.0,
+                 profile_limit: Optional[int] = None, log_callback=None,
+                 on_result: Optional[Callable[[DownloadJob, StoredJob], None]] = None,
+                 metrics: Optional[Metrics] = None, **engine_kwargs):
+        self.queue = queue
+        self.downloader_factory = downloader_factory
+        self.worker_id = worker_id or default_worker_id()
+        self.resolve_workers = max(1, resolve_workers)
+        self.transfer_workers = max(1, transfer_workers)
+        self.retries = retries
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.profile_limit = profile_limit
+        self.log_callback = log_callback
+        self.on_result = on_result
+        self.metrics = metrics
+        self.engine_kwargs = engine_kwargs
+        self.completed = 0
+        self.failed = 0
+
+        self._held: Dict[int, StoredJob] = {}  # Engine job_id -> queue row
+        self._states: Dict[int, str] = {}      # Engine job_id -> last state reported to the queue
+        self._listing: Set[int] = set()        # Queue IDs of profiles claimed for listing, not yet done
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._idle_until = 0.0  # No claims before this (monotonic) time after the queue ran empty
+        self._lister: Optional[DouyinDownloader] = None
+        self._normalizer = UrlNormalizer()
+
+    def log(self, message: str):
+        if self.log_callback:
+            self.log_callback(message)
+        else:
+            print(message)
+
+    @property
+    def capacity(self) -> int:
+        return self.resolve_workers + self.transfer_workers
+
+    def stop(self):
+        """Stop claiming; run() releases what it still holds and returns"""
+        self._stopping.set()
+
+    def run(self, until_empty: bool = False) -> int:
+        """Work until stop() (or, with until_empty, until the queue has nothing left); returns jobs completed"""
+        self._stopping.clear()
+        engine = DownloadPipeline(self.downloader_factory, resolve_workers=self.resolve_workers,
+                                  transfer_workers=self.transfer_workers, retries=self.retries,
+                                  log_callback=self.log_callback, on_job_update=self._on_update,
+                                  metrics=self.metrics, **self.engine_kwargs)
+        engine.start()
+        heartbeat = threading.Thread(target=self._heartbeat, name="douyin-heartbeat", daemon=True)
+        heartbeat.start()
+        # The lister's browser is used by one crawl at a time
+        listers = ThreadPoolExecutor(max_workers=1, thread_name_prefix="douyin-lister")
+        self.log(f"Worker {self.worker_id} bắt đầu nhận việc")
+        try:
+            while True:
+                drained = self._fill(engine, listers)
+                with self._lock:
+                    idle = not self._held and not self._listing
+                if idle and (self._stopping.is_set() or (until_empty and drained and self._queue_finished())):
+                    break
+                for job in engine.as_completed(1, timeout=self.poll_interval if idle else 0.5):
+                    self._report(job)
+        finally:
+            self._stopping.set()
+            listers.shutdown(wait=True)  # Profiles not started yet are released, not listed
+            engine.stop()
+            for job in engine.as_completed(self.capacity, timeout=0):
+                self._report(job)
+            with self._lock:
+                leftover = list(self._held.values())
+                self._held.clear()
+            for stored in leftover:
+                self._queue_call(self.queue.release, stored.job_id, self.worker_id)
+            heartbeat.join()
+            if self._lister is not None:
+                self._lister._cleanup_driver()
+        self.log(f"Worker {self.worker_id} dừng: xong {self.completed - self.failed}/{self.completed} video")
+        return self.completed
+
+    def _queue_finished(self) -> bool:
+        """Nothing queued or held by any worker; a dead worker's jobs still count until their lease runs out"""
+        counts = self._queue_call(self.queue.counts)
+        return counts is not None and not set(counts) - {DONE, FAILED}
+
+    def _queue_call(self, method, *args, **kwargs):
+        """Call the queue, logging instead of raising: an unreachable queue only delays the work"""
+        try:
+            return method(*args, **kwargs)
+        except Exception as e:
+            self.log(f"Lỗi khi gọi hàng đợi ({method.__name__}): {str(e)}")
+            return None
+
+    def _fill(self, engine: DownloadPipeline, listers: ThreadPoolExecutor) -> bool:
+        """Claim jobs until `capacity` of them are held (profiles included); True if the queue ran empty"""
+        while not self._stopping.is_set():
+            if time.monotonic() < self._idle_until:
+                return True
+            with self._lock:
+                if len(self._held) + len(self._listing) >= self.capacity:
+                    return False
+            stored = self._queue_call(self.queue.claim, self.worker_id, self.lease)
+            if stored is None:
+                self._idle_until = time.monotonic() + self.poll_interval
+                return True
+            if self.metrics is not None:
+                self.metrics.inc('jobs_claimed')
+            item = self._normalizer.normalize(stored.url, expand=False)
+            if item is not None and item.kind == PROFILE:
+                with self._lock:
+                    self._listing.add(stored.job_id)  # Renewed by the heartbeat while it waits for the lister
+                listers.submit(self._list_profile, stored)
+                continue
+            # Under the lock so _on_update, on an engine thread, already finds the job in _held
+            with self._lock:
+                job = engine.submit(stored.url, stored.download_path)
+                self._held[job.job_id] = stored
+        return False
+
+    def _list_profile(self, stored: StoredJob):
+        """Add a profile's videos to the queue as jobs of their own; runs on the lister thread"""
+        if self._stopping.is_set():
+            self._queue_call(self.queue.release, stored.job_id, self.worker_id)
+            with self._lock:
+                self._listing.discard(stored.job_id)
+            return
+        try:
+            if self._lister is None:
+                self._lister = self.downloader_factory()
+            urls = [video['url'] for video in islice(self._lister.iter_user_videos(stored.url), self.profile_limit)]
+            self.queue.add_many(urls, stored.download_path)
+            self.log(f"Đã thêm {len(urls)} video từ {stored.url}")
+            self._queue_call(self.queue.complete, stored.job_id, True, worker=self.worker_id)
+        except Exception as e:
+            self.log(f"Lỗi khi lấy danh sách video của {stored.url}: {str(e)}")
+            self._queue_call(self.queue.complete, stored.job_id, False, str(e), self.worker_id)
+        finally:
+            with self._lock:
+                self._listing.discard(stored.job_id)
+
+    def _on_update(self, job: DownloadJob):
+        # Runs on engine threads for every progress tick: only state changes go to the queue
+        if job.state not in (RESOLVING, DOWNLOADING):
+            return
+        with self._lock:
+            stored = self._held.get(job.job_id)
+            if stored is None or self._states.get(job.job_id) == job.state:
+                return
+            self._states[job.job_id] = job.state
+        self._queue_call(self.queue.update, stored.job_id, self.worker_id, state=job.state, video_id=job.video_id,
+                         attempts=job.attempts, error=job.error, media_url=job.media_url)
+
+    def _report(self, job: DownloadJob):
+        with self._lock:
+            stored = self._held.pop(job.job_id, None)
+            self._states.pop(job.job_id, None)
+        if stored is None:
+            return
+        if job.state == FAILED and self._stopping.is_set():
+            self._queue_call(self.queue.release, stored.job_id, self.worker_id)
+            return
+        size = 0
+        if job.state == DONE and job.output_path and os.path.exists(job.output_path):
+            size = os.path.getsize(job.output_path)
+        ok = self._queue_call(self.queue.complete, stored.job_id, job.state == DONE, job.error, self.worker_id,
+                              video_id=job.video_id, attempts=job.attempts, media_url=job.media_url,
+                              progress=job.progress, bytes_done=size, output_path=job.output_path)
+        if ok is False:
+            self.log(f"Job {stored.job_id} đã được giao cho worker khác, bỏ kết quả")
+            return
+        self.completed += 1
+        self.failed += job.state != DONE
+        if self.on_result:
+            self.on_result(job, stored)
+
+    def _heartbeat(self):
+        interval = max(1.0, self.lease / 3)
+        while not self._stopping.wait(interval):
+            with self._lock:
+                ids = [stored.job_id for stored in self._held.values()] + list(self._listing)
+            if not ids:
+                continue
+            lost = self._queue_call(self.queue.heartbeat, self.worker_id, ids, self.lease) or []
+            for job_id in lost:
+                self.log(f"Mất lease của job {job_id}")
+            if lost and self.metrics is not None:
+                self.metrics.inc('leases_lost', len(lost))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m douyin_worker',
+        description="Nhiều tiến trình / nhiều máy cùng tải từ một hàng đợi chung. HÀNG ĐỢI là file SQLite "
+                    "(các tiến trình trên cùng máy) hoặc http://máy:cổng của lệnh serve.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_queue_argument(command: argparse.ArgumentParser):
+        command.add_argument('--queue', default=DEFAULT_JOBS_PATH,
+                             help=f"File SQLite hoặc http://máy:cổng (mặc định {DEFAULT_JOBS_PATH})")
+        command.add_argument('--token', default=os.environ.get(TOKEN_ENV),
+                             help=f"Mã bí mật của hàng đợi qua mạng (mặc định lấy từ biến môi trường {TOKEN_ENV})")
+
+    serve = commands.add_parser('serve', help="Chia sẻ một file hàng đợi cho worker trên máy khác qua HTTP")
+    serve.add_argument('--jobs', default=DEFAULT_JOBS_PATH, help="File SQLite của hàng đợi")
+    serve.add_argument('--host', default='127.0.0.1', help="Địa chỉ lắng nghe (0.0.0.0 để máy khác kết nối)")
+    serve.add_argument('--port', type=int, default=DEFAULT_QUEUE_PORT)
+    serve.add_argument('--token', default=os.environ.get(TOKEN_ENV),
+                       help=f"Bắt buộc worker gửi mã này (mặc định lấy từ biến môi trường {TOKEN_ENV})")
+    serve.add_argument('--status-interval', type=float, default=30, help="In số job theo trạng thái mỗi N giây")
+
+    add = commands.add_parser('add', help="Thêm URL video hoặc trang người dùng vào hàng đợi")
+    add_queue_argument(add)
+    add_input_arguments(add)
+    add.add_argument('-o', '--output', default='downloads', help="Thư mục tải xuống trên máy worker")
+
+    work = commands.add_parser('work', help="Chạy worker nhận việc từ hàng đợi")
+    add_queue_argument(work)
+    work.add_argument('--processes', type=int, default=1, help="Số tiến trình worker (mỗi tiến trình có Chrome riêng)")
+    work.add_argument('--lease', type=float, default=DEFAULT_LEASE,
+                      help="Giây giữ một job; worker chết quá thời gian này thì job được giao lại")
+    work.add_argument('--until-empty', action='store_true', help="Dừng khi hàng đợi hết việc")
+    add_download_arguments(work)
+
+    status = commands.add_parser('status', help="In số job theo trạng thái")
+    add_queue_argument(status)
+    return parser
+
+
+def serve(args: argparse.Namespace) -> int:
+    def log(message: str):
+        print(message, file=sys.stderr, flush=True)
+
+    store = JobStore(args.jobs)
+    server = JobQueueServer(store, args.host, args.port, args.token).start()
+    log(f"Hàng đợi {args.jobs} đang mở tại {server.url}")
+    if args.host not in ('127.0.0.1', 'localhost') and not args.token:
+        log(f"Cảnh báo: chưa đặt --token, ai kết nối được tới {server.url} cũng sửa được hàng đợi")
+    try:
+        while True:
+            time.sleep(args.status_interval)
+            log(json.dumps(store.counts()))
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        server.stop()
+        store.close()
+
+
+def add(args: argparse.Namespace) -> int:
+    queue = open_queue(args.queue, args.token)
+    added = skipped = 0
+    try:
+        lines = read_inputs(args.urls, args.input)
+        normalizer = UrlNormalizer()
+        while True:
+            chunk = list(islice(lines, 256))
+            if not chunk:
+                break
+            urls = []
+            for item in normalizer.normalize_many(chunk):
+                if item.kind == SHORT:
+                    print(f"Không mở được link rút gọn: {item.raw}", file=sys.stderr)
+                    skipped += 1
+                else:
+                    urls.append(item.url)
+            if urls:
+                added += len(queue.add_many(urls, args.output))
+        print(f"Đã thêm {added} URL vào hàng đợi" + (f", bỏ qua {skipped}" if skipped else ""), file=sys.stderr)
+        print(json.dumps(queue.counts()))
+    finally:
+        queue.close()
+    return 1 if skipped else 0
+
+
+def work(args: argparse.Namespace, index: int = 0) -> int:
+    """One worker process: a driver pool, a pipeline and the claim loop"""
+    print_lock = threading.Lock()
+    log = stderr_logger(args, print_lock)
+    metrics = Metrics(events_path=f"{args.metrics_jsonl}.{index}" if args.metrics_jsonl and index else
+                      args.metrics_jsonl)
+    metrics_server = None
+    if args.metrics_port is not None:
+        metrics_server = MetricsServer(metrics, args.metrics_host, args.metrics_port + index).start()
+        log(f"Metrics: {metrics_server.url}")
+    new_downloader = downloader_factory(args, log, metrics)
+    setup = new_downloader()
+    driver_pool = DriverPool(setup._setup_driver, min_size=1, max_size=args.resolvers, log_callback=log,
+                             metrics=metrics)
+    driver_pool.start()
+    queue = open_queue(args.queue, args.token)
+    worker_id = default_worker_id()
+
+    def on_result(job: DownloadJob, stored: StoredJob):
+        record = job_record(job)
+        record.update({'job_id': stored.job_id, 'worker': worker_id})
+        with print_lock:
+            print(json.dumps(record, ensure_ascii=False), flush=True)
+
+    worker = Worker(queue, lambda: new_downloader(driver_pool), worker_id, resolve_workers=args.resolvers,
+                    transfer_workers=args.transfers, retries=args.retries, lease=args.lease,
+                    profile_limit=args.profile_limit, log_callback=log, on_result=on_result, metrics=metrics)
+    try:
+        worker.run(until_empty=args.until_empty)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        driver_pool.close()
+        metrics.close()
+        if metrics_server is not None:
+            metrics_server.stop()
+        queue.close()
+    return 1 if worker.failed else 0
+
+
+def _work_process(argv: List[str], index: int, results):
+    args = build_parser().parse_args(argv)
+    results.put(work(args, index))
+
+
+def work_processes(args: argparse.Namespace, argv: List[str]) -> int:
+    """Run `work` in args.processes spawned processes; each has its own Chrome instances and pipeline"""
+    if args.processes <= 1:
+        return work(args)
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [context.Process(target=_work_process, args=(argv, index, results), name=f"douyin-worker-{index}")
+                 for index in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # The children got the same Ctrl+C; give them time to release their jobs
+        for process in processes:
+            process.join(30)
+            if process.is_alive():
+                process.terminate()
+        return 130
+    # empty() is unreliable on a multiprocessing queue; a process that died without reporting times out here
+    codes = []
+    for _ in processes:
+        try:
+            codes.append(results.get(timeout=5))
+        except Empty:
+            break
+    return 1 if any(codes) or len(codes) < len(processes) else 0
+
+
+def status(args: argparse.Namespace) -> int:
+    queue = open_queue(args.queue, args.token)
+    try:
+        print(json.dumps(queue.counts()))
+    finally:
+        queue.close()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser().parse_args(argv)
+    if args.command == 'serve':
+        return serve(args)
+    if args.command == 'add':
+        if not args.urls and not args.input:
+            build_parser().error("cần ít nhất một URL hoặc --input")
+        return add(args)
+    if args.command == 'work':
+        return work_processes(args, argv)
+    return status(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import threading
+from typing import Optional
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024  # Bytes per read from the socket / write to disk
+HASH_READ_SIZE = 1024 * 1024
+
+
+def preallocate(fd: int, size: int):
+    """Reserve `size` bytes up front: real blocks where the OS supports it, a sparse extend otherwise"""
+    os.ftruncate(fd, size)
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except OSError:
+            pass  # e.g. filesystems without fallocate; the sparse file still works
+
+
+class MediaWriter:
+    """Write one download into <output_path>.part and rename it into place on commit()
+
+    Writes are positional (os.pwrite where available), so parallel
+    segments can share one file descriptor. Bytes that arrive in file
+    order are hashed as they are written; whatever could not be hashed
+    inline (other segments, data from an earlier run) is hashed from disk
+    once in commit().
+
+        with MediaWriter(path, size) as writer:
+            writer.write_at(offset, chunk)
+            size, sha256 = writer.commit()
+    """
+
+    def __init__(self, output_path: str, size: int = 0, resume: bool = False, hash_name: str = 'sha256'):
+        self.output_path = output_path
+        self.part_path = output_path + '.part'
+        self.size = size
+        self._hasher = hashlib.new(hash_name)
+        self._hashed = 0  # File prefix already fed to the hasher
+        self._position = 0  # Next offset for write()
+        self._lock = threading.Lock()
+
+        resume = resume and size > 0 and os.path.exists(self.part_path) and os.path.getsize(self.part_path) == size
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+        if not resume:
+            flags |= os.O_TRUNC
+        self._fd: Optional[int] = os.open(self.part_path, flags, 0o644)
+        if size and not resume:
+            preallocate(self._fd, size)
+
+    def __enter__(self) -> 'MediaWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, data: bytes):
+        """Append at the current position (single-stream downloads)"""
+        self.write_at(self._position, data)
+        self._position += len(data)
+
+    def write_at(self, offset: int, data: bytes):
+        view = memoryview(data)
+        if hasattr(os, 'pwrite'):
+            position = offset
+            while view:
+                written = os.pwrite(self._fd, view, position)
+                view = view[written:]
+                position += written
+        else:
+            with self._lock:
+                os.lseek(self._fd, offset, os.SEEK_SET)
+                while view:
+                    view = view[os.write(self._fd, view):]
+        with self._lock:
+            if offset == self._hashed:
+                self._hasher.update(data)
+                self._hashed += len(data)
+
+    def close(self):
+        """Close without renaming; the .part stays for a later resume"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def commit(self):
+        """Finish the hash, truncate to the real size, close and rename; return (size, hex digest)"""
+        size = self.size or self._position
+        os.ftruncate(self._fd, size)
+        while self._hashed < size:
+            block = self._read_at(self._hashed, min(HASH_READ_SIZE, size - self._hashed))
+            if not block:
+                break
+            self._hasher.update(block)
+            self._hashed += len(block)
+        self.close()
+        os.replace(self.part_path, self.output_path)
+        return size, self._hasher.hexdigest()
+
+    def _read_at(self, offset: int, length: int) -> bytes:
+        if hasattr(os, 'pread'):
+            return os.pread(self._fd, length, offset)
+        os.lseek(self._fd, offset, os.SEEK_SET)
+        return os.read(self._fd, length)
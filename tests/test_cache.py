@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from douyin_cache import MediaUrlCache, url_expiry
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = MediaUrlCache(str(tmp_path / 'media_urls.sqlite'), ttl=3600, max_entries=3, safety_margin=60)
+    yield cache
+    cache.close()
+
+
+def test_put_and_get_round_trip(cache):
+    cache.put('1', 'https://cdn.example/1.mp4', headers={'Referer': 'https://www.douyin.com/'})
+
+    entry = cache.get('1')
+
+    assert entry['url'] == 'https://cdn.example/1.mp4'
+    assert entry['headers'] == {'Referer': 'https://www.douyin.com/'}
+    assert cache.get('2') is None
+
+
+def test_url_expiring_within_the_safety_margin_is_a_miss(cache):
+    soon = int(time.time()) + 30
+    cache.put('1', f'https://cdn.example/1.mp4?x-expires={soon}')
+
+    assert cache.get('1') is None
+    assert len(cache) == 0  # Dropped, not just hidden
+
+
+def test_ttl_caps_the_signed_expiry(tmp_path):
+    cache = MediaUrlCache(str(tmp_path / 'media_urls.sqlite'), ttl=100, safety_margin=0)
+    cache.put('1', f'https://cdn.example/1.mp4?x-expires={int(time.time()) + 86400}')
+
+    assert cache.get('1')['expires_at'] <= time.time() + 100
+    cache.close()
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    for video_id in ('1', '2', '3'):
+        cache.put(video_id, f'https://cdn.example/{video_id}.mp4')
+        time.sleep(0.01)
+    cache.get('1')  # Now more recent than 2 and 3
+    time.sleep(0.01)
+
+    cache.put('4', 'https://cdn.example/4.mp4')
+
+    assert len(cache) == 3
+    assert cache.get('2') is None
+    assert all(cache.get(video_id) for video_id in ('1', '3', '4'))
+
+
+def test_invalidate_and_persistence(tmp_path):
+    path = str(tmp_path / 'media_urls.sqlite')
+    cache = MediaUrlCache(path)
+    cache.put('1', 'https://cdn.example/1.mp4')
+    cache.put('2', 'https://cdn.example/2.mp4')
+    cache.invalidate('2')
+    cache.close()
+
+    reopened = MediaUrlCache(path)
+    assert reopened.get('1')['url'] == 'https://cdn.example/1.mp4'
+    assert reopened.get('2') is None
+    reopened.close()
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://cdn.example/v.mp4?x-expires=1700000000&sig=abc', 1700000000.0),
+    ('https://cdn.example/v.mp4?deadline=1700000123', 1700000123.0),
+    ('https://cdn.example/v.mp4?a=1', None),
+])
+def test_url_expiry_from_query(url, expected):
+    assert url_expiry(url) == expected
+
+
+def test_url_expiry_from_douyinvod_path():
+    expires = int(time.time()) + 3600
+    url = f'https://v26-web.douyinvod.com/0123456789abcdef0123456789abcdef/{expires:08x}/video/tos/cn/x/'
+
+    assert url_expiry(url) == float(expires)
+    # Hex-looking path segments far from now are not taken for an expiry
+    assert url_expiry('https://v26-web.douyinvod.com/0123456789abcdef/00000001/video/') is None
@@ -0,0 +1,87 @@
+import threading
+import time
+
+from douyin_driver_pool import DriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.current_url = 'about:blank'
+        self.quit_called = threading.Event()
+
+    def quit(self):
+        self.quit_called.set()
+
+
+def lease_in_thread(pool: DriverPool, timeout: float = 5.0):
+    """Lease from another thread so a hung lease() fails the test instead of blocking it"""
+    outcome = {}
+
+    def run():
+        try:
+            with pool.lease() as driver:
+                outcome['driver'] = driver
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "lease() is still blocked"
+    return outcome
+
+
+def test_lease_raises_when_chrome_cannot_start():
+    def create_driver():
+        time.sleep(0.2)  # Still starting when lease() comes in
+        raise RuntimeError("chrome not found")
+
+    pool = DriverPool(create_driver, min_size=2, max_size=2, log_callback=lambda message: None)
+    pool.start()
+
+    outcome = lease_in_thread(pool)
+
+    assert isinstance(outcome.get('error'), RuntimeError)
+    assert pool.stats()['creating'] == 0
+    pool.close()
+
+
+def test_lease_creates_a_driver_after_warm_up_failed():
+    attempts = []
+
+    def create_driver():
+        attempts.append(1)
+        time.sleep(0.2)
+        if len(attempts) <= 2:
+            raise RuntimeError("chrome crashed on start")
+        return FakeDriver()
+
+    pool = DriverPool(create_driver, min_size=2, max_size=2, log_callback=lambda message: None)
+    pool.start()
+
+    outcome = lease_in_thread(pool)
+
+    # Both warm-ups failed; the woken lease() started Chrome itself
+    assert len(attempts) >= 3
+    assert isinstance(outcome.get('driver'), FakeDriver)
+    pool.close()
+
+
+def test_unhealthy_driver_is_replaced_on_lease():
+    drivers = []
+
+    def create_driver():
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    pool = DriverPool(create_driver, min_size=0, max_size=1, log_callback=lambda message: None)
+    with pool.lease() as first:
+        pass
+    del first.current_url  # The session stopped answering
+
+    with pool.lease() as second:
+        assert second is not first
+
+    assert first.quit_called.wait(5)
+    assert pool.stats()['recycled'] == 1
+    pool.close()
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from douyin_engine import DownloadPipeline
+from douyin_progress import DONE, FAILED
+
+
+class FakeDownloader:
+    """Resolves to the URLs queued in `urls` (one per call) and records what it is asked to do"""
+
+    media_cache = None
+    progress_bus = None
+    metrics = None
+    use_manifest = False
+    driver = None
+
+    def __init__(self, urls, calls):
+        self.urls = urls
+        self.calls = calls
+
+    def is_downloaded(self, video_id, download_path):
+        return False
+
+    def extract_video_id(self, url):
+        return url.rsplit('/', 1)[-1]
+
+    def resolve_video_url(self, url, use_cache=True):
+        self.calls.append(('resolve', use_cache))
+        return self.urls.pop(0)
+
+    def download_media(self, video_url, video_id, download_path, progress_callback=None):
+        self.calls.append(('download', video_url))
+        return True
+
+    def output_path_for(self, video_id, download_path):
+        return f"{download_path}/{video_id}.mp4"
+
+    def _cleanup_driver(self):
+        pass
+
+
+def run_pipeline(urls, **kwargs):
+    calls = []
+    lock = threading.Lock()
+    shared = list(urls)
+
+    def factory():
+        with lock:
+            return FakeDownloader(shared, calls)
+
+    pipeline = DownloadPipeline(factory, resolve_workers=1, transfer_workers=1, retry_delay=0, **kwargs)
+    try:
+        result = pipeline.run(['https://www.douyin.com/video/7301234567890000001'], 'out')
+    finally:
+        pipeline.stop()
+    return result.jobs[0], calls
+
+
+def test_url_expiring_in_the_queue_is_resolved_again_without_the_cache():
+    expiring = f"https://cdn.example/v.mp4?x-expires={int(time.time()) + 10}"
+    fresh = f"https://cdn.example/v.mp4?x-expires={int(time.time()) + 3600}"
+
+    job, calls = run_pipeline([expiring, fresh], expiry_margin=60)
+
+    assert job.state == DONE
+    assert job.attempts == 2
+    assert job.media_url == fresh
+    # The first resolve may use the cache; the one after the stale URL must not
+    assert calls == [('resolve', True), ('resolve', False), ('download', fresh)]
+
+
+def test_job_fails_when_every_resolved_url_goes_stale():
+    urls = ['https://cdn.example/a.mp4', 'https://cdn.example/b.mp4']
+
+    job, calls = run_pipeline(urls, max_resolved_age=-1, retries=2)
+
+    assert job.state == FAILED
+    assert job.error == "media url went stale in queue"
+    assert calls == [('resolve', True), ('resolve', False)]
@@ -0,0 +1,111 @@
+import time
+
+import pytest
+
+from douyin_jobstore import CLAIMED, QUEUED, JobStore
+from douyin_progress import DONE, FAILED
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite'))
+    yield store
+    store.close()
+
+
+def test_add_returns_the_existing_row(store):
+    first = store.add('https://www.douyin.com/video/1', 'a')
+    again = store.add('https://www.douyin.com/video/1', 'a')
+    other_folder = store.add('https://www.douyin.com/video/1', 'b')
+
+    assert again.job_id == first.job_id
+    assert other_folder.job_id != first.job_id
+    assert len(store) == 2
+
+
+def test_claim_hands_out_each_job_once_oldest_first(store):
+    jobs = store.add_many([f'https://www.douyin.com/video/{i}' for i in range(3)])
+
+    claimed = [store.claim() for _ in range(3)]
+
+    assert [job.job_id for job in claimed] == [job.job_id for job in jobs]
+    assert all(job.state == CLAIMED for job in claimed)
+    assert store.claim() is None
+
+
+def test_claim_is_scoped_to_download_path(store):
+    store.add('https://www.douyin.com/video/1', 'a')
+    wanted = store.add('https://www.douyin.com/video/2', 'b')
+
+    assert store.claim(download_path='b').job_id == wanted.job_id
+    assert store.claim(download_path='b') is None
+    assert store.count(QUEUED) == 1
+
+
+def test_complete_and_requeue_unfinished(store):
+    done, failed, crashed = store.add_many([f'https://www.douyin.com/video/{i}' for i in range(3)])
+    for _ in range(3):
+        store.claim()
+    store.complete(done.job_id, True)
+    store.complete(failed.job_id, False, error='boom')
+
+    assert store.requeue_unfinished() == 1
+
+    assert store.get(done.job_id).state == DONE
+    assert store.get(failed.job_id).state == FAILED
+    assert store.get(failed.job_id).error == 'boom'
+    assert store.get(crashed.job_id).state == QUEUED
+    assert [job.job_id for job in store.unfinished()] == [crashed.job_id]
+
+
+def test_held_by_workers_ignores_anonymous_claims(store):
+    engine_job, worker_job, queued = store.add_many([f'https://www.douyin.com/video/{i}' for i in range(3)])
+    store.claim()
+    store.claim(worker='host-1')
+
+    held = store.held_by_workers([engine_job.job_id, worker_job.job_id, queued.job_id])
+
+    assert held == {worker_job.job_id: 'host-1'}
+
+
+def test_expired_lease_is_reclaimed_by_the_next_claim(store):
+    job = store.add('https://www.douyin.com/video/1')
+    first = store.claim(worker='dead', lease=0.05)
+    assert first.claimed_by == 'dead' and first.lease_until is not None
+    assert store.claim(worker='alive', lease=60) is None
+
+    time.sleep(0.1)
+    second = store.claim(worker='alive', lease=60)
+
+    assert second.job_id == job.job_id
+    assert second.claimed_by == 'alive'
+
+
+def test_heartbeat_renews_held_leases_and_reports_lost_ones(store):
+    kept, reclaimed, finished = store.add_many([f'https://www.douyin.com/video/{i}' for i in range(3)])
+    for _ in range(3):
+        store.claim(worker='w1', lease=0.05)
+    store.complete(finished.job_id, True, worker='w1')
+    assert store.heartbeat('w1', [kept.job_id], lease=60) == []
+
+    time.sleep(0.1)
+    store.claim(worker='w2', lease=60)  # Takes over the job whose lease ran out
+
+    assert store.heartbeat('w1', [kept.job_id, reclaimed.job_id, finished.job_id], lease=60) == [
+        reclaimed.job_id, finished.job_id]
+    assert store.get(kept.job_id).lease_until > time.time() + 30
+
+
+def test_update_is_rejected_after_a_reclaim(store):
+    job = store.add('https://www.douyin.com/video/1')
+    store.claim(worker='w1', lease=0.05)
+    assert store.update(job.job_id, worker='w1', progress=10)
+
+    time.sleep(0.1)
+    store.claim(worker='w2', lease=60)
+
+    assert not store.update(job.job_id, worker='w1', progress=50)
+    assert not store.complete(job.job_id, True, worker='w1')
+    assert store.complete(job.job_id, True, worker='w2')
+    stored = store.get(job.job_id)
+    assert stored.state == DONE and stored.progress == 10 and stored.lease_until is None
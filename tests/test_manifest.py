@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+from douyin_manifest import DownloadManifest, hash_file, open_manifest
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = DownloadManifest(str(tmp_path))
+    yield manifest
+    manifest.close()
+
+
+def write(path, data: bytes) -> str:
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def test_recorded_file_is_downloaded(manifest, tmp_path):
+    path = write(tmp_path / 'douyin_1.mp4', b'x' * 1000)
+
+    entry = manifest.record('1', path)
+
+    assert (entry.filename, entry.size, entry.sha256) == ('douyin_1.mp4', 1000, hash_file(path))
+    assert manifest.has('1', path)
+    assert manifest.has('1', path, verify='hash')
+
+
+def test_unlisted_file_is_not_downloaded(manifest, tmp_path):
+    path = write(tmp_path / 'douyin_1.mp4', b'x' * 1000)
+
+    assert not manifest.has('1', path)
+    assert manifest.adoptable('1')  # Left to the download's remote size check
+
+
+def test_size_mismatch_drops_the_entry(manifest, tmp_path):
+    path = write(tmp_path / 'douyin_1.mp4', b'x' * 1000)
+    manifest.record('1', path)
+    write(path, b'x' * 400)  # Cut off
+
+    assert not manifest.has('1', path)
+    assert manifest.get('1') is None
+    assert not manifest.adoptable('1')
+
+
+def test_hash_verification_catches_same_size_corruption(manifest, tmp_path):
+    path = write(tmp_path / 'douyin_1.mp4', b'x' * 1000)
+    manifest.record('1', path)
+    write(path, b'y' * 1000)
+
+    assert manifest.has('1', path)  # One stat call can't tell
+    assert not manifest.has('1', path, verify='hash')
+    assert manifest.get('1') is None
+    assert not manifest.adoptable('1')
+
+    write(path, b'x' * 1000)
+    manifest.record('1', path)
+    assert manifest.adoptable('1')
+
+
+def test_missing_file_drops_the_entry(manifest, tmp_path):
+    path = write(tmp_path / 'douyin_1.mp4', b'x' * 1000)
+    manifest.record('1', path)
+    os.remove(path)
+
+    assert not manifest.has('1', path)
+    assert len(manifest) == 0
+
+
+def test_open_manifest_is_shared_per_folder(tmp_path):
+    assert open_manifest(str(tmp_path)) is open_manifest(os.path.join(str(tmp_path), '.'))
+    assert os.path.exists(tmp_path / '.douyin_manifest.sqlite')
+
+
+def test_mismatched_file_is_downloaded_again(tmp_path):
+    pytest.importorskip('requests')
+    from douyin_core import DouyinDownloader
+    from douyin_localserver import MediaServer
+
+    download_path = str(tmp_path / 'out')
+    downloader = DouyinDownloader(log_callback=lambda message: None, verify_downloads='hash')
+    output_path = downloader.output_path_for('7301234567890000001', download_path)
+    with MediaServer(video_size=256 * 1024) as server:
+        url = server.media_url('7301234567890000001')
+        assert downloader.download_media(url, '7301234567890000001', download_path)
+        assert downloader.is_downloaded('7301234567890000001', download_path)
+
+        with open(output_path, 'r+b') as f:
+            f.write(b'corrupt')  # Same size, different bytes
+        assert not downloader.is_downloaded('7301234567890000001', download_path)
+        sent = server.bytes_sent
+        assert downloader.download_media(url, '7301234567890000001', download_path)
+        refetched = server.bytes_sent - sent
+
+    assert refetched > len(server.payload)  # Probe byte plus the whole file, not kept as is
+    with open(output_path, 'rb') as f:
+        assert f.read() == server.payload
+    assert downloader.is_downloaded('7301234567890000001', download_path)
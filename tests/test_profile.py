@@ -0,0 +1,135 @@
+import json
+import os
+from contextlib import nullcontext
+from itertools import islice
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from douyin_localserver import FIXTURES_DIR, FeedReplayServer, load_feed_pages
+from douyin_network import NetworkCapture
+from douyin_profile import FEED_PATH, FeedCrawler
+
+FEED_DIR = os.path.join(FIXTURES_DIR, 'feed')
+
+
+class ReplayDriver:
+    """Just enough of a Chrome driver for FeedCrawler, browsing the replay server with requests
+
+    Loading the profile fetches the first feed page the way the page's
+    script does and reports it in the performance log; in-page fetches
+    (execute_async_script) go straight to the server.
+    """
+
+    def __init__(self, server: FeedReplayServer):
+        self.server = server
+        self.bodies = {}
+        self._log = []
+
+    def _network(self, method: str, params):
+        self._log.append({'message': json.dumps({'message': {'method': method, 'params': params}})})
+
+    def get(self, url: str):
+        requests.get(url, timeout=5).raise_for_status()
+        feed_url = f"{self.server.base_url}{FEED_PATH}?sec_user_id={self.server.sec_uid}&count=18&max_cursor=0"
+        r = requests.get(feed_url, timeout=5)
+        request_id = str(len(self.bodies) + 1)
+        self.bodies[request_id] = r.text
+        self._network('Network.responseReceived', {'requestId': request_id, 'response': {
+            'url': feed_url, 'status': r.status_code, 'mimeType': 'application/json', 'headers': dict(r.headers)}})
+        self._network('Network.loadingFinished', {'requestId': request_id})
+
+    def get_log(self, kind: str):
+        entries, self._log = self._log, []
+        return entries
+
+    def execute_cdp_cmd(self, cmd: str, params):
+        return {'body': self.bodies[params['requestId']], 'base64Encoded': False}
+
+    def execute_async_script(self, script: str, url: str):
+        return requests.get(url, timeout=5).text
+
+    def execute_script(self, script: str, *args):
+        return False
+
+
+class RecordingCache:
+    def __init__(self):
+        self.urls = {}
+
+    def put(self, video_id, url, headers=None, expires_at=None):
+        self.urls[video_id] = url
+
+
+class FakeDownloader:
+    def __init__(self, driver):
+        self.driver = driver
+        self.media_cache = RecordingCache()
+        self.wait_timeouts = {'page': 5, 'scroll': 1}
+        self.messages = []
+
+    def _ensure_driver(self):
+        pass
+
+    def new_network_capture(self):
+        return NetworkCapture(self.driver)
+
+    def log(self, message):
+        self.messages.append(message)
+
+    def _throttle(self, request_class):
+        pass
+
+    def _span(self, name):
+        return nullcontext()
+
+    def _check_for_captcha(self):
+        return False
+
+    def _record_page_load(self, captcha=False, solved=False):
+        pass
+
+
+@pytest.fixture
+def site():
+    with FeedReplayServer() as server:
+        yield server
+
+
+def feed_cursors(server: FeedReplayServer):
+    return [int(parse_qs(urlparse(path).query)['max_cursor'][0])
+            for path in server.requests if path.startswith(FEED_PATH)]
+
+
+def test_crawler_follows_max_cursor_through_all_pages(site):
+    downloader = FakeDownloader(ReplayDriver(site))
+    crawler = FeedCrawler(downloader, site.user_url())
+
+    videos = list(crawler.iter_videos())
+
+    recorded = load_feed_pages(FEED_DIR)
+    pages = [recorded[0]]
+    while pages[-1]['has_more']:
+        pages.append(recorded[pages[-1]['max_cursor']])
+    assert [len(page['aweme_list']) for page in pages] == [18, 18, 7]
+    assert len(videos) == 18 + 18 + 7
+    assert [video['id'] for video in videos] == [str(aweme['aweme_id']) for page in pages
+                                                 for aweme in page['aweme_list']]
+    # Each request carries the max_cursor of the page before it
+    assert feed_cursors(site) == [0, pages[0]['max_cursor'], pages[1]['max_cursor']]
+    assert crawler.exhausted and not crawler.has_more
+    assert set(downloader.media_cache.urls) == {video['id'] for video in videos}
+
+
+def test_crawler_resumes_where_the_caller_stopped(site):
+    crawler = FeedCrawler(FakeDownloader(ReplayDriver(site)), site.user_url())
+
+    first = list(islice(crawler.iter_videos(), 20))
+    rest = list(crawler.iter_videos())
+
+    assert len(first) == 20
+    assert len(first) + len(rest) == 43
+    assert len({video['id'] for video in first + rest}) == 43
+    assert len(feed_cursors(site)) == 3  # No page was fetched twice
@@ -0,0 +1,72 @@
+import time
+
+from douyin_progress import DOWNLOADING, FAILED, ProgressBus
+
+
+def test_updates_are_coalesced_into_one_snapshot_per_interval():
+    bus = ProgressBus(interval=0.05)
+    received = []
+    bus.subscribe(received.append)
+    try:
+        for downloaded in range(0, 1000, 10):
+            bus.update('a', downloaded=downloaded, total=1000)
+        time.sleep(0.2)
+    finally:
+        bus.stop()
+
+    assert 1 <= len(received) < 100
+    job = received[-1].jobs[0]
+    assert job.state == DOWNLOADING
+    assert job.downloaded == 990 and job.total == 1000
+
+
+def test_nothing_is_published_while_idle():
+    bus = ProgressBus(interval=0.02)
+    received = []
+    bus.subscribe(received.append)
+    try:
+        bus.finish('a', ok=True)
+        time.sleep(0.1)
+        published = len(received)
+        time.sleep(0.1)
+    finally:
+        bus.stop()
+
+    assert published == 1
+    assert len(received) == 2  # Plus the final one from stop()
+
+
+def test_full_queue_keeps_the_latest_snapshot():
+    bus = ProgressBus(interval=0.01)
+    snapshots = bus.subscribe()
+    try:
+        bus.update('a', downloaded=0, total=10_000)
+        for downloaded in range(1, 250):
+            bus.update('a', downloaded=downloaded)
+            bus._publish()  # Nobody drains the queue, as between GUI batches
+        bus.update('a', downloaded=9_999)
+        bus._publish()
+    finally:
+        bus.stop()
+
+    latest = None
+    while not snapshots.empty():
+        latest = snapshots.get_nowait()
+    assert latest.jobs[0].downloaded == 9_999
+
+
+def test_snapshot_counts_states_and_speed():
+    bus = ProgressBus(speed_window=10)
+    bus.update('a', downloaded=0, total=1000)
+    time.sleep(0.1)
+    bus.update('a', downloaded=500)
+    bus.finish('b', ok=True)
+    bus.finish('c', ok=False, error='boom')
+
+    snapshot = bus.snapshot()
+
+    assert (snapshot.active, snapshot.done, snapshot.failed) == (1, 1, 1)
+    assert snapshot.speed > 0
+    assert snapshot.eta is not None
+    assert {job.key: job.state for job in snapshot.jobs}['c'] == FAILED
+    assert {job.key: job.error for job in snapshot.jobs}['c'] == 'boom'
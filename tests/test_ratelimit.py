@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+from douyin_ratelimit import (CAPTCHA, MEDIA, PAGE, RateLimiter, TokenBucket, backoff_delay, host_class,
+                              parse_retry_after)
+
+
+def quiet_limiter(**kwargs) -> RateLimiter:
+    return RateLimiter(log_callback=lambda message: None, **kwargs)
+
+
+def test_bucket_allows_a_burst_then_refills_at_its_rate():
+    bucket = TokenBucket(rate=20.0, burst=3)
+
+    assert [bucket.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    delay = bucket.try_acquire()
+    assert 0 < delay <= 1 / 20.0
+
+    time.sleep(delay + 0.01)
+    assert bucket.try_acquire() == 0.0
+
+
+def test_acquire_waits_for_a_token_and_honours_timeout():
+    bucket = TokenBucket(rate=10.0, burst=1)
+    assert bucket.acquire() == pytest.approx(0.0, abs=0.01)
+
+    waited = bucket.acquire()
+    assert 0.05 <= waited <= 0.3
+
+    slow = TokenBucket(rate=0.1, burst=1)
+    slow.acquire()
+    assert slow.acquire(timeout=0.05) == -1.0
+
+
+def test_throttle_feedback_halves_the_rate_and_pauses_the_class():
+    limiter = quiet_limiter(rates={MEDIA: (8.0, 16)}, base_backoff=0.2, max_backoff=1.0)
+
+    limiter.feedback('https://v26-web.douyinvod.com/x.mp4', status=429)
+
+    media = limiter.buckets[MEDIA]
+    assert media.rate == 4.0 and media.penalties == 1
+    assert media.tokens == 0
+    assert limiter.try_acquire(MEDIA) > 0
+    assert limiter.buckets[PAGE].penalties == 0  # Other classes keep their pace
+
+
+def test_backoff_grows_with_consecutive_penalties():
+    bucket = TokenBucket(rate=8.0, burst=1)
+    for _ in range(4):
+        bucket.penalize(0.5, 1.0, 60.0)
+
+    assert bucket.strikes == 4
+    assert bucket.rate == 0.5
+    assert all(0 <= backoff_delay(attempt, 1.0, 60.0) <= min(60.0, 2 ** (attempt - 1)) for attempt in range(1, 10))
+
+
+def test_rate_recovers_additively_after_sustained_success():
+    limiter = quiet_limiter(rates={MEDIA: (8.0, 16)}, increase=0.25, increase_after=5, base_backoff=0.01)
+    limiter.feedback(MEDIA, status=403)
+    assert limiter.buckets[MEDIA].rate == 4.0
+
+    for _ in range(4):
+        limiter.feedback(MEDIA, status=200)
+    assert limiter.buckets[MEDIA].rate == 4.0
+    limiter.feedback(MEDIA, ok=True)
+    assert limiter.buckets[MEDIA].rate == 6.0
+    assert limiter.buckets[MEDIA].strikes == 0
+
+    for _ in range(1000):
+        limiter.feedback(MEDIA, ok=True)
+    assert limiter.buckets[MEDIA].rate == 32.0  # Capped at 4x the starting rate
+
+
+def test_retry_after_sets_the_minimum_pause():
+    limiter = quiet_limiter(base_backoff=0.001, max_backoff=30.0)
+
+    limiter.feedback(MEDIA, status=429, retry_after=5)
+
+    assert limiter.snapshot()[MEDIA]['paused_for'] >= 4.9
+    assert 4.9 <= limiter.try_acquire(MEDIA) <= 5.0
+
+
+def test_retry_after_is_capped_at_max_backoff():
+    limiter = quiet_limiter(base_backoff=0.001, max_backoff=2.0)
+
+    limiter.feedback(MEDIA, status=429, retry_after=3600)
+
+    assert limiter.try_acquire(MEDIA) <= 2.0
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('7', 7.0),
+    (' 0 ', 0.0),
+    ('Wed, 21 Oct 2015 07:28:00 GMT', 0.0),  # A date in the past means "now"
+    ('soon', None),
+    (None, None),
+])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    value = time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(time.time() + 120))
+
+    assert 115 <= parse_retry_after(value) <= 120
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://www.douyin.com/video/1', PAGE),
+    ('https://v26-web.douyinvod.com/abc/video/', MEDIA),
+    ('https://api.capsolver.com/createTask', CAPTCHA),
+    (PAGE, PAGE),
+])
+def test_host_class(url, expected):
+    assert host_class(url) == expected
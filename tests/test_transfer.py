@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import time
+
+import pytest
+
+pytest.importorskip('requests')
+
+from douyin_localserver import LocalServer, MediaServer
+from douyin_transfer import RemoteChangedError, ThrottledError, download_file, part_path_for
+
+VIDEO_SIZE = 256 * 1024
+
+
+def write_partial(output_path: str, server: MediaServer, done: int, etag: str):
+    """Leave a preallocated .part holding the first `done` bytes plus its sidecar, as an interrupted run does"""
+    size = len(server.payload)
+    part_path = part_path_for(output_path)
+    with open(part_path, 'wb') as f:
+        f.write(server.payload[:done])
+        f.truncate(size)
+    with open(part_path + '.json', 'w', encoding='utf-8') as f:
+        json.dump({'url': 'old', 'etag': etag, 'last_modified': None, 'content_length': size,
+                   'bytes_completed': done, 'segments': [[0, size - 1, done]]}, f)
+    return part_path
+
+
+class ChangingMediaServer(MediaServer):
+    """Serves a new ETag after the first request, like a file replaced between probe and download"""
+
+    def _media(self, handler, parsed):
+        super()._media(handler, parsed)
+        self.etag = '"replaced"'
+
+
+class FirstSegmentThrottledServer(MediaServer):
+    """Answers 429 for the range starting at byte 0 (but not the probe); the other ranges are slow"""
+
+    def _media(self, handler, parsed):
+        byte_range = handler.headers.get('Range') or ''
+        if byte_range.startswith('bytes=0-') and byte_range != 'bytes=0-0':
+            handler._send(429, b'slow down', 'text/plain', {'Retry-After': '1'})
+            return
+        super()._media(handler, parsed)
+
+
+class ThrottlingServer(LocalServer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.routes.append(('/media/', self._throttled))
+
+    def _throttled(self, handler, parsed):
+        handler._send(429, b'slow down', 'text/plain', {'Retry-After': '1'})
+
+
+def test_resume_fetches_only_missing_bytes(tmp_path):
+    output_path = str(tmp_path / 'video.mp4')
+    done = VIDEO_SIZE // 3
+    with MediaServer(video_size=VIDEO_SIZE) as server:
+        part_path = write_partial(output_path, server, done, server.etag)
+        result = download_file(server.media_url('v1'), output_path, {})
+        sent = server.bytes_sent
+
+    with open(output_path, 'rb') as f:
+        assert f.read() == server.payload
+    assert result.size == VIDEO_SIZE
+    assert result.sha256 == hashlib.sha256(server.payload).hexdigest()
+    assert sent == 1 + VIDEO_SIZE - done  # The probe byte plus the rest of the file
+    assert not os.path.exists(part_path)
+    assert not os.path.exists(part_path + '.json')
+
+
+def test_if_range_mismatch_raises_remote_changed(tmp_path):
+    output_path = str(tmp_path / 'video.mp4')
+    with ChangingMediaServer(video_size=VIDEO_SIZE) as server:
+        part_path = write_partial(output_path, server, VIDEO_SIZE // 2, server.etag)
+        with pytest.raises(RemoteChangedError):
+            download_file(server.media_url('v1'), output_path, {})
+
+    assert not os.path.exists(output_path)
+    # The stale sidecar is dropped so the next attempt starts from scratch
+    assert not os.path.exists(part_path + '.json')
+
+
+def test_429_raises_throttled(tmp_path):
+    output_path = str(tmp_path / 'video.mp4')
+    with ThrottlingServer() as server:
+        with pytest.raises(ThrottledError) as excinfo:
+            download_file(f"{server.base_url}/media/v1.mp4", output_path, {})
+    assert excinfo.value.retry_after == 1.0
+    assert not os.path.exists(output_path)
+
+
+def test_failed_segment_stops_the_others(tmp_path):
+    output_path = str(tmp_path / 'video.mp4')
+    size = 1024 * 1024
+    # Each of the other three segments would take about 2 s at this rate
+    with FirstSegmentThrottledServer(video_size=size, connection_bandwidth=128 * 1024, write_size=8 * 1024) as server:
+        started = time.monotonic()
+        with pytest.raises(ThrottledError):
+            download_file(server.media_url('v1'), output_path, {}, segments=4, min_segment_size=64 * 1024,
+                          chunk_size=8 * 1024)
+        elapsed = time.monotonic() - started
+        sent = server.bytes_sent
+
+    assert elapsed < 1.0
+    assert sent < size // 2
+
+
+def test_before_request_runs_ahead_of_every_request(tmp_path):
+    output_path = str(tmp_path / 'video.mp4')
+    calls = []
+    with MediaServer(video_size=VIDEO_SIZE) as server:
+        download_file(server.media_url('v1'), output_path, {}, segments=4, min_segment_size=VIDEO_SIZE // 4,
+                      before_request=lambda: calls.append(len(server.requests)))
+        requests_made = len(server.requests)
+
+    # The probe and each of the four ranges; the probe's call came before any request
+    assert len(calls) == requests_made == 5
+    assert calls[0] == 0
@@ -0,0 +1,115 @@
+import threading
+
+import pytest
+
+import douyin_urls
+from douyin_urls import (PROFILE, SHORT, UNKNOWN, VIDEO, UrlNormalizer, find_url, standardize_url,
+                         video_id_from_url)
+
+
+class _Response:
+    def __init__(self, location):
+        self.headers = {'location': location} if location else {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class RedirectSession:
+    """Answers v.douyin.com lookups from a code -> Location table and counts them"""
+
+    def __init__(self, targets):
+        self.targets = targets
+        self.calls = []
+        self.fail = False
+        self._lock = threading.Lock()
+
+    def get(self, url, allow_redirects=True, stream=False, timeout=None):
+        assert not allow_redirects
+        with self._lock:
+            self.calls.append(url)
+        if self.fail:
+            raise ConnectionError("offline")
+        code = url.rstrip('/').rsplit('/', 1)[-1]
+        return _Response(self.targets.get(code))
+
+
+@pytest.fixture(autouse=True)
+def fresh_memo():
+    douyin_urls._expanded.clear()
+    yield
+    douyin_urls._expanded.clear()
+
+
+def test_text_only_links_need_no_network():
+    session = RedirectSession({})
+    normalizer = UrlNormalizer(session)
+
+    items = normalizer.normalize_many([
+        '7.94 复制打开抖音 https://www.douyin.com/video/7301234567890000001?previous_page=app',
+        'https://www.douyin.com/discover?modal_id=7301234567890000002',
+        'https://www.douyin.com/user/MS4wLjABAAAA_x?vid=7301234567890000003',
+        'https://www.douyin.com/user/MS4wLjABAAAA_y',
+        '# comment',
+        '',
+        'https://example.com/nothing',
+    ])
+
+    assert [(item.kind, item.video_id) for item in items] == [
+        (VIDEO, '7301234567890000001'), (VIDEO, '7301234567890000002'), (VIDEO, '7301234567890000003'),
+        (PROFILE, None), (UNKNOWN, None)]
+    assert items[0].url == 'https://www.douyin.com/video/7301234567890000001'
+    assert session.calls == []
+
+
+def test_short_links_expand_once_per_code():
+    session = RedirectSession({
+        'abc': 'https://www.iesdouyin.com/share/video/7301234567890000001/?region=CN',
+        'prof': 'https://www.iesdouyin.com/share/user/MS4wLjABAAAA_x?u=1',
+    })
+    normalizer = UrlNormalizer(session)
+
+    items = normalizer.normalize_many(['https://v.douyin.com/abc/', 'look v.douyin.com/abc/ here',
+                                       'https://v.douyin.com/prof/'])
+
+    # Both lines with code abc were one lookup, and the duplicate was dropped
+    assert sorted(session.calls) == ['https://v.douyin.com/abc/', 'https://v.douyin.com/prof/']
+    assert [(item.url, item.kind) for item in items] == [
+        ('https://www.douyin.com/video/7301234567890000001', VIDEO),
+        ('https://www.douyin.com/user/MS4wLjABAAAA_x', PROFILE)]
+
+    # Memoized for the process: other normalizers and standardize_url reuse the result
+    other = UrlNormalizer(session)
+    assert other.video_id('https://v.douyin.com/abc/') == '7301234567890000001'
+    assert standardize_url('https://v.douyin.com/abc/') == 'https://www.douyin.com/video/7301234567890000001'
+    assert len(session.calls) == 2
+
+
+def test_failed_expansion_is_not_memoized():
+    session = RedirectSession({'abc': 'https://www.douyin.com/video/7301234567890000001'})
+    normalizer = UrlNormalizer(session)
+
+    session.fail = True
+    assert normalizer.expand('abc') is None
+    session.fail = False
+    assert normalizer.expand('abc') == 'https://www.douyin.com/video/7301234567890000001'
+    assert len(session.calls) == 2
+
+
+def test_expand_false_keeps_short_links():
+    session = RedirectSession({})
+
+    item = UrlNormalizer(session).normalize('https://v.douyin.com/abc/', expand=False)
+
+    assert item.kind == SHORT
+    assert session.calls == []
+
+
+def test_helpers():
+    assert find_url('xem https://v.douyin.com/abc/ ngay') == 'https://v.douyin.com/abc/'
+    assert video_id_from_url('https://www.douyin.com/share/video/7301234567890000001') == '7301234567890000001'
+    assert video_id_from_url('https://www.douyin.com/user/x') is None
+    assert standardize_url('id 7301234567890000009') == 'https://www.douyin.com/video/7301234567890000009'
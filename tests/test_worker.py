@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from douyin_engine import DownloadJob
+from douyin_jobstore import CLAIMED, QUEUED, JobStore
+from douyin_progress import DONE
+from douyin_worker import HttpJobQueue, JobQueueServer, Worker
+
+TOKEN = 'secret'
+
+
+@pytest.fixture
+def server(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite'))
+    with JobQueueServer(store, port=0, token=TOKEN) as server:
+        yield server
+    store.close()
+
+
+def test_requests_without_the_token_are_refused(server):
+    for token in (None, 'wrong'):
+        queue = HttpJobQueue(server.url, token)
+        with pytest.raises(requests.HTTPError) as excinfo:
+            queue.claim('w1', lease=60)
+        assert excinfo.value.response.status_code == 401
+        queue.close()
+    assert len(server.store) == 0
+
+
+def test_claim_and_complete_over_http(server):
+    queue = HttpJobQueue(server.url, TOKEN)
+    added = queue.add_many(['https://www.douyin.com/video/1', 'https://www.douyin.com/video/2'], 'out')
+
+    job = queue.claim('w1', lease=60)
+    assert job.job_id == added[0].job_id
+    assert job.state == CLAIMED and job.claimed_by == 'w1'
+    assert queue.heartbeat('w1', [job.job_id], lease=60) == []
+    assert queue.update(job.job_id, 'w1', progress=40.0)
+    assert not queue.complete(job.job_id, True, worker='w2')  # Not its job
+    assert queue.complete(job.job_id, True, worker='w1', output_path='out/1.mp4')
+
+    stored = server.store.get(job.job_id)
+    assert stored.state == DONE
+    assert stored.output_path == 'out/1.mp4'
+    assert queue.counts() == {DONE: 1, QUEUED: 1}
+    queue.close()
+
+
+class FakeDownloader:
+    media_cache = None
+    progress_bus = None
+    metrics = None
+    use_manifest = False
+    driver = None
+    profile_listed = threading.Event()  # Set by the test once a video finished during the crawl
+    crawl_unblocked = False
+
+    def is_downloaded(self, video_id, download_path):
+        return False
+
+    def extract_video_id(self, url):
+        return url.rsplit('/', 1)[-1]
+
+    def resolve_video_url(self, url, use_cache=True):
+        return f"https://cdn.example/{self.extract_video_id(url)}.mp4"
+
+    def download_media(self, video_url, video_id, download_path, progress_callback=None):
+        return True
+
+    def output_path_for(self, video_id, download_path):
+        return os.path.join(download_path, f"{video_id}.mp4")
+
+    def iter_user_videos(self, url):
+        FakeDownloader.crawl_unblocked = self.profile_listed.wait(5)
+        for i in range(2):
+            yield {'url': f'https://www.douyin.com/video/730123456789000010{i}'}
+
+    def _cleanup_driver(self):
+        pass
+
+
+def test_result_of_a_reassigned_job_is_not_counted(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite'))
+    results = []
+    worker = Worker(store, FakeDownloader, worker_id='w1', lease=0.05, log_callback=lambda message: None,
+                    on_result=lambda job, stored: results.append(job))
+    store.add('https://www.douyin.com/video/7301234567890000001')
+    stored = store.claim('w1', lease=0.05)
+    time.sleep(0.1)
+    store.claim('w2', lease=60)  # w1's lease ran out and w2 took the job over
+    worker._held[1] = stored
+
+    worker._report(DownloadJob(stored.url, job_id=1, state=DONE))
+
+    assert (worker.completed, worker.failed, results) == (0, 0, [])
+    assert store.get(stored.job_id).claimed_by == 'w2'
+    store.close()
+
+
+def test_profile_listing_does_not_hold_up_other_jobs(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite'))
+    store.add('https://www.douyin.com/user/MS4wLjABAAAA_fixture_user', str(tmp_path))
+    store.add('https://www.douyin.com/video/7301234567890000001', str(tmp_path))
+    FakeDownloader.profile_listed.clear()
+
+    def on_result(job, stored):
+        FakeDownloader.profile_listed.set()  # Only reachable while the crawl waits if it runs off the claim loop
+
+    worker = Worker(store, FakeDownloader, worker_id='w1', resolve_workers=1, transfer_workers=1, poll_interval=0.1,
+                    log_callback=lambda message: None, on_result=on_result, retry_delay=0)
+
+    completed = worker.run(until_empty=True)
+
+    assert FakeDownloader.crawl_unblocked
+    assert completed == 3
+    assert store.counts() == {DONE: 4}
+    store.close()
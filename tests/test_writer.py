@@ -0,0 +1,58 @@
+import hashlib
+import os
+import random
+import threading
+
+from douyin_writer import MediaWriter
+
+DATA = random.Random(1).randbytes(300_000)
+
+
+def test_sequential_writes_hash_inline_and_rename_on_commit(tmp_path):
+    output_path = str(tmp_path / 'video.mp4')
+    with MediaWriter(output_path, len(DATA)) as writer:
+        assert os.path.getsize(writer.part_path) == len(DATA)  # Preallocated
+        for offset in range(0, len(DATA), 65536):
+            writer.write(DATA[offset:offset + 65536])
+        size, sha256 = writer.commit()
+
+    assert (size, sha256) == (len(DATA), hashlib.sha256(DATA).hexdigest())
+    assert not os.path.exists(output_path + '.part')
+    with open(output_path, 'rb') as f:
+        assert f.read() == DATA
+
+
+def test_parallel_segments_out_of_order(tmp_path):
+    output_path = str(tmp_path / 'video.mp4')
+    segments = [(start, min(len(DATA), start + 75_000)) for start in range(0, len(DATA), 75_000)]
+    writer = MediaWriter(output_path, len(DATA))
+    threads = [threading.Thread(target=writer.write_at, args=(start, DATA[start:end]))
+               for start, end in reversed(segments)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    _, sha256 = writer.commit()  # Hashes from disk what arrived out of order
+
+    assert sha256 == hashlib.sha256(DATA).hexdigest()
+    with open(output_path, 'rb') as f:
+        assert f.read() == DATA
+
+
+def test_resume_keeps_existing_part_and_unknown_size_truncates(tmp_path):
+    output_path = str(tmp_path / 'video.mp4')
+    half = len(DATA) // 2
+    writer = MediaWriter(output_path, len(DATA))
+    writer.write_at(0, DATA[:half])
+    writer.close()  # Interrupted; the .part stays
+
+    resumed = MediaWriter(output_path, len(DATA), resume=True)
+    resumed.write_at(half, DATA[half:])
+    _, sha256 = resumed.commit()
+    assert sha256 == hashlib.sha256(DATA).hexdigest()
+
+    # Without a known size the file is as long as what was written
+    streamed = MediaWriter(str(tmp_path / 'stream.mp4'))
+    streamed.write(DATA[:1000])
+    assert streamed.commit() == (1000, hashlib.sha256(DATA[:1000]).hexdigest())